@@ -22,10 +22,20 @@ from .menu_manager import MenuManager
 from .dual_panel_manager import DualPanelManager
 from .keyboard_manager import KeyboardManager
 from .multi_location_search import MultiLocationSearch
+from .cache_build_queue import CacheBuildQueue
 from .search_methods import SearchMethods
 from .results_display import ResultsDisplay
+from .virtual_results import VirtualResultsView
+from .results_organizer import ResultsOrganizer
+from .ui_dispatcher import UIDispatcher
 from .theme_manager import ThemeManager
 from .tree_column_config import TreeColumnConfig
+from .column_width_model import ColumnWidthModel
+from .enrichment_service import EnrichmentService
+from .children_prober import ChildrenProber
+from .directory_stats import DirectoryStatsService
+from .directory_prefetcher import DirectoryPrefetcher
+from .listing_cache import ListingCache
 
 class LocationTooltip:
     """Tooltip para la barra de ubicaciones"""
@@ -86,6 +96,8 @@ class BusquedaCarpetaApp:
         start_time = time.time()
         
         self.master = master
+        # Toda actualización de widgets desde hilos de trabajo pasa por aquí
+        self.ui_dispatcher = UIDispatcher(master)
         self.version = "V. 5.0 - Luce Intellettual"
         self.modo_numerico = True
         
@@ -104,11 +116,16 @@ class BusquedaCarpetaApp:
         self.search_engine = SearchEngine(self.ruta_carpeta)
         self.window_manager = WindowManager(master, self.version)
         self.multi_location_search = MultiLocationSearch(self)
+        self.cache_build_queue = CacheBuildQueue(
+            max_concurrentes=self.config.config.get("cache_build_workers", 4))
+        self.cache_build_queue.subscribe(self._on_cache_build_update)
         self.dual_panel_manager = DualPanelManager(self)
         
         # Módulos extraídos
         self.search_methods = SearchMethods(self)
         self.results_display = ResultsDisplay(self)
+        self.virtual_results = VirtualResultsView(self)
+        self.results_organizer = ResultsOrganizer(self)
                 
         # ODBC Database Manager
         try:
@@ -116,6 +133,13 @@ class BusquedaCarpetaApp:
             self.database_manager = DatabaseManager(self)
         except ImportError:
             self.database_manager = None
+        self.enrichment_service = EnrichmentService(self)
+        self.children_prober = ChildrenProber(self)
+        self.directory_stats = DirectoryStatsService()
+        # Listados de carpetas compartidos por los árboles y prelistado de las próximas expansiones
+        self.listing_cache = ListingCache()
+        self.directory_prefetcher = DirectoryPrefetcher(
+            self.listing_cache, fan_out=self.config.config.get("prefetch_carpetas", 8))
         
         # Configurar ventana
         self.window_manager.configurar_ventana()
@@ -127,6 +151,7 @@ class BusquedaCarpetaApp:
         self._configure_app()
         self._start_location_rotation()
         self._cargar_cache_inteligente()
+        self.cache_build_queue.reanudar_pendientes()
         
         print(f"[PROFILE] App iniciada en: {time.time() - start_time:.3f}s")
         
@@ -167,10 +192,15 @@ class BusquedaCarpetaApp:
         ui = UIComponents(self.main_container, self.version).crear_interfaz_completa()
         
         # Asignar referencias
-        for ref in ['entry', 'modo_label', 'btn_buscar', 'btn_cancelar', 'tree', 
+        for ref in ['entry', 'modo_label', 'btn_buscar', 'btn_cancelar', 'tree', 'y_scroll',
+                    'entry_filtro', 'combo_orden', 'combo_agrupar',
                     'btn_copiar', 'btn_abrir', 'label_estado', 'label_carpeta_info', 'configurar_scrollbars']:
             setattr(self, ref, ui[ref])
         
+        # Anchos de columna mantenidos fila por fila (el autoajuste no recorre el árbol)
+        self.column_widths = ColumnWidthModel(
+            self.tree, al_cambiar=lambda: self.ui_callbacks._ajustar_columnas_inmediato())
+        
         # Configurar barra clickeable
         self.label_carpeta_info.bind("<Button-1>", lambda e: self.menu_manager._show_locations_config())
         self.label_carpeta_info.configure(cursor="hand2")
@@ -222,7 +252,7 @@ class BusquedaCarpetaApp:
         self.tree_expansion_handler = TreeExpansionHandler(self)
         # Configurar columnas para TreeView de resultados
         if hasattr(self, 'tree') and self.tree:
-            self.results_column_config = TreeColumnConfig(self.tree, "results")
+            self.results_column_config = TreeColumnConfig(self.tree, "results", self.column_widths)
 
     def _configure_app(self):
         """Configuración final"""
@@ -240,6 +270,9 @@ class BusquedaCarpetaApp:
         if hasattr(self, 'tree_expansion_handler'):
             self.tree_expansion_handler.configure_tree_expansion()
         
+        # Orden, grupos y filtro de los resultados mostrados
+        self.results_organizer.configurar()
+        
         # Referencias UI
         self.ui_manager.configurar_referencias(*self._find_status_cache_frames())
 
@@ -345,16 +378,26 @@ class BusquedaCarpetaApp:
         self.multi_location_search.reload_locations()
         self.label_carpeta_info.config(text=self.multi_location_search.get_rotation_text())
 
-    def _on_explorer_file_change(self, operation, paths):
-        """Maneja cambios de archivos del explorador"""
-        print(f'[App] Cambio en explorador: {operation}')
-        
-        # Mostrar warning de resultados desactualizados
-        if hasattr(self, 'label_estado'):
-            self.label_estado.config(
-                text="⚠️ Los resultados mostrados pueden estar desactualizados",
-                fg='#ff6b00'  # Naranja
-            )
+    def _on_cache_build_update(self, job):
+        """Recarga ubicaciones cuando termina la construcción de un cache"""
+        from .cache_build_queue import COMPLETADO
+        if job.estado == COMPLETADO:
+            self.ui_dispatcher.publicar_ultimo('ubicaciones', self.update_search_locations, None)
+
+    def _on_explorer_file_change(self, operation, cambios):
+        """Pasa el delta del explorador (file_delta) a los resultados y al índice de búsqueda"""
+        print(f'[App] Cambio en explorador: {operation} ({len(cambios["creados"])} creados, '
+              f'{len(cambios["eliminados"])} eliminados, {len(cambios["movidos"])} movidos)')
+        
+        # Índice de búsqueda: se parchea en segundo plano en vez de reconstruirse
+        if getattr(self, 'cache_manager', None):
+            self.cache_manager.aplicar_cambios(cambios)
+        
+        # Resultados mostrados: se quitan o renombran solo las filas afectadas
+        if getattr(self, 'results_organizer', None):
+            actualizados = self.results_organizer.aplicar_cambios(cambios)
+            if actualizados and hasattr(self, 'label_estado'):
+                self.label_estado.config(text=f"Resultados actualizados: {actualizados} carpeta(s)")
 
     # Toggle methods
     def toggle_historial(self):
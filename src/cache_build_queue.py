@@ -0,0 +1,281 @@
+# src/cache_build_queue.py - Cola de construcción de caches por ubicación
+import heapq
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+from .cache_manager import CacheManager
+
+# Estados de un trabajo
+EN_COLA = 'en_cola'
+CONSTRUYENDO = 'construyendo'
+COMPLETADO = 'completado'
+CANCELADO = 'cancelado'
+ERROR = 'error'
+
+# Prioridades (menor se construye antes)
+PRIORIDAD_ALTA = 0
+PRIORIDAD_NORMAL = 1
+
+
+class CacheBuildJob:
+    """Construcción de cache de una ubicación"""
+
+    def __init__(self, path, name, prioridad=PRIORIDAD_NORMAL):
+        self.path = path
+        self.name = name
+        self.prioridad = prioridad
+        self.estado = EN_COLA
+        self.progreso = 0
+        self.mensaje = "En cola"
+        self.carpetas = 0
+        self.inicio = None
+        self.fin = None
+        self.cancelado = False
+        self.cache_manager = None
+
+    def get_eta(self):
+        """Segundos restantes estimados según el avance actual (None si no hay datos)"""
+        if self.estado != CONSTRUYENDO or not self.inicio or self.progreso <= 5:
+            return None
+        transcurrido = time.time() - self.inicio
+        return transcurrido * (100 - self.progreso) / self.progreso
+
+    def to_dict(self):
+        return {
+            'path': self.path,
+            'name': self.name,
+            'prioridad': self.prioridad
+        }
+
+
+class CacheBuildQueue:
+    """Construye caches de ubicaciones en paralelo, con prioridad y cancelación
+
+    Los suscriptores reciben cada CacheBuildJob modificado desde los hilos de
+    trabajo; son responsables de pasar la actualización al hilo de Tk. Los
+    trabajos pendientes se guardan en disco y se reanudan al reiniciar.
+    """
+
+    def __init__(self, max_concurrentes=4, queue_file="cache_build_queue.json",
+                 locations_file="search_locations.json"):
+        self.max_concurrentes = max(1, int(max_concurrentes))
+        self.queue_file = queue_file
+        self.locations_file = locations_file
+
+        self._lock = threading.Lock()
+        self._heap = []  # (prioridad, secuencia, job)
+        self._secuencia = 0
+        self._jobs = {}  # {path: job} del último trabajo por ubicación
+        self._workers_activos = 0
+        self._suscriptores = []
+
+    # Suscripción
+
+    def subscribe(self, callback):
+        """Registra callback(job) para cambios de estado y progreso"""
+        if callback not in self._suscriptores:
+            self._suscriptores.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self._suscriptores:
+            self._suscriptores.remove(callback)
+
+    def _notificar(self, job):
+        for callback in list(self._suscriptores):
+            try:
+                callback(job)
+            except Exception as e:
+                print(f"[CACHE QUEUE] Error notificando suscriptor: {e}")
+
+    # API pública
+
+    def enqueue(self, path, name=None, prioridad=PRIORIDAD_NORMAL):
+        """Encola la construcción de una ubicación (sin duplicar trabajos activos)"""
+        name = name or os.path.basename(path) or path
+
+        with self._lock:
+            job = self._jobs.get(path)
+            if job and job.estado in (EN_COLA, CONSTRUYENDO):
+                if job.estado == EN_COLA and prioridad < job.prioridad:
+                    job.prioridad = prioridad
+                    self._push(job)
+                return job
+
+            job = CacheBuildJob(path, name, prioridad)
+            self._jobs[path] = job
+            self._push(job)
+            lanzar = self._workers_activos < self.max_concurrentes
+            if lanzar:
+                self._workers_activos += 1
+
+        self._guardar_pendientes()
+        self._notificar(job)
+
+        if lanzar:
+            threading.Thread(target=self._worker, daemon=True).start()
+        return job
+
+    def cancel(self, path):
+        """Cancela la construcción de una ubicación (en cola o en curso)"""
+        with self._lock:
+            job = self._jobs.get(path)
+            if not job or job.estado not in (EN_COLA, CONSTRUYENDO):
+                return False
+            job.cancelado = True
+            if job.cache_manager:
+                job.cache_manager.cancelado = True
+            if job.estado == EN_COLA:
+                job.estado = CANCELADO
+                job.mensaje = "Cancelado"
+
+        self._guardar_pendientes()
+        self._notificar(job)
+        return True
+
+    def cancel_all(self):
+        for path in list(self._jobs):
+            self.cancel(path)
+
+    def get_job(self, path):
+        return self._jobs.get(path)
+
+    def get_jobs(self):
+        return list(self._jobs.values())
+
+    def is_busy(self):
+        """True si hay trabajos en cola o en construcción"""
+        return any(job.estado in (EN_COLA, CONSTRUYENDO) for job in self._jobs.values())
+
+    def reanudar_pendientes(self):
+        """Vuelve a encolar los trabajos guardados en la sesión anterior"""
+        try:
+            if not os.path.exists(self.queue_file):
+                return 0
+            with open(self.queue_file, 'r', encoding='utf-8') as f:
+                pendientes = json.load(f)
+        except Exception as e:
+            print(f"[CACHE QUEUE] Error cargando cola: {e}")
+            return 0
+
+        reanudados = 0
+        for data in pendientes:
+            # Las ubicaciones que ya no existen se descartan (y no cuentan)
+            if os.path.isdir(data.get('path', '')):
+                self.enqueue(data['path'], data.get('name'), data.get('prioridad', PRIORIDAD_NORMAL))
+                reanudados += 1
+
+        if reanudados:
+            print(f"[CACHE QUEUE] Reanudados {reanudados} trabajos pendientes")
+        if len(pendientes) > reanudados:
+            print(f"[CACHE QUEUE] Descartados {len(pendientes) - reanudados} trabajos de rutas inexistentes")
+        return reanudados
+
+    # Trabajo
+
+    def _push(self, job):
+        heapq.heappush(self._heap, (job.prioridad, self._secuencia, job))
+        self._secuencia += 1
+
+    def _pop(self):
+        """Siguiente trabajo en cola (descarta entradas canceladas o repetidas)"""
+        with self._lock:
+            while self._heap:
+                prioridad, _, job = heapq.heappop(self._heap)
+                if job.estado == EN_COLA and prioridad == job.prioridad and self._jobs.get(job.path) is job:
+                    job.estado = CONSTRUYENDO
+                    job.inicio = time.time()
+                    job.mensaje = "Iniciando..."
+                    return job
+            self._workers_activos -= 1
+            return None
+
+    def _worker(self):
+        while True:
+            job = self._pop()
+            if job is None:
+                return
+            self._notificar(job)
+            self._construir(job)
+            self._guardar_pendientes()
+            self._notificar(job)
+
+    def _construir(self, job):
+        try:
+            temp_cache = CacheManager(job.path, cache_file=CacheManager.cache_file_for(job.path))
+            job.cache_manager = temp_cache
+            if job.cancelado:
+                temp_cache.cancelado = True
+
+            def on_progreso(progreso, total, mensaje):
+                job.progreso = progreso
+                job.mensaje = mensaje
+                self._notificar(job)
+
+            temp_cache.callback_progreso = on_progreso
+
+            if temp_cache.construir_cache():
+                job.carpetas = temp_cache.get_cache_stats().get('carpetas', 0)
+                job.estado = COMPLETADO
+                job.progreso = 100
+                job.mensaje = f"{job.carpetas:,} carpetas"
+                self._actualizar_ubicacion(job)
+            elif job.cancelado:
+                job.estado = CANCELADO
+                job.mensaje = "Cancelado"
+            else:
+                job.estado = ERROR
+                job.mensaje = "Falló la construcción"
+
+        except Exception as e:
+            print(f"[CACHE QUEUE] Error construyendo {job.name}: {e}")
+            job.estado = ERROR
+            job.mensaje = str(e)
+        finally:
+            job.fin = time.time()
+            job.cache_manager = None
+
+    # Persistencia
+
+    def _guardar_pendientes(self):
+        """Guarda en disco los trabajos que aún no terminaron"""
+        with self._lock:
+            pendientes = [job.to_dict() for job in self._jobs.values()
+                          if job.estado in (EN_COLA, CONSTRUYENDO)]
+        try:
+            if pendientes:
+                with open(self.queue_file, 'w', encoding='utf-8') as f:
+                    json.dump(pendientes, f, indent=2, ensure_ascii=False)
+            elif os.path.exists(self.queue_file):
+                os.remove(self.queue_file)
+        except Exception as e:
+            print(f"[CACHE QUEUE] Error guardando cola: {e}")
+
+    def _actualizar_ubicacion(self, job):
+        """Actualiza tamaño y fecha de escaneo de la ubicación en la configuración"""
+        try:
+            if not os.path.exists(self.locations_file):
+                return
+            with self._lock:
+                with open(self.locations_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                for item in data:
+                    if os.path.normpath(item.get('path', '')) == os.path.normpath(job.path):
+                        item['cache_size'] = job.carpetas
+                        item['last_scanned'] = datetime.now().strftime("%H:%M:%S")
+                with open(self.locations_file, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, indent=2, ensure_ascii=False)
+        except Exception as e:
+            print(f"[CACHE QUEUE] Error actualizando ubicación {job.name}: {e}")
+
+
+def formatear_eta(segundos):
+    """Formatea segundos restantes como '12s' o '3m 05s'"""
+    if segundos is None:
+        return ""
+    segundos = int(segundos)
+    if segundos < 60:
+        return f"{segundos}s"
+    return f"{segundos // 60}m {segundos % 60:02d}s"
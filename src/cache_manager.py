@@ -1,10 +1,15 @@
 # src/cache_manager.py - Gestor de Cache V.4.5 - OPTIMIZADO CON CARGA AUTOMÁTICA
 import os
+import hashlib
 import pickle
 import time
 import threading
 from datetime import datetime, timedelta
 
+from .constants import MAX_RESULTADOS
+from .file_delta import ancestro_en, clave_ruta, reubicar
+from .radicado import indexar_radicados
+
 class CacheData:
     """Estructura de datos del cache"""
     def __init__(self):
@@ -20,15 +25,59 @@ class CacheData:
 class CacheManager:
     """Gestor de cache de carpetas optimizado - CON CARGA AUTOMÁTICA AL INICIO"""
     
-    def __init__(self, ruta_base=None):
+    # Caches de ubicaciones cargados una vez y compartidos: {ruta: (mtime del archivo, CacheManager o None)}
+    _ubicaciones = {}
+    _ubicaciones_lock = threading.Lock()
+    
+    def __init__(self, ruta_base=None, cache_file=None):
         self.ruta_base = ruta_base
-        self.cache_file = "carpetas_cache.pkl"
+        self.cache_file = cache_file or "carpetas_cache.pkl"
         self.cache = CacheData()
         self.construyendo = False
+        self.cancelado = False
         self.callback_progreso = None
+        self._cambios_lock = threading.Lock()
         
         # CAMBIO PRINCIPAL: Cargar cache automáticamente al crear la instancia
         self._cargar_cache_automatico()
+    
+    @staticmethod
+    def cache_file_for(ruta):
+        """Nombre único de archivo cache para una ubicación"""
+        path_hash = hashlib.md5(ruta.encode()).hexdigest()[:8]
+        return f"cache_{path_hash}.pkl"
+    
+    @classmethod
+    def de_ubicacion(cls, ruta):
+        """Cache cargado de una ubicación (None si no hay uno válido), compartido entre búsquedas
+        
+        El pickle se lee una sola vez; se vuelve a leer cuando el archivo
+        cambia (la cola lo reconstruyó). Cada búsqueda cuesta un stat.
+        """
+        archivo = cls.cache_file_for(ruta)
+        try:
+            mtime = os.stat(archivo).st_mtime
+        except OSError:
+            mtime = None
+        
+        with cls._ubicaciones_lock:
+            entrada = cls._ubicaciones.get(ruta)
+        if entrada is not None and entrada[0] == mtime:
+            return entrada[1]
+        
+        manager = None
+        if mtime is not None:
+            manager = cls(ruta, cache_file=archivo)
+            if manager.cache.valido:
+                directorios = manager.cache.directorios
+                if directorios.get('radicados') is None:
+                    # Cache anterior al índice: se indexa en memoria para no reescribir el archivo
+                    directorios['radicados'] = indexar_radicados(directorios.get('directorios', []))
+            else:
+                manager = None
+        with cls._ubicaciones_lock:
+            cls._ubicaciones[ruta] = (mtime, manager)
+        return manager
         
     def _cargar_cache_automatico(self):
         """Carga cache automáticamente al inicializar - NUEVO MÉTODO"""
@@ -132,12 +181,18 @@ class CacheManager:
             # Escaneo optimizado
             carpetas = []
             procesados = 0
+            ultimo_progreso = 0
             start_time = time.time()
             
             # Límites estrictos pero permitir más tiempo para construcción inicial
             MAX_CARPETAS, MAX_TIEMPO, MAX_PROFUNDIDAD = 50000, 60, 8  # Aumentado tiempo y profundidad
             
             for root, dirs, files in os.walk(self.ruta_base):
+                # Cancelación externa (cola de construcción)
+                if self.cancelado:
+                    print(f"[CACHE] Construcción cancelada: {self.ruta_base}")
+                    return False
+                
                 # Verificar límites
                 if (time.time() - start_time > MAX_TIEMPO or 
                     len(carpetas) >= MAX_CARPETAS):
@@ -167,12 +222,13 @@ class CacheManager:
                         
                         procesados += 1
                         
-                        # Progreso cada 200 carpetas (menos frecuente)
+                        # Progreso cada 200 carpetas, solo si avanzó el porcentaje
                         if self.callback_progreso and procesados % 200 == 0:
                             try:
-                                progreso = min(5 + (procesados / total_estimado) * 90, 95) if total_estimado > 0 else 5
-                                if progreso % 10 == 0:  # Solo cada 10%
-                                    self.callback_progreso(int(progreso), 100, 
+                                progreso = int(min(5 + (procesados / total_estimado) * 90, 95)) if total_estimado > 0 else 5
+                                if progreso > ultimo_progreso:
+                                    ultimo_progreso = progreso
+                                    self.callback_progreso(progreso, 100, 
                                                          f"Escaneando... {procesados:,} carpetas")
                             except Exception:
                                 pass
@@ -194,7 +250,9 @@ class CacheManager:
             self.cache.directorios = {
                 'directorios': carpetas,
                 'total': len(carpetas),
-                'timestamp': time.time()
+                'timestamp': time.time(),
+                'radicados': indexar_radicados(carpetas),
+                'con_hijos': self._indice_con_hijos(carpetas)
             }
             self.cache.timestamp = time.time()
             self.cache.ruta_base = self.ruta_base
@@ -254,7 +312,6 @@ class CacheManager:
             return []
         
         # Búsqueda con límite
-        MAX_RESULTADOS = 2000
         start_time = time.time()
         
         for carpeta in carpetas:
@@ -273,6 +330,143 @@ class CacheManager:
         
         return resultados
     
+    def rutas_con_hijos(self):
+        """Rutas (normalizadas) que tienen al menos una subcarpeta en el cache
+        
+        None si el cache es anterior al índice: `completar_indice_con_hijos`
+        lo arma (desde un hilo de trabajo, recorre y guarda todo el cache).
+        """
+        if not self.cache.valido:
+            return set()
+        return self.cache.directorios.get('con_hijos')
+    
+    def completar_indice_con_hijos(self):
+        """Deriva una vez el índice de un cache viejo y lo guarda con el cache (hilo de trabajo)"""
+        rutas = self.rutas_con_hijos()
+        if rutas is None:
+            rutas = self._indice_con_hijos(self.cache.directorios.get('directorios', []))
+            self.cache.directorios['con_hijos'] = rutas
+            self.guardar_cache()
+        return rutas
+    
+    @staticmethod
+    def _indice_con_hijos(carpetas):
+        """Rutas normalizadas de las carpetas padre de las indexadas"""
+        return {os.path.normcase(os.path.normpath(os.path.dirname(carpeta['ruta_absoluta'])))
+                for carpeta in carpetas}
+    
+    def buscar_por_radicados(self, radicados):
+        """Carpetas de expediente de los radicados dados, vía índice (sin recorrer carpetas)"""
+        if not self.cache.valido:
+            return []
+        
+        carpetas = self.cache.directorios.get('directorios', [])
+        indice = self.cache.directorios.get('radicados')
+        if indice is None:
+            # Cache construido antes del índice: se indexa una vez y se conserva
+            indice = indexar_radicados(carpetas)
+            self.cache.directorios['radicados'] = indice
+            self.guardar_cache()
+        
+        resultados = []
+        for radicado in radicados:
+            for posicion in indice.get(radicado, ()):
+                carpeta = carpetas[posicion]
+                resultados.append((
+                    carpeta['nombre'],
+                    carpeta['ruta_relativa'],
+                    carpeta['ruta_absoluta']
+                ))
+        return resultados
+    
+    def aplicar_cambios(self, cambios):
+        """Actualiza el índice con un delta del explorador sin reconstruirlo (en un hilo)
+
+        Se quitan las carpetas eliminadas con todo lo que contenían, se
+        cambian las rutas de las movidas o renombradas y se agregan las
+        creadas con sus subcarpetas. La lista nueva reemplaza a la anterior
+        de una vez: una búsqueda en curso ve el índice viejo o el nuevo.
+        """
+        if not self.cache.valido or self.construyendo or not self.ruta_base:
+            return False
+        threading.Thread(target=self._aplicar_cambios, args=(cambios,), daemon=True).start()
+        return True
+    
+    def _aplicar_cambios(self, cambios):
+        with self._cambios_lock:
+            cache = self.cache
+            if not cache.valido or self.construyendo:
+                return
+            inicio = time.time()
+            base = clave_ruta(self.ruta_base)
+            
+            def en_base(clave):
+                return ancestro_en(clave, {base}) is not None and clave != base
+            
+            # Lo creado reemplaza lo que hubiera en esa ruta ("reemplazar" o índice desactualizado)
+            quitar = {clave_ruta(r) for r in cambios.get('eliminados', [])}
+            quitar.update(clave_ruta(r) for r in cambios.get('creados', []))
+            mover = {}
+            por_recorrer = [r for r in cambios.get('creados', []) if en_base(clave_ruta(r))]
+            for origen, destino in cambios.get('movidos', []):
+                clave_origen = clave_ruta(origen)
+                if en_base(clave_origen):
+                    mover[clave_origen] = destino
+                elif en_base(clave_ruta(destino)):
+                    por_recorrer.append(destino)  # Llegó desde fuera de la ubicación
+            
+            carpetas = []
+            quitadas = movidas = 0
+            for carpeta in cache.directorios.get('directorios', []):
+                clave = clave_ruta(carpeta['ruta_absoluta'])
+                if ancestro_en(clave, quitar):
+                    quitadas += 1
+                    continue
+                origen = ancestro_en(clave, mover)
+                if origen:
+                    nueva = reubicar(carpeta['ruta_absoluta'], origen, mover[origen])
+                    if not en_base(clave_ruta(nueva)):
+                        quitadas += 1  # Se movió fuera de la ubicación
+                        continue
+                    carpeta = {
+                        'nombre': os.path.basename(nueva),
+                        'ruta_relativa': os.path.relpath(nueva, self.ruta_base),
+                        'ruta_absoluta': nueva
+                    }
+                    movidas += 1
+                carpetas.append(carpeta)
+            
+            agregadas = 0
+            for ruta in por_recorrer:
+                if not os.path.isdir(ruta):
+                    continue
+                carpetas.append(self._entrada(ruta))
+                agregadas += 1
+                for root, dirs, files in os.walk(ruta):
+                    for dirname in dirs:
+                        carpetas.append(self._entrada(os.path.join(root, dirname)))
+                        agregadas += 1
+            
+            directorios = dict(cache.directorios)
+            directorios.update({
+                'directorios': carpetas,
+                'total': len(carpetas),
+                'radicados': indexar_radicados(carpetas),
+                'con_hijos': self._indice_con_hijos(carpetas)
+            })
+            cache.directorios = directorios
+            if self.cache is cache:
+                self.guardar_cache()
+            print(f"[CACHE] Cambios del explorador: {quitadas} quitadas, {movidas} movidas, "
+                  f"{agregadas} agregadas en {time.time() - inicio:.3f}s")
+    
+    def _entrada(self, ruta):
+        return {
+            'nombre': os.path.basename(ruta),
+            'ruta_relativa': os.path.relpath(ruta, self.ruta_base),
+            'ruta_absoluta': ruta
+        }
+    
     def get_cache_stats(self):
         """Obtiene estadísticas del cache - MEJORADO"""
         if not self.cache.valido:
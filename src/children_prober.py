@@ -0,0 +1,159 @@
+# src/children_prober.py - Sondeo en segundo plano de "tiene subcarpetas" para las flechas de expansión
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+def _clave(ruta):
+    return os.path.normcase(os.path.normpath(ruta))
+
+
+class ChildrenProber:
+    """Decide qué filas llevan flecha de expansión sin tocar el disco en el hilo de Tk
+
+    Primero consulta los índices de carpetas registrados (rutas que el cache
+    ya sabe que tienen hijos) y el cache de sondeos anteriores; el resto se
+    sondea con os.scandir en un pool de hilos y la flecha se agrega después.
+    """
+
+    MAX_CACHE = 20000
+
+    def __init__(self, app, max_workers=4, ttl=300):
+        self.app = app
+        self.ttl = ttl
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="sondeo")
+        self._lock = threading.Lock()
+        self._cache = {}  # {clave: (tiene_hijos, instante)}
+        self._en_curso = {}  # {clave: [(generación, item_id, destino), ...]}
+        self._indices = {}  # {origen: set(claves con hijos)}
+        self._generacion = 0
+
+        self.stats = {'por_indice': 0, 'por_cache': 0, 'sondeos': 0, 'combinadas': 0, 'flechas': 0}
+
+    # Índices
+
+    def registrar_indice(self, origen, rutas_con_hijos):
+        """Registra (o reemplaza) el conjunto de rutas con hijos de un cache de carpetas"""
+        with self._lock:
+            self._indices[origen] = rutas_con_hijos
+
+    def _en_indice(self, clave):
+        return any(clave in rutas for rutas in self._indices.values())
+
+    # Solicitudes
+
+    def nueva_busqueda(self):
+        """Las filas de la búsqueda anterior ya no existen"""
+        with self._lock:
+            self._generacion += 1
+            # Las solicitudes de otros árboles (sin generación) siguen pendientes
+            for clave in list(self._en_curso):
+                pendientes = [p for p in self._en_curso[clave] if p[0] is None]
+                if pendientes:
+                    self._en_curso[clave] = pendientes
+                else:
+                    del self._en_curso[clave]
+
+    def solicitar(self, filas, destino=None, por_busqueda=True):
+        """filas: [(item_id, ruta)]. `destino(item_ids)` agrega las flechas en el hilo de Tk
+
+        Con `por_busqueda=False` (filas de otro árbol, p. ej. el explorador)
+        el resultado no se descarta al empezar una búsqueda nueva.
+        """
+        destino = destino or self._agregar_flechas
+        inmediatas = []
+        ahora = time.time()
+
+        with self._lock:
+            generacion = self._generacion if por_busqueda else None
+            for item_id, ruta in filas:
+                if not ruta:
+                    continue
+                clave = _clave(ruta)
+
+                if self._en_indice(clave):
+                    self.stats['por_indice'] += 1
+                    inmediatas.append(item_id)
+                    continue
+
+                conocido = self._cache.get(clave)
+                if conocido and ahora - conocido[1] <= self.ttl:
+                    self.stats['por_cache'] += 1
+                    if conocido[0]:
+                        inmediatas.append(item_id)
+                    continue
+
+                if clave in self._en_curso:
+                    self._en_curso[clave].append((generacion, item_id, destino))
+                    self.stats['combinadas'] += 1
+                else:
+                    self._en_curso[clave] = [(generacion, item_id, destino)]
+                    self._executor.submit(self._sondear, clave, ruta)
+
+        # Lo ya conocido se resuelve sin esperar (sin E/S: solo memoria)
+        if inmediatas:
+            destino(inmediatas)
+
+    def _sondear(self, clave, ruta):
+        """Hilo del pool: ¿hay al menos una subcarpeta?"""
+        tiene_hijos = False
+        try:
+            with os.scandir(ruta) as entradas:
+                for entrada in entradas:
+                    try:
+                        if entrada.is_dir():
+                            tiene_hijos = True
+                            break
+                    except OSError:
+                        continue
+        except OSError:
+            pass
+
+        por_destino = {}
+        with self._lock:
+            self.stats['sondeos'] += 1
+            if len(self._cache) >= self.MAX_CACHE:
+                self._cache.clear()
+            self._cache[clave] = (tiene_hijos, time.time())
+            generacion = self._generacion
+            for gen, item_id, destino in self._en_curso.pop(clave, []):
+                if tiene_hijos and gen in (None, generacion):
+                    por_destino.setdefault((destino, gen), []).append(item_id)
+
+        for (destino, gen), item_ids in por_destino.items():
+            self.app.ui_dispatcher.publicar_lote(
+                ('flechas', destino, gen),
+                lambda i, d=destino, g=gen: self._aplicar(d, i, g),
+                item_ids)
+
+    def _aplicar(self, destino, item_ids, generacion):
+        if generacion is None or generacion == self._generacion:
+            destino(item_ids)
+
+    def _agregar_flechas(self, item_ids):
+        """Agrega el nodo "Cargando..." a las filas que sigan existiendo y no tengan hijos"""
+        tree = self.app.tree
+        for item_id in item_ids:
+            try:
+                if tree.exists(item_id) and not tree.get_children(item_id):
+                    columnas = len(tree.item(item_id, 'values') or ("", ""))
+                    tree.insert(item_id, "end", text="Cargando...", values=("",) * columnas)
+                    self.stats['flechas'] += 1
+            except Exception as e:
+                print(f"[SONDEO] Error agregando flecha: {e}")
+
+    def invalidar(self, ruta=None):
+        """Olvida el resultado de una ruta (o de todas)"""
+        with self._lock:
+            if ruta is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(_clave(ruta), None)
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats['en_cache'] = len(self._cache)
+            stats['en_curso'] = len(self._en_curso)
+        return stats
@@ -0,0 +1,94 @@
+# src/circuit_breaker.py - Cortocircuito para dejar de reintentar un servicio caído
+import threading
+import time
+
+# Estados
+CERRADO = 'cerrado'          # Funcionando: se permiten todas las llamadas
+ABIERTO = 'abierto'          # Caído: se rechazan llamadas hasta cumplir la espera
+SEMIABIERTO = 'semiabierto'  # Espera cumplida: una sola llamada de prueba
+
+
+class CircuitOpenError(Exception):
+    """El cortocircuito está abierto; la llamada no se intentó"""
+
+
+class CircuitBreaker:
+    """Abre el circuito tras `umbral` fallos seguidos
+
+    Mientras está abierto, `permitir()` devuelve False sin costo. Al vencer la
+    espera deja pasar una llamada de prueba; si falla, la espera se duplica
+    hasta `espera_max`.
+    """
+
+    def __init__(self, umbral=3, espera_inicial=30, espera_max=300):
+        self.umbral = umbral
+        self.espera_inicial = espera_inicial
+        self.espera_max = espera_max
+
+        self._lock = threading.Lock()
+        self.estado = CERRADO
+        self._fallos_seguidos = 0
+        self._espera = espera_inicial
+        self._abierto_hasta = 0
+        self._ultimo_error = None
+
+        self.stats = {'aperturas': 0, 'rechazadas': 0, 'fallos': 0, 'exitos': 0}
+
+    def permitir(self):
+        """True si se puede intentar la llamada"""
+        with self._lock:
+            if self.estado == CERRADO:
+                return True
+            if self.estado == ABIERTO and time.time() >= self._abierto_hasta:
+                self.estado = SEMIABIERTO
+                return True
+            self.stats['rechazadas'] += 1
+            return False
+
+    def registrar_exito(self):
+        with self._lock:
+            self.stats['exitos'] += 1
+            self.estado = CERRADO
+            self._fallos_seguidos = 0
+            self._espera = self.espera_inicial
+
+    def registrar_fallo(self, error=None):
+        with self._lock:
+            self.stats['fallos'] += 1
+            self._fallos_seguidos += 1
+            self._ultimo_error = str(error) if error else None
+
+            if self.estado == SEMIABIERTO:
+                # La prueba falló: volver a abrir con espera mayor
+                self._espera = min(self._espera * 2, self.espera_max)
+                self._abrir()
+            elif self.estado == CERRADO and self._fallos_seguidos >= self.umbral:
+                self._abrir()
+
+    def liberar_prueba(self):
+        """La llamada terminó sin decir nada del servicio (p. ej. pool saturado)
+
+        Si era la llamada de prueba se vuelve a abrir con la misma espera, así
+        la próxima prueba llega sin quedar trabado en semiabierto.
+        """
+        with self._lock:
+            if self.estado == SEMIABIERTO:
+                self._abrir()
+
+    def _abrir(self):
+        """Requiere el lock tomado"""
+        self.estado = ABIERTO
+        self._abierto_hasta = time.time() + self._espera
+        self.stats['aperturas'] += 1
+        print(f"[DB] Circuito abierto por {self._espera}s tras {self._fallos_seguidos} fallos")
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats.update({
+                'estado': self.estado,
+                'fallos_seguidos': self._fallos_seguidos,
+                'reintento_en': max(0.0, self._abierto_hasta - time.time()) if self.estado == ABIERTO else 0.0,
+                'ultimo_error': self._ultimo_error
+            })
+        return stats
@@ -0,0 +1,308 @@
+# src/column_width_model.py - Modelo incremental de anchos de columna del TreeView
+import tkinter.font as tkfont
+from tkinter import ttk
+
+# Sangría por nivel del TreeView (valor por defecto de ttk)
+SANGRIA_NIVEL = 20
+# Ancho aproximado por carácter si no se pudo obtener la fuente
+ANCHO_CARACTER = 7
+
+
+class FontMetrics:
+    """Ancho en píxeles de textos con una tabla de anchos por carácter
+
+    Cada carácter se mide con la fuente una sola vez; después medir un
+    texto es sumar valores de un diccionario, sin llamadas a Tk.
+    """
+
+    def __init__(self, widget, estilo=None):
+        self.widget = widget
+        self.estilo = estilo
+        self._font = None
+        self._anchos = {}
+
+    def _fuente(self):
+        if self._font is None:
+            try:
+                nombre = ttk.Style(self.widget).lookup(self.estilo or 'Treeview', 'font')
+                self._font = tkfont.Font(font=nombre or 'TkDefaultFont')
+            except Exception:
+                self._font = False
+        return self._font
+
+    def _medir(self, caracter):
+        fuente = self._fuente()
+        try:
+            ancho = fuente.measure(caracter) if fuente else ANCHO_CARACTER
+        except Exception:
+            ancho = ANCHO_CARACTER
+        self._anchos[caracter] = ancho
+        return ancho
+
+    def ancho(self, texto):
+        anchos = self._anchos
+        return sum(anchos.get(c) or self._medir(c) for c in str(texto))
+
+    def reiniciar(self):
+        """Olvida la tabla (p. ej. tras cambiar la fuente del tema)"""
+        self._font = None
+        self._anchos.clear()
+
+
+class _MaximoContado:
+    """Multiconjunto de enteros con máximo en O(1)
+
+    Solo se recalcula el máximo cuando desaparece el último valor máximo, y
+    el recálculo recorre valores distintos (anchos en píxeles), no filas.
+    """
+
+    def __init__(self):
+        self._conteos = {}
+        self.maximo = 0
+
+    def agregar(self, valor):
+        self._conteos[valor] = self._conteos.get(valor, 0) + 1
+        if valor > self.maximo:
+            self.maximo = valor
+
+    def quitar(self, valor):
+        conteo = self._conteos.get(valor, 0)
+        if conteo <= 1:
+            self._conteos.pop(valor, None)
+            if valor == self.maximo:
+                self.maximo = max(self._conteos) if self._conteos else 0
+        else:
+            self._conteos[valor] = conteo - 1
+
+    def limpiar(self):
+        self._conteos.clear()
+        self.maximo = 0
+
+
+class ColumnWidthModel:
+    """Mantiene el texto más ancho y la profundidad máxima de las filas visibles
+
+    Envuelve insert/delete/item/set del TreeView para actualizar el modelo
+    fila por fila: consultar el ancho sugerido no recorre el árbol. Una fila
+    es visible si su padre es la raíz o es visible y está abierto. Cuando
+    cambia el máximo de la columna del árbol se llama `al_cambiar` (una vez
+    por ciclo de eventos).
+    """
+
+    def __init__(self, tree, al_cambiar=None):
+        self.tree = tree
+        self.al_cambiar = al_cambiar
+        self.metricas = FontMetrics(tree, tree.cget('style'))
+
+        self._filas = {}  # {item: (profundidad, ancho_texto, {columna: ancho})}
+        self._visibles = set()
+        self._abiertos = set()
+        self._texto = _MaximoContado()  # ancho del texto + sangría
+        self._profundidad = _MaximoContado()
+        self._columnas = {}  # {columna: _MaximoContado}
+        self._ultimo_notificado = 0
+        self._notificacion_pendiente = False
+
+        self._instalar()
+
+    # Intercepción del TreeView
+
+    def _instalar(self):
+        tree = self.tree
+        self._insert, self._delete = tree.insert, tree.delete
+        self._item, self._set = tree.item, tree.set
+
+        def insert(parent, index, iid=None, **kw):
+            item = self._insert(parent, index, iid, **kw)
+            self._al_insertar(item, parent, kw)
+            return item
+
+        def delete(*items):
+            for item in items:
+                self._olvidar(item)
+            self._delete(*items)
+            self._notificar()
+
+        def item(item, option=None, **kw):
+            resultado = self._item(item, option, **kw)
+            if kw:
+                self._al_modificar(item, kw)
+            return resultado
+
+        def set_(item, column=None, value=None):
+            resultado = self._set(item, column, value)
+            if value is not None and item in self._filas:
+                self._actualizar_columna(item, column, value)
+            return resultado
+
+        tree.insert, tree.delete, tree.item, tree.set = insert, delete, item, set_
+
+        # Abrir/cerrar con el mouse o el teclado no pasa por item(); ttk
+        # cambia -open después de <<TreeviewOpen>>, así que se sincroniza al quedar ocioso
+        tree.bind('<<TreeviewOpen>>', self._on_toggle, add='+')
+        tree.bind('<<TreeviewClose>>', self._on_toggle, add='+')
+
+    def _on_toggle(self, event):
+        item = self.tree.focus()
+        if item:
+            self.tree.after_idle(lambda: self._sincronizar_apertura(item))
+
+    # Mantenimiento del modelo
+
+    def _columnas_de(self, valores):
+        nombres = self.tree['columns']
+        return {nombre: self.metricas.ancho(valor) for nombre, valor in zip(nombres, valores or ())}
+
+    def _al_insertar(self, item, padre, kw):
+        profundidad = self._filas[padre][0] + 1 if padre in self._filas else 0
+        self._filas[item] = (profundidad, self.metricas.ancho(kw.get('text', '')),
+                             self._columnas_de(kw.get('values')))
+        if kw.get('open') and self.tree.tk.getboolean(kw['open']):
+            self._abiertos.add(item)
+        if self._es_visible(padre):
+            self._mostrar(item)
+            self._notificar()
+
+    def _es_visible(self, padre):
+        return padre == '' or (padre in self._visibles and padre in self._abiertos)
+
+    def _al_modificar(self, item, kw):
+        if item not in self._filas:
+            return
+        if 'text' in kw or 'values' in kw:
+            visible = item in self._visibles
+            if visible:
+                self._ocultar_fila(item)
+            profundidad, ancho_texto, columnas = self._filas[item]
+            if 'text' in kw:
+                ancho_texto = self.metricas.ancho(kw['text'])
+            if 'values' in kw:
+                columnas = self._columnas_de(kw['values'])
+            self._filas[item] = (profundidad, ancho_texto, columnas)
+            if visible:
+                self._mostrar_fila(item)
+        if 'open' in kw:
+            self._cambiar_apertura(item, self.tree.tk.getboolean(kw['open']))
+        self._notificar()
+
+    def _actualizar_columna(self, item, columna, valor):
+        visible = item in self._visibles
+        if visible:
+            self._ocultar_fila(item)
+        self._filas[item][2][columna] = self.metricas.ancho(valor)
+        if visible:
+            self._mostrar_fila(item)
+
+    def _sincronizar_apertura(self, item):
+        try:
+            if not self.tree.exists(item):
+                return
+            self._cambiar_apertura(item, self.tree.tk.getboolean(self._item(item, 'open')))
+        except Exception:
+            return
+        self._notificar()
+
+    def _cambiar_apertura(self, item, abierto):
+        if abierto == (item in self._abiertos):
+            return
+        if abierto:
+            self._abiertos.add(item)
+            if item in self._visibles:
+                for hijo in self.tree.get_children(item):
+                    self._mostrar(hijo)
+        else:
+            if item in self._visibles:
+                for hijo in self.tree.get_children(item):
+                    self._ocultar(hijo)
+            self._abiertos.discard(item)
+
+    def _mostrar(self, item):
+        """Marca visible la fila y los descendientes de sus nodos abiertos"""
+        if item not in self._filas or item in self._visibles:
+            return
+        self._mostrar_fila(item)
+        if item in self._abiertos:
+            for hijo in self.tree.get_children(item):
+                self._mostrar(hijo)
+
+    def _ocultar(self, item):
+        if item not in self._visibles:
+            return
+        self._ocultar_fila(item)
+        if item in self._abiertos:
+            for hijo in self.tree.get_children(item):
+                self._ocultar(hijo)
+
+    def _mostrar_fila(self, item):
+        profundidad, ancho_texto, columnas = self._filas[item]
+        self._visibles.add(item)
+        self._texto.agregar(ancho_texto + profundidad * SANGRIA_NIVEL)
+        self._profundidad.agregar(profundidad)
+        for columna, ancho in columnas.items():
+            self._columnas.setdefault(columna, _MaximoContado()).agregar(ancho)
+
+    def _ocultar_fila(self, item):
+        profundidad, ancho_texto, columnas = self._filas[item]
+        self._visibles.discard(item)
+        self._texto.quitar(ancho_texto + profundidad * SANGRIA_NIVEL)
+        self._profundidad.quitar(profundidad)
+        for columna, ancho in columnas.items():
+            self._columnas[columna].quitar(ancho)
+
+    def _olvidar(self, item):
+        """Quita la fila y su subárbol antes de que el TreeView los borre"""
+        if item not in self._filas:
+            return
+        for hijo in self.tree.get_children(item):
+            self._olvidar(hijo)
+        if item in self._visibles:
+            self._ocultar_fila(item)
+        del self._filas[item]
+        self._abiertos.discard(item)
+
+    def _notificar(self):
+        """Avisa (una vez por ciclo) si cambió el máximo de la columna del árbol"""
+        if not self.al_cambiar or self._notificacion_pendiente:
+            return
+        if self._texto.maximo == self._ultimo_notificado:
+            return
+        self._notificacion_pendiente = True
+
+        def ejecutar():
+            self._notificacion_pendiente = False
+            self._ultimo_notificado = self._texto.maximo
+            try:
+                self.al_cambiar()
+            except Exception as e:
+                print(f"[COLUMNAS] Error ajustando columnas: {e}")
+
+        self.tree.after_idle(ejecutar)
+
+    # Consultas
+
+    def hay_filas(self):
+        return bool(self._visibles)
+
+    def profundidad_maxima(self):
+        return self._profundidad.maximo
+
+    def nombre_columna(self, column_id):
+        """'#0' o el nombre de la columna para un id '#N' de identify_column"""
+        if column_id == '#0' or not str(column_id).startswith('#'):
+            return column_id
+        visibles = list(self.tree['displaycolumns'])
+        if not visibles or visibles == ['#all']:
+            visibles = list(self.tree['columns'])
+        indice = int(column_id[1:]) - 1
+        return visibles[indice] if 0 <= indice < len(visibles) else None
+
+    def ancho_contenido(self, column_id):
+        """Ancho en píxeles del contenido más ancho visible (con sangría en '#0')"""
+        columna = self.nombre_columna(column_id)
+        if columna == '#0':
+            return self._texto.maximo
+        maximo = self._columnas.get(columna)
+        return maximo.maximo if maximo else 0
+
+    def ancho_texto(self, texto):
+        return self.metricas.ancho(texto)
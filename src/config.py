@@ -9,7 +9,16 @@ class ConfigManager:
         self.config_file = "config.json"
         self.default_config = {
             "ruta_carpeta": os.path.expanduser("~"),
-            "version": "4.2"
+            "version": "4.2",
+            "cache_build_workers": 4,
+            "prefetch_carpetas": 8,
+            "espejo_partes_local": True,
+            "espejo_partes_intervalo": 1800,
+            "cache_partes_memoria": 500,
+            "cache_partes_ttl": 604800,
+            "cache_partes_ttl_negativo": 3600,
+            "db_fallos_para_cortar": 3,
+            "db_espera_reintento": 30
         }
         self.config = self._load_config()
     
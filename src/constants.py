@@ -20,7 +20,10 @@ ENTRY_WIDTH = 30
 MAX_CARPETAS = 50000
 MAX_TIEMPO_SEGUNDOS = 30
 MAX_PROFUNDIDAD = 6
-MAX_RESULTADOS = 2000
+MAX_RESULTADOS = MAX_CARPETAS  # El ranking alimenta la vista virtual y el organizador: sin recorte propio
+RESULTADOS_POR_PAGINA = 100  # Página inicial y "mostrar más"
+UMBRAL_VISTA_VIRTUAL = 500  # Desde aquí se muestra todo el ranking en vista virtual
+PREFIJO_BUSQUEDA_PARTES = "parte:"  # "parte: Juan Pérez" busca por demandante/demandado
 
 # Intervalos de actualización
 PROGRESS_UPDATE_INTERVAL = 100  # Cada 100 carpetas
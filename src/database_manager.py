@@ -1,121 +1,238 @@
 # src/database_manager.py - Gestor de Base de Datos SQL Server
+import json
+import os
 import pyodbc
 import threading
 import time
+from contextlib import contextmanager
+
+from .db_pool import ConnectionPool, PoolTimeoutError
+from .circuit_breaker import CircuitBreaker, CircuitOpenError, ABIERTO
+from .radicado import limpiar_radicado, radicado_desde_criterio, radicado_desde_nombre
+from .party_mirror import PartyMirror, agrupar_partes
+from .party_cache import PartyCache
+from .latency_stats import LatencyHistogram
 
 class DatabaseManager:
     """Gestor de conexión a SQL Server para consulta de expedientes"""
-    
-    def __init__(self, app):
+
+    # Radicados por consulta IN (SQL Server admite hasta 2100 parámetros)
+    IN_BATCH_SIZE = 250
+
+    def __init__(self, app, driver=None, pool_size=4):
         self.app = app
-        self.connection = None
+        # Módulo compatible con pyodbc (permite usar uno falso en pruebas)
+        self.driver = driver or pyodbc
         self.dsn = "csjsql"  # DSN correcto
         self.user = ""
         self.password = ""
-        self._lock = threading.Lock()
+        config = getattr(getattr(app, 'config', None), 'config', {})
 
-        # Cache en memoria para optimizar búsquedas repetidas
-        self._cache = {}  # {radicado: (demandante, demandado)}
-        self._cache_max_size = 500
+        # Cache en dos niveles (LRU en memoria + disco) con TTL y negativos
+        self.cache = PartyCache(
+            max_memoria=config.get("cache_partes_memoria", 500),
+            ttl_positivo=config.get("cache_partes_ttl", 7 * 24 * 3600),
+            ttl_negativo=config.get("cache_partes_ttl_negativo", 3600))
 
-        # Connection pooling - Keep-alive
+        # Instrumentación: latencias por fase y origen de cada radicado resuelto
+        self.latencias = {fase: LatencyHistogram() for fase in ('connect', 'execute', 'fetch', 'consulta')}
+        self._stats_lock = threading.Lock()
+        self.contadores = {
+            'resueltos_cache': 0,
+            'resueltos_espejo': 0,
+            'resueltos_servidor': 0,
+            'omitidos_circuito': 0,
+            'lotes': 0,
+            'errores': 0
+        }
+
+        # Pool de conexiones: reemplaza la conexión única y el keep-alive
         self.last_query_time = 0
-        self.keep_alive_timer = None
+        self.pool = ConnectionPool(self._crear_conexion, max_size=pool_size, max_idle=600)
+
+        # Tras fallos seguidos se deja de intentar durante una espera creciente
+        self.breaker = CircuitBreaker(
+            umbral=config.get("db_fallos_para_cortar", 3),
+            espera_inicial=config.get("db_espera_reintento", 30))
+
+        # Réplica local opcional: primer nivel de consulta, funciona sin servidor.
+        # Se abre en segundo plano (crear el esquema o indexar una réplica grande tarda)
+        self.mirror = None
+        self._config = config
+
+        # Conexión y precarga en segundo plano: el arranque no espera al servidor
+        threading.Thread(target=self._iniciar_en_segundo_plano, daemon=True).start()
+
+    def _abrir_espejo(self):
+        if not self._config.get("espejo_partes_local", True):
+            return
+        try:
+            mirror = PartyMirror()
+            mirror.iniciar_sync_programado(
+                self.conexion,
+                intervalo=self._config.get("espejo_partes_intervalo", 1800))
+        except Exception as e:
+            print(f"[ESPEJO] No disponible: {e}")
+            return
+        self.mirror = mirror  # Recién ahora lo ven las consultas
+
+    def _iniciar_en_segundo_plano(self):
+        self._abrir_espejo()
+        # El disco del cache de partes solo crece: lo vencido se borra al arrancar
+        purgados = self.cache.purgar_expirados()
+        if purgados:
+            print(f"[CACHE PARTES] {purgados} entradas vencidas borradas del disco")
+        self.conectar()
+        # Precargar las partes de las búsquedas recientes
+        self.calentar_desde_historial()
+
+    def _connection_string(self, dsn=None, user=None, password=None):
+        dsn = self.dsn if dsn is None else dsn
+        user = self.user if user is None else user
+        password = self.password if password is None else password
+
+        conn_str = f"DSN={dsn};"
+        if user:
+            conn_str += f"UID={user};PWD={password};"
+
+        # Opción alternativa con Driver directo si no hay DSN
+        # conn_str = f"DRIVER={{ODBC Driver 17 for SQL Server}};SERVER=servidor;DATABASE=db;UID={user};PWD={pwd}"
+        return conn_str
+
+    def _crear_conexion(self):
+        """Abre una conexión nueva para el pool"""
+        with self.latencias['connect'].medir():
+            return self.driver.connect(self._connection_string(), timeout=3)
+
+    @contextmanager
+    def conexion(self):
+        """Conexión del pool vigilada por el cortocircuito
+
+        Lanza CircuitOpenError sin intentar nada si el servidor falló hace poco.
+        """
+        if not self.breaker.permitir():
+            raise CircuitOpenError("Servidor no disponible, reintento pendiente")
+        try:
+            with self.pool.connection() as connection:
+                yield connection
+        except PoolTimeoutError:
+            # Pool saturado: el servidor responde, no cuenta como fallo ni como éxito
+            self.breaker.liberar_prueba()
+            raise
+        except Exception as e:
+            self.breaker.registrar_fallo(e)
+            raise
+        else:
+            self.breaker.registrar_exito()
 
-        # Auto-conectar al inicio
-        self._auto_connect()    
-        
     def conectar(self):
-        """Establece conexión con la BD"""
+        """Verifica que el pool pueda entregar una conexión"""
         try:
-            # Intentar conectar usando DSN
-            conn_str = f"DSN={self.dsn};"
-            if self.user:
-                conn_str += f"UID={self.user};PWD={self.password};"
-            
-            # Opción alternativa con Driver directo si no hay DSN
-            # conn_str = f"DRIVER={{ODBC Driver 17 for SQL Server}};SERVER=servidor;DATABASE=db;UID={user};PWD={pwd}"
-            
-            self.connection = pyodbc.connect(conn_str, timeout=3)
+            with self.conexion():
+                pass
             return True
+        except CircuitOpenError:
+            return False
         except Exception as e:
             print(f"[DB Error] No se pudo conectar: {e}")
             return False
 
+    def disponible(self):
+        """False si el cortocircuito está abierto (las consultas se omitirán)"""
+        return self.breaker.estado != ABIERTO
+
     def obtener_info_proceso(self, radicado):
         """
         Busca información de partes para un radicado.
         Retorna: (demandante, demandado)
         """
-        # Verificar cache primero
-        if radicado in self._cache:
+        radicado_limpio = limpiar_radicado(radicado)
+        return self.obtener_info_procesos([radicado_limpio]).get(radicado_limpio, (None, None))
+
+    def obtener_info_procesos(self, radicados):
+        """
+        Busca partes de varios radicados con consultas IN por lotes.
+        Retorna: {radicado: (demandante, demandado)}; (None, None) si no hay partes
+        """
+        distintos = [rad for rad in dict.fromkeys(limpiar_radicado(r) for r in radicados) if rad]
+
+        # Cache primero; solo los radicados distintos no cacheados van a la BD
+        cacheados = self.cache.get_many(distintos)
+        resultados = {rad: cacheados.get(rad, (None, None)) for rad in distintos}
+        pendientes = [rad for rad in distintos if rad not in cacheados]
+        self._contar('resueltos_cache', len(cacheados))
+
+        # Réplica local: los radicados del juzgado se resuelven sin red
+        if pendientes and self.mirror and self.mirror.esta_cargado():
+            try:
+                locales = self.mirror.obtener_partes(pendientes)
+                restantes = []
+                for radicado in pendientes:
+                    if radicado in locales:
+                        resultados[radicado] = locales[radicado]
+                    else:
+                        # Ausente o fuera del juzgado replicado: va al servidor
+                        restantes.append(radicado)
+                self._contar('resueltos_espejo', len(pendientes) - len(restantes))
+                pendientes = restantes
+            except Exception as e:
+                print(f"[ESPEJO] Error consultando réplica: {e}")
+
+        if not pendientes:
             self.last_query_time = time.time()
-            return self._cache[radicado]
-        if not self.connection:
-            if not self.conectar():
-                return None, None
-                
+            return resultados
+
         try:
-            cursor = self.connection.cursor()
-            
-            # Limpiar radicado para asegurar que tenga 23 dígitos
-            # Eliminamos guiones y espacios
-            radicado_limpio = ''.join(filter(str.isdigit, str(radicado)))
-            
-            # Si tiene más de 23 dígitos (ej: tiene sufijos), cortamos a 23
-            if len(radicado_limpio) > 23:
-                radicado_limpio = radicado_limpio[:23]
-            
-            # Si tiene menos de 23, intentamos buscar con LIKE
-            # pero idealmente debe ser exacto para T112DRSUJEPROC
-            
-            query = """
-                SELECT A112CODISUJE, A112NOMBSUJE 
-                FROM T112DRSUJEPROC 
-                WHERE A112LLAVPROC = ?
-            """
-            
-            cursor.execute(query, (radicado_limpio,))
-            rows = cursor.fetchall()
-            
-            demandantes = []
-            demandados = []
-            
-            for row in rows:
-                codigo = row[0]
-                nombre = row[1].strip() if row[1] else ""
-                
-                if codigo == '0001': # Demandante
-                    demandantes.append(nombre)
-                elif codigo == '0002': # Demandado
-                    demandados.append(nombre)
-            
-            # Unir múltiples partes con " | "
-            str_demandante = " | ".join(demandantes) if demandantes else "Desconocido"
-            str_demandado = " | ".join(demandados) if demandados else "Desconocido"
-
-            # Si no se encontró nada, retornar None para no llenar con "Desconocido"
-            if not demandantes and not demandados:
-                self._cache[radicado] = (None, None)
-                return None, None
-
-            # Guardar en cache
-            result = (str_demandante, str_demandado)
-            self._cache[radicado] = result
-
-            # Limpiar cache si excede tamaño máximo (FIFO simple)
-            if len(self._cache) > self._cache_max_size:
-                for _ in range(100):
-                    self._cache.pop(next(iter(self._cache)))
+            with self.conexion() as connection, self.latencias['consulta'].medir():
+                for i in range(0, len(pendientes), self.IN_BATCH_SIZE):
+                    lote = pendientes[i:i + self.IN_BATCH_SIZE]
+                    rows = self._consultar_partes(connection, lote)
+                    partes = agrupar_partes(rows)
+
+                    # Sin partes: (None, None) se cachea como negativo
+                    consultados = {rad: partes.get(rad, (None, None)) for rad in lote}
+                    self.cache.put_many(consultados)
+                    resultados.update(consultados)
+                    self._contar('lotes')
+                    self._contar('resueltos_servidor', len(lote))
+
             self.last_query_time = time.time()
-            return result
-            
-        except pyodbc.Error as e:
+
+        except CircuitOpenError:
+            # Sin esperar al servidor: las filas quedan sin partes por ahora
+            self._contar('omitidos_circuito', len(pendientes))
+        except PoolTimeoutError as e:
+            self._contar('errores')
+            print(f"[DB Pool] {e}")
+        except self.driver.Error as e:
+            # Las conexiones con error de enlace se descartan al devolverse al pool
+            self._contar('errores')
             print(f"[DB Query Error] {e}")
-            # Si hay error de conexión, intentamos reconectar una vez
-            if "08S01" in str(e) or "08001" in str(e):
-                self.connection = None
-            return None, None
+        except Exception as e:
+            self._contar('errores')
+            print(f"[DB Error] {e}")
+
+        return resultados
+
+    def _contar(self, clave, cantidad=1):
+        with self._stats_lock:
+            self.contadores[clave] += cantidad
+
+    def _consultar_partes(self, connection, radicados):
+        """Una consulta WHERE A112LLAVPROC IN (...) para un lote de radicados"""
+        placeholders = ", ".join("?" for _ in radicados)
+        query = f"""
+            SELECT A112LLAVPROC, A112CODISUJE, A112NOMBSUJE
+            FROM T112DRSUJEPROC
+            WHERE A112LLAVPROC IN ({placeholders})
+        """
+
+        cursor = connection.cursor()
+        try:
+            with self.latencias['execute'].medir():
+                cursor.execute(query, tuple(radicados))
+            with self.latencias['fetch'].medir():
+                return cursor.fetchall()
         finally:
             try:
                 cursor.close()
@@ -125,42 +242,77 @@ class DatabaseManager:
     def test_connection(self, dsn, user="", password=""):
         """Prueba una configuración de conexión"""
         try:
-            conn_str = f"DSN={dsn};"
-            if user:
-                conn_str += f"UID={user};PWD={password};"
-            
-            conn = pyodbc.connect(conn_str, timeout=3)
+            conn = self.driver.connect(self._connection_string(dsn, user, password), timeout=3)
             conn.close()
             return True, "Conexión exitosa"
         except Exception as e:
             return False, str(e)
-        
+
     def limpiar_cache(self):
         """Limpia el cache de procesos"""
-        self._cache.clear()
+        self.cache.clear()
         print("[DB] Cache limpiado")
 
     def get_cache_stats(self):
         """Retorna estadísticas del cache"""
-        return {
-            'size': len(self._cache),
-            'max_size': self._cache_max_size
+        stats = self.cache.get_stats()
+        if self.mirror:
+            stats['espejo'] = self.mirror.get_stats()
+        stats['circuito'] = self.breaker.get_stats()
+        return stats
+
+    def get_db_stats(self):
+        """Instrumentación completa: latencias, pool, cache, circuito y réplica"""
+        with self._stats_lock:
+            contadores = dict(self.contadores)
+        stats = {
+            'latencias': {fase: hist.resumen() for fase, hist in self.latencias.items()},
+            'contadores': contadores,
+            'pool': self.pool.get_stats(),
+            'cache': self.cache.get_stats(),
+            'circuito': self.breaker.get_stats()
         }
-      
-    def _auto_connect(self):
-        """Mantiene conexión viva con keep-alive timer"""
-        if not self.connection or self._connection_stale():
-            self.conectar()
-        
-        if self.keep_alive_timer:
-            self.keep_alive_timer.cancel()
-        
-        self.keep_alive_timer = threading.Timer(300, self._auto_connect)
-        self.keep_alive_timer.daemon = True
-        self.keep_alive_timer.start()
-
-    def _connection_stale(self):
-        """Verifica si conexión inactiva >10 min"""
-        if self.last_query_time == 0:
-            return False
-        return time.time() - self.last_query_time > 600
+        if self.mirror:
+            stats['espejo'] = self.mirror.get_stats()
+        return stats
+
+    def reset_db_stats(self):
+        """Reinicia histogramas y contadores (pool y cache conservan los suyos)"""
+        for hist in self.latencias.values():
+            hist.reset()
+        with self._stats_lock:
+            for clave in self.contadores:
+                self.contadores[clave] = 0
+
+    def calentar_desde_historial(self, historial_file="historial_busquedas.json", limite=20):
+        """Carga en memoria las partes de los criterios más recientes del historial"""
+        try:
+            if not os.path.exists(historial_file):
+                return 0
+            with open(historial_file, 'r', encoding='utf-8') as f:
+                entradas = json.load(f)[:limite]
+        except Exception as e:
+            print(f"[DB] No se pudo leer el historial para precargar: {e}")
+            return 0
+
+        radicados = []
+        for entrada in entradas:
+            criterio = str(entrada.get('criterio', ''))
+            radicado = radicado_desde_criterio(criterio) or radicado_desde_nombre(criterio)
+            if radicado:
+                radicados.append(radicado)
+
+        # Los que están en disco suben a memoria; los demás se consultan
+        if radicados:
+            self.obtener_info_procesos(radicados)
+        return len(radicados)
+
+    def get_pool_stats(self):
+        """Retorna estadísticas del pool de conexiones"""
+        return self.pool.get_stats()
+
+    def cerrar(self):
+        """Cierra todas las conexiones del pool y detiene la sincronización de la réplica"""
+        if self.mirror:
+            self.mirror.detener_sync()
+        self.pool.close_all()
@@ -0,0 +1,219 @@
+# src/db_pool.py - Pool de conexiones ODBC con checkout/devolución
+import threading
+import time
+from contextlib import contextmanager
+
+
+class PoolTimeoutError(Exception):
+    """No hubo conexión disponible dentro del tiempo de espera"""
+
+
+class _PooledConnection:
+    """Conexión del pool con sus marcas de tiempo"""
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.creada = time.time()
+        self.ultimo_uso = self.creada
+        self.ultima_verificacion = self.creada
+
+
+class ConnectionPool:
+    """Pool pequeño de conexiones reutilizables y seguro entre hilos
+
+    `connect` es una función sin argumentos que abre una conexión nueva (en
+    producción envuelve pyodbc.connect; en pruebas puede ser un módulo falso).
+    Las conexiones inactivas más de `max_idle` segundos se cierran, y las que
+    llevan más de `health_interval` sin usarse se verifican con `health_query`
+    antes de entregarse.
+    """
+
+    def __init__(self, connect, max_size=4, max_idle=600, health_interval=30,
+                 health_query="SELECT 1", checkout_timeout=5.0):
+        self._connect = connect
+        self.max_size = max(1, int(max_size))
+        self.max_idle = max_idle
+        self.health_interval = health_interval
+        self.health_query = health_query
+        self.checkout_timeout = checkout_timeout
+
+        self._cond = threading.Condition()
+        self._idle = []  # LIFO: la conexión más reciente se reutiliza primero
+        self._en_uso = 0
+        self._cerrado = False
+
+        self._stats = {
+            'creadas': 0,
+            'reutilizadas': 0,
+            'checkouts': 0,
+            'esperas': 0,
+            'timeouts': 0,
+            'descartadas_salud': 0,
+            'descartadas_error': 0,
+            'cerradas_inactivas': 0,
+            'fallos_conexion': 0,
+            'pico_en_uso': 0
+        }
+
+    def checkout(self, timeout=None):
+        """Entrega una conexión sana; abre una nueva si hay cupo"""
+        timeout = self.checkout_timeout if timeout is None else timeout
+        limite = time.time() + timeout
+
+        with self._cond:
+            self._cerrar_inactivas()
+            while True:
+                if self._cerrado:
+                    raise PoolTimeoutError("Pool cerrado")
+
+                if self._idle:
+                    pooled = self._idle.pop()
+                    self._en_uso += 1
+                    break
+
+                if self._en_uso < self.max_size:
+                    pooled = None
+                    self._en_uso += 1
+                    break
+
+                restante = limite - time.time()
+                if restante <= 0:
+                    self._stats['timeouts'] += 1
+                    raise PoolTimeoutError("Sin conexiones disponibles")
+                self._stats['esperas'] += 1
+                self._cond.wait(restante)
+
+            self._stats['checkouts'] += 1
+            self._stats['pico_en_uso'] = max(self._stats['pico_en_uso'], self._en_uso)
+
+        # Verificación y apertura fuera del lock: pueden tardar
+        try:
+            if pooled is not None and not self._verificar(pooled):
+                self._cerrar_raw(pooled.raw)
+                with self._cond:
+                    self._stats['descartadas_salud'] += 1
+                pooled = None
+
+            if pooled is None:
+                pooled = self._abrir()
+            else:
+                with self._cond:
+                    self._stats['reutilizadas'] += 1
+
+            pooled.ultimo_uso = time.time()
+            return pooled
+        except Exception:
+            with self._cond:
+                self._en_uso -= 1
+                self._cond.notify()
+            raise
+
+    def checkin(self, pooled, broken=False):
+        """Devuelve una conexión al pool; si está rota se cierra"""
+        with self._cond:
+            self._en_uso -= 1
+            if broken or self._cerrado:
+                if broken:
+                    self._stats['descartadas_error'] += 1
+                cerrar = True
+            else:
+                pooled.ultimo_uso = time.time()
+                self._idle.append(pooled)
+                cerrar = False
+            self._cond.notify()
+
+        if cerrar:
+            self._cerrar_raw(pooled.raw)
+
+    @contextmanager
+    def connection(self, timeout=None):
+        """with pool.connection() as conn: ... (marca rota la conexión si hay error de enlace)"""
+        pooled = self.checkout(timeout)
+        broken = False
+        try:
+            yield pooled.raw
+        except Exception as e:
+            broken = self.is_link_error(e)
+            raise
+        finally:
+            self.checkin(pooled, broken=broken)
+
+    @staticmethod
+    def is_link_error(error):
+        """Errores ODBC de enlace caído (08S01) o sin conexión (08001)"""
+        texto = str(error)
+        return "08S01" in texto or "08001" in texto
+
+    def prune(self):
+        """Cierra conexiones inactivas más de max_idle segundos"""
+        with self._cond:
+            self._cerrar_inactivas()
+
+    def close_all(self):
+        """Cierra todas las conexiones inactivas y rechaza nuevos checkouts"""
+        with self._cond:
+            self._cerrado = True
+            idle, self._idle = self._idle, []
+            self._cond.notify_all()
+        for pooled in idle:
+            self._cerrar_raw(pooled.raw)
+
+    def get_stats(self):
+        """Estadísticas del pool"""
+        with self._cond:
+            stats = dict(self._stats)
+            stats.update({
+                'en_uso': self._en_uso,
+                'inactivas': len(self._idle),
+                'max_size': self.max_size
+            })
+        return stats
+
+    def _abrir(self):
+        try:
+            raw = self._connect()
+        except Exception:
+            with self._cond:
+                self._stats['fallos_conexion'] += 1
+            raise
+        with self._cond:
+            self._stats['creadas'] += 1
+        return _PooledConnection(raw)
+
+    def _verificar(self, pooled):
+        """Health check solo si la conexión lleva tiempo sin usarse"""
+        ahora = time.time()
+        if ahora - pooled.ultimo_uso < self.health_interval:
+            return True
+        try:
+            cursor = pooled.raw.cursor()
+            try:
+                cursor.execute(self.health_query)
+                cursor.fetchone()
+            finally:
+                cursor.close()
+            pooled.ultima_verificacion = ahora
+            return True
+        except Exception:
+            return False
+
+    def _cerrar_inactivas(self):
+        """Requiere el lock tomado"""
+        if not self.max_idle:
+            return
+        ahora = time.time()
+        vigentes = []
+        for pooled in self._idle:
+            if ahora - pooled.ultimo_uso > self.max_idle:
+                self._stats['cerradas_inactivas'] += 1
+                self._cerrar_raw(pooled.raw)
+            else:
+                vigentes.append(pooled)
+        self._idle = vigentes
+
+    @staticmethod
+    def _cerrar_raw(raw):
+        try:
+            raw.close()
+        except Exception:
+            pass
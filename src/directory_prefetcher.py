@@ -0,0 +1,98 @@
+# src/directory_prefetcher.py - Prelistado en segundo plano de las próximas expansiones probables
+import heapq
+import itertools
+import threading
+from contextlib import contextmanager
+
+from .listing_cache import ListingCache, listar_directorio
+
+
+class DirectoryPrefetcher:
+    """Lista de antemano las subcarpetas que probablemente se expandan después
+
+    Al expandir un nodo, los árboles sugieren sus subcarpetas (hasta
+    `fan_out`) ordenadas por distancia al cursor. Hilos de baja prioridad las
+    listan y dejan el resultado en el ListingCache compartido, así la
+    siguiente expansión sale del cache. Cada sugerencia nueva reemplaza la
+    cola (el cursor se movió) y una lectura interactiva cancela lo pendiente
+    y corta el listado en curso para no competir por el disco o la red.
+    """
+
+    def __init__(self, cache, fan_out=8, max_workers=2):
+        self.cache = cache
+        self.fan_out = fan_out
+        self._cola = []  # heap de (distancia, secuencia, ruta, generación)
+        self._secuencia = itertools.count()
+        self._generacion = 0
+        self._interactivos = 0
+        self._condicion = threading.Condition()
+
+        self.stats = {'sugeridas': 0, 'prelistadas': 0, 'ya_en_cache': 0, 'canceladas': 0, 'errores': 0}
+
+        for i in range(max_workers):
+            threading.Thread(target=self._worker, name=f"prelistado-{i}", daemon=True).start()
+
+    def sugerir(self, rutas):
+        """Reemplaza la cola con `rutas`, ya ordenadas de la más cercana al cursor a la más lejana"""
+        rutas = list(rutas)[:self.fan_out]
+        with self._condicion:
+            self._generacion += 1
+            self.stats['canceladas'] += len(self._cola)
+            self._cola = []
+            for distancia, ruta in enumerate(rutas):
+                heapq.heappush(self._cola, (distancia, next(self._secuencia), ruta, self._generacion))
+            self.stats['sugeridas'] += len(rutas)
+            self._condicion.notify_all()
+
+    def listar(self, ruta):
+        """Listado pedido por el usuario (cache o disco) con prioridad sobre el prelistado"""
+        with self.interactivo():
+            return self.cache.listar(ruta)
+
+    @contextmanager
+    def interactivo(self):
+        """Envuelve una lectura pedida por el usuario: el prelistado espera y lo pendiente se descarta"""
+        with self._condicion:
+            self._interactivos += 1
+            self._generacion += 1
+            self.stats['canceladas'] += len(self._cola)
+            self._cola = []
+        try:
+            yield
+        finally:
+            with self._condicion:
+                self._interactivos -= 1
+                self._condicion.notify_all()
+
+    def _worker(self):
+        while True:
+            with self._condicion:
+                while not self._cola or self._interactivos:
+                    self._condicion.wait()
+                _, _, ruta, generacion = heapq.heappop(self._cola)
+
+            if self.cache.obtener(ruta) is not None:
+                self.stats['ya_en_cache'] += 1
+                continue
+
+            def cancelado(g=generacion):
+                return self._interactivos > 0 or g != self._generacion
+
+            try:
+                mtime = ListingCache.mtime(ruta)
+                listado = listar_directorio(ruta, cancelado)
+            except OSError:
+                self.stats['errores'] += 1
+                continue
+
+            if listado is None:
+                self.stats['canceladas'] += 1
+                continue
+            self.cache.guardar(ruta, listado, mtime)
+            self.stats['prelistadas'] += 1
+
+    def get_stats(self):
+        with self._condicion:
+            stats = dict(self.stats)
+            stats['pendientes'] = len(self._cola)
+        return stats
@@ -0,0 +1,274 @@
+# src/directory_stats.py - Cantidad de elementos y tamaño de carpetas en segundo plano
+import heapq
+import itertools
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+
+# Prioridades de la cola (menor primero)
+PRIORIDAD_DIRECTO = 0
+PRIORIDAD_RECURSIVO = 1
+
+
+def formatear_tamaño(size_bytes):
+    """Formatea tamaño en bytes"""
+    if not size_bytes:
+        return "0 B"
+
+    for unit in ['B', 'KB', 'MB', 'GB']:
+        if size_bytes < 1024.0:
+            return f"{size_bytes:.1f} {unit}"
+        size_bytes /= 1024.0
+
+    return f"{size_bytes:.1f} TB"
+
+
+def _clave(ruta):
+    return os.path.normcase(os.path.normpath(ruta))
+
+
+class DirectoryStatsService:
+    """Archivos, subcarpetas y tamaño (directo y recursivo) por carpeta
+
+    Cada carpeta se lee una vez con os.scandir (los DirEntry ya traen tipo
+    y, en Windows, tamaño) y el resultado se guarda en SQLite junto con el
+    mtime de la carpeta. Mientras el mtime no cambie, la carpeta no se
+    vuelve a listar: el tamaño recursivo solo cuesta un stat por
+    subcarpeta y vuelve a listar únicamente las que cambiaron.
+
+    Los conteos directos van antes que los tamaños recursivos en la cola, y
+    siempre queda un hilo libre de recorridos recursivos, así las filas
+    siguientes no esperan a que terminen los árboles de las primeras.
+    `cancelar(grupo)` descarta lo pendiente de una vista y corta sus
+    recorridos en curso.
+    """
+
+    MAX_MEMORIA = 50000
+
+    def __init__(self, db_file="dir_stats_cache.db", max_workers=4):
+        self.db_file = db_file
+        self._cola = []  # heap de (prioridad, secuencia, ruta, callback, grupo, generación, recursivo o stats)
+        self._secuencia = itertools.count()
+        self._generaciones = {}  # {grupo: generación}; cancelar la incrementa
+        self._recursivos_en_curso = 0
+        self._max_recursivos = max(1, max_workers - 1)
+        self._condicion = threading.Condition()
+        self._lock = threading.Lock()
+        self._memoria = OrderedDict()  # LRU {clave: (mtime, archivos, bytes, subcarpetas)}
+        self._conn = None
+        self._abrir_disco()
+
+        self.stats = {'vigentes': 0, 'listadas': 0, 'errores': 0, 'recursivos': 0, 'canceladas': 0}
+
+        for i in range(max_workers):
+            threading.Thread(target=self._worker, name=f"estadisticas-{i}", daemon=True).start()
+
+    def _abrir_disco(self):
+        try:
+            self._conn = sqlite3.connect(self.db_file, check_same_thread=False)
+            with self._conn:
+                self._conn.execute("""
+                    CREATE TABLE IF NOT EXISTS dir_stats (
+                        ruta TEXT PRIMARY KEY,
+                        mtime REAL NOT NULL,
+                        archivos INTEGER NOT NULL,
+                        bytes INTEGER NOT NULL,
+                        subcarpetas TEXT NOT NULL
+                    )
+                """)
+        except Exception as e:
+            print(f"[ESTADISTICAS] Disco no disponible, solo memoria: {e}")
+            self._conn = None
+
+    # Lectura de una carpeta (hilos del pool)
+
+    def _directo(self, ruta, por_guardar=None):
+        """(archivos, bytes, [subcarpetas]) de la carpeta, del cache si el mtime no cambió
+
+        Con `por_guardar` (lista) la escritura a disco se difiere para hacerla en lote.
+        """
+        mtime = os.stat(ruta).st_mtime
+        clave = _clave(ruta)
+
+        with self._lock:
+            entrada = self._memoria.get(clave) or self._leer_disco(clave)
+            if entrada and entrada[0] == mtime:
+                self._recordar(clave, entrada)
+                self.stats['vigentes'] += 1
+                return entrada[1:]
+
+        archivos = 0
+        tamaño = 0
+        subcarpetas = []
+        with os.scandir(ruta) as entradas:
+            for entrada in entradas:
+                try:
+                    if entrada.is_dir(follow_symlinks=False):
+                        subcarpetas.append(entrada.name)
+                    elif entrada.is_file(follow_symlinks=False):
+                        archivos += 1
+                        tamaño += entrada.stat(follow_symlinks=False).st_size
+                except OSError:
+                    continue
+
+        entrada = (mtime, archivos, tamaño, subcarpetas)
+        with self._lock:
+            self.stats['listadas'] += 1
+            self._recordar(clave, entrada)
+            if por_guardar is None:
+                self._guardar_disco([(clave, entrada)])
+            else:
+                por_guardar.append((clave, entrada))
+        return entrada[1:]
+
+    def _recordar(self, clave, entrada):
+        """Requiere el lock tomado. Al llenarse se desaloja la menos usada, no todo"""
+        self._memoria[clave] = entrada
+        self._memoria.move_to_end(clave)
+        while len(self._memoria) > self.MAX_MEMORIA:
+            self._memoria.popitem(last=False)
+
+    def _leer_disco(self, clave):
+        if self._conn is None:
+            return None
+        try:
+            fila = self._conn.execute(
+                "SELECT mtime, archivos, bytes, subcarpetas FROM dir_stats WHERE ruta = ?", (clave,)).fetchone()
+        except Exception:
+            return None
+        if not fila:
+            return None
+        return fila[0], fila[1], fila[2], json.loads(fila[3])
+
+    def _guardar_disco(self, entradas):
+        """Requiere el lock tomado"""
+        if self._conn is None or not entradas:
+            return
+        try:
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO dir_stats (ruta, mtime, archivos, bytes, subcarpetas) VALUES (?, ?, ?, ?, ?)",
+                    [(clave, mtime, archivos, tamaño, json.dumps(subcarpetas, ensure_ascii=False))
+                     for clave, (mtime, archivos, tamaño, subcarpetas) in entradas])
+        except Exception as e:
+            print(f"[ESTADISTICAS] Error guardando {len(entradas)} carpetas: {e}")
+
+    def _recursivo(self, ruta, cancelado=None):
+        """Bytes de todo el árbol; solo se listan las carpetas que cambiaron. None si se canceló"""
+        total = 0
+        pendientes = [ruta]
+        por_guardar = []
+        while pendientes:
+            if cancelado and cancelado():
+                total = None
+                break
+            actual = pendientes.pop()
+            try:
+                _, tamaño, subcarpetas = self._directo(actual, por_guardar)
+            except OSError:
+                continue
+            total += tamaño
+            pendientes.extend(os.path.join(actual, nombre) for nombre in subcarpetas)
+
+        with self._lock:
+            self._guardar_disco(por_guardar)
+            self.stats['recursivos'] += 1
+        return total
+
+    # API
+
+    def solicitar(self, rutas, callback, recursivo=True, grupo=None):
+        """Calcula estadísticas de `rutas` en segundo plano
+
+        `callback(ruta, stats)` se llama (desde un hilo del servicio) primero
+        con archivos/subcarpetas/bytes directos y, si `recursivo`, otra vez
+        con 'bytes_total' completo. `grupo` identifica a quien pide, para
+        `cancelar`.
+        """
+        with self._condicion:
+            generacion = self._generaciones.get(grupo, 0)
+            for ruta in rutas:
+                heapq.heappush(self._cola, (PRIORIDAD_DIRECTO, next(self._secuencia), ruta, callback,
+                                            grupo, generacion, recursivo))
+            self._condicion.notify_all()
+
+    def cancelar(self, grupo=None):
+        """Descarta lo pendiente de `grupo` y corta sus recorridos en curso (la vista se repobló)"""
+        with self._condicion:
+            self._generaciones[grupo] = self._generaciones.get(grupo, 0) + 1
+            restantes = [tarea for tarea in self._cola if tarea[4] is not grupo]
+            self.stats['canceladas'] += len(self._cola) - len(restantes)
+            self._cola = restantes
+            heapq.heapify(self._cola)
+
+    def _vigente(self, grupo, generacion):
+        return self._generaciones.get(grupo, 0) == generacion
+
+    def _siguiente(self):
+        """Próxima tarea; un recursivo solo si queda un hilo libre para conteos directos"""
+        with self._condicion:
+            while True:
+                if self._cola and (self._cola[0][0] == PRIORIDAD_DIRECTO
+                                   or self._recursivos_en_curso < self._max_recursivos):
+                    tarea = heapq.heappop(self._cola)
+                    if tarea[0] == PRIORIDAD_RECURSIVO:
+                        self._recursivos_en_curso += 1
+                    return tarea
+                self._condicion.wait()
+
+    def _worker(self):
+        while True:
+            prioridad, _, ruta, callback, grupo, generacion, extra = self._siguiente()
+            try:
+                if prioridad == PRIORIDAD_DIRECTO:
+                    self._calcular_directo(ruta, callback, grupo, generacion, extra)
+                else:
+                    self._calcular_recursivo(ruta, callback, grupo, generacion, extra)
+            except Exception as e:
+                print(f"[ESTADISTICAS] Error en {ruta}: {e}")
+            finally:
+                if prioridad == PRIORIDAD_RECURSIVO:
+                    with self._condicion:
+                        self._recursivos_en_curso -= 1
+                        self._condicion.notify_all()
+
+    def _calcular_directo(self, ruta, callback, grupo, generacion, recursivo):
+        if not self._vigente(grupo, generacion):
+            return
+        try:
+            archivos, tamaño, subcarpetas = self._directo(ruta)
+        except OSError:
+            self.stats['errores'] += 1
+            callback(ruta, None)
+            return
+
+        stats = {'archivos': archivos, 'carpetas': len(subcarpetas), 'bytes': tamaño, 'bytes_total': None}
+        callback(ruta, dict(stats))
+        if recursivo:
+            with self._condicion:
+                if self._vigente(grupo, generacion):
+                    heapq.heappush(self._cola, (PRIORIDAD_RECURSIVO, next(self._secuencia), ruta, callback,
+                                                grupo, generacion, stats))
+                    self._condicion.notify_all()
+
+    def _calcular_recursivo(self, ruta, callback, grupo, generacion, stats):
+        total = self._recursivo(ruta, lambda: not self._vigente(grupo, generacion))
+        if total is None or not self._vigente(grupo, generacion):
+            self.stats['canceladas'] += 1
+            return
+        stats['bytes_total'] = total
+        callback(ruta, stats)
+
+    def invalidar(self, ruta):
+        with self._lock:
+            self._memoria.pop(_clave(ruta), None)
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats['en_memoria'] = len(self._memoria)
+        with self._condicion:
+            stats['pendientes'] = len(self._cola)
+        return stats
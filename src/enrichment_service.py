@@ -0,0 +1,140 @@
+# src/enrichment_service.py - Enriquecimiento progresivo de filas con demandante/demandado
+import queue
+import threading
+
+from .radicado import radicado_desde_ruta
+
+
+class EnrichmentService:
+    """Completa las columnas Demandante/Demandado después de mostrar los resultados
+
+    Las filas se insertan sin partes; un hilo de fondo agrupa los radicados
+    pendientes, los consulta por lotes en DatabaseManager y actualiza las
+    filas en el hilo de Tk. Varias filas con el mismo radicado (o un radicado
+    que ya está en consulta) comparten una sola búsqueda.
+    """
+
+    def __init__(self, app, batch_size=50, espera_lote=0.05):
+        self.app = app
+        self.batch_size = batch_size
+        self.espera_lote = espera_lote
+
+        self._lock = threading.Lock()
+        self._cola = queue.Queue()
+        self._en_vuelo = {}  # {radicado: [(generación, item_id, destino), ...]}
+        self._generacion = 0
+        self._worker = None
+
+        self.stats = {'solicitadas': 0, 'combinadas': 0, 'consultas': 0, 'filas_actualizadas': 0}
+
+    def nueva_busqueda(self):
+        """Invalida lo pendiente: las filas de la búsqueda anterior ya no existen"""
+        with self._lock:
+            self._generacion += 1
+            self._en_vuelo.clear()
+
+    def solicitar(self, filas, destino=None):
+        """Encola filas [(item_id, nombre, ruta_abs)] para completar sus partes
+
+        `destino(actualizaciones)` recibe [(item_id, demandante, demandado)] en
+        el hilo de Tk; por defecto se escriben en las filas del TreeView.
+        """
+        if not getattr(self.app, 'database_manager', None):
+            return
+        destino = destino or self._aplicar_en_tree
+
+        nuevos = []
+        with self._lock:
+            generacion = self._generacion
+            for item_id, nombre, ruta_abs in filas:
+                radicado = radicado_desde_ruta(nombre, ruta_abs)
+                if not radicado:
+                    continue
+                self.stats['solicitadas'] += 1
+                if radicado in self._en_vuelo:
+                    # Ya hay una consulta pendiente para este radicado
+                    self._en_vuelo[radicado].append((generacion, item_id, destino))
+                    self.stats['combinadas'] += 1
+                else:
+                    self._en_vuelo[radicado] = [(generacion, item_id, destino)]
+                    nuevos.append(radicado)
+
+        for radicado in nuevos:
+            self._cola.put(radicado)
+
+        if nuevos:
+            self._asegurar_worker()
+
+    def _asegurar_worker(self):
+        if self._worker and self._worker.is_alive():
+            return
+        self._worker = threading.Thread(target=self._loop, daemon=True)
+        self._worker.start()
+
+    def _tomar_lote(self):
+        """Bloquea hasta el primer radicado y junta los que lleguen poco después"""
+        lote = [self._cola.get()]
+        while len(lote) < self.batch_size:
+            try:
+                lote.append(self._cola.get(timeout=self.espera_lote))
+            except queue.Empty:
+                break
+        return lote
+
+    def _loop(self):
+        while True:
+            lote = self._tomar_lote()
+
+            # Los radicados invalidados por una búsqueda nueva no se consultan
+            with self._lock:
+                lote = [rad for rad in lote if rad in self._en_vuelo]
+            if not lote:
+                continue
+
+            try:
+                partes = self.app.database_manager.obtener_info_procesos(lote)
+                self.stats['consultas'] += 1
+            except Exception as e:
+                print(f"[ENRIQUECIMIENTO] Error consultando partes: {e}")
+                partes = {}
+
+            por_destino = {}
+            with self._lock:
+                generacion = self._generacion
+                for radicado in lote:
+                    demandante, demandado = partes.get(radicado, (None, None))
+                    for gen, item_id, destino in self._en_vuelo.pop(radicado, []):
+                        if gen == generacion:
+                            por_destino.setdefault(destino, []).append(
+                                (item_id, demandante or "", demandado or ""))
+
+            # Lotes del mismo destino que aún no se pintaron se combinan en uno
+            for destino, actualizaciones in por_destino.items():
+                self.app.ui_dispatcher.publicar_lote(
+                    ('partes', destino, generacion),
+                    lambda a, d=destino, g=generacion: self._aplicar(d, a, g),
+                    actualizaciones)
+
+    def _aplicar(self, destino, actualizaciones, generacion):
+        """Hilo de Tk: descarta lo que pertenece a una búsqueda anterior"""
+        if generacion != self._generacion:
+            return
+        destino(actualizaciones)
+        self.stats['filas_actualizadas'] += len(actualizaciones)
+
+    def _aplicar_en_tree(self, actualizaciones):
+        """Escribe las partes en las filas del TreeView que sigan existiendo"""
+        tree = self.app.tree
+        for item_id, demandante, demandado in actualizaciones:
+            try:
+                if tree.exists(item_id):
+                    tree.set(item_id, "Demandante", demandante)
+                    tree.set(item_id, "Demandado", demandado)
+            except Exception as e:
+                print(f"[ENRIQUECIMIENTO] Error actualizando fila: {e}")
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats['en_vuelo'] = len(self._en_vuelo)
+        return stats
@@ -3,11 +3,14 @@ import tkinter as tk
 import os
 import subprocess
 
+from .tree_navigation import VisibleRowNavigator
+
 class EventManager:
     """Maneja todos los eventos de la aplicación"""
     
     def __init__(self, app):
         self.app = app
+        self._navegador_tabla = None
     
     def configurar_eventos(self):
         """Configura todos los eventos de la aplicación"""
@@ -102,52 +105,44 @@ class EventManager:
     
     def _manejar_navegacion_tabla(self, event):
         """Maneja navegación con flechas en la tabla"""
-        elementos = self.app.tree.get_children()
-        if not elementos:
+        # Vista virtual: la navegación recorre el modelo, no las filas del TreeView
+        virtual = getattr(self.app, 'virtual_results', None)
+        if virtual and virtual.activa:
+            virtual.mover_seleccion(event.keysym)
             return "break"
         
-        seleccion = self.app.tree.selection()
-        if not seleccion:
-            self._seleccionar_elemento(elementos[0])
+        navegador = self._navegador()
+        primero = navegador.primero()
+        if not primero:
             return "break"
         
-        elementos_visibles = self._get_elementos_visibles()
-        if not elementos_visibles:
-            return "break"
-        
-        try:
-            indice = elementos_visibles.index(seleccion[0])
-        except ValueError:
-            self._seleccionar_elemento(elementos_visibles[0])
+        seleccion = self.app.tree.selection()
+        if not seleccion or not self.app.tree.exists(seleccion[0]):
+            self._seleccionar_elemento(primero)
             return "break"
         
-        # Calcular nuevo índice
+        # Cada movimiento sigue los enlaces del TreeView: no se arma la lista de visibles
+        actual = seleccion[0]
         movimientos = {
-            "Up": max(0, indice - 1),
-            "Down": min(len(elementos_visibles) - 1, indice + 1),
-            "Prior": max(0, indice - 5),  # Page Up
-            "Next": min(len(elementos_visibles) - 1, indice + 5),  # Page Down
-            "Home": 0,
-            "End": len(elementos_visibles) - 1
+            "Up": lambda: navegador.anterior(actual),
+            "Down": lambda: navegador.siguiente(actual),
+            "Prior": lambda: navegador.mover(actual, -5),  # Page Up
+            "Next": lambda: navegador.mover(actual, 5),  # Page Down
+            "Home": lambda: primero,
+            "End": navegador.ultimo
         }
         
-        nuevo_indice = movimientos.get(event.keysym, indice)
-        if nuevo_indice != indice:
-            self._seleccionar_elemento(elementos_visibles[nuevo_indice])
+        movimiento = movimientos.get(event.keysym)
+        nuevo = movimiento() if movimiento else None
+        if nuevo and nuevo != actual:
+            self._seleccionar_elemento(nuevo)
         
         return "break"
     
-    def _get_elementos_visibles(self):
-        """Obtiene todos los elementos visibles recursivamente"""
-        def obtener_recursivo(parent=""):
-            items = []
-            for child in self.app.tree.get_children(parent):
-                items.append(child)
-                if self.app.tree.item(child, 'open'):
-                    items.extend(obtener_recursivo(child))
-            return items
-        
-        return obtener_recursivo()
+    def _navegador(self):
+        if self._navegador_tabla is None or self._navegador_tabla.tree is not self.app.tree:
+            self._navegador_tabla = VisibleRowNavigator(self.app.tree)
+        return self._navegador_tabla
     
     def _seleccionar_elemento(self, elemento):
         """Selecciona un elemento del tree"""
@@ -164,8 +159,21 @@ class EventManager:
         self.app.btn_copiar.config(state=estado)
         self.app.configurar_scrollbars()
     
+    def _es_fila_mostrar_mas(self):
+        """Verifica si la selección es la fila de paginación de resultados"""
+        try:
+            seleccion = self.app.tree.selection()
+            return bool(seleccion) and 'mostrar_mas' in self.app.tree.item(seleccion[0], 'tags')
+        except Exception:
+            return False
+    
     def abrir_carpeta_seleccionada(self):
         """Abre la carpeta seleccionada - CORREGIDO FINAL"""
+        # La fila "Mostrar más" pagina el ranking en lugar de abrir una carpeta
+        if self._es_fila_mostrar_mas():
+            self.app.search_methods.mostrar_mas()
+            return
+        
         seleccion = self.app.ui_callbacks.obtener_seleccion_tabla()
         if not seleccion:
             self._actualizar_estado("Seleccione una carpeta primero")
@@ -2,6 +2,8 @@
 import tkinter as tk
 from tkinter import ttk
 
+from .tree_navigation import VisibleRowNavigator
+
 class ExplorerUI:
     """Maneja la interfaz gráfica del explorador"""
     
@@ -12,6 +14,7 @@ class ExplorerUI:
         self.content_frame = None
         self.grip_frame = None
         self.tree = None
+        self.navigator = None
         self.path_label = None
     
     def create(self, panel_width=300):
@@ -186,7 +189,9 @@ class ExplorerUI:
         # TreeView con el MISMO estilo que el TreeView principal
         self.tree = ttk.Treeview(tree_frame, columns=("Fecha",), show="tree headings", 
                          style="Custom.Treeview", selectmode="extended",
-                         yscrollcommand=vsb.set, xscrollcommand=hsb.set)
+                         yscrollcommand=lambda first, last: self._on_yscroll(vsb, first, last),
+                         xscrollcommand=hsb.set)
+        self.navigator = VisibleRowNavigator(self.tree)
         
         # Asegurar que use exactamente el mismo estilo
         style = ttk.Style()
@@ -272,6 +277,12 @@ class ExplorerUI:
         
         self.shortcuts_label.config(text=text)
     
+    def _on_yscroll(self, vsb, first, last):
+        """Cambió la parte visible: scrollbar y fechas de las filas que aparecen"""
+        vsb.set(first, last)
+        if hasattr(self.explorer_manager, 'schedule_visible_dates'):
+            self.explorer_manager.schedule_visible_dates()
+    
     def _bind_treeview_events(self):
         """Configura los eventos del TreeView incluyendo navegación por flechas"""
         # Eventos básicos
@@ -337,123 +348,53 @@ class ExplorerUI:
                 self.tree.see(children[0])
         return "break"
     
-    def _on_arrow_up(self, event):
-        """Maneja flecha arriba"""
-        items = self._get_visible_items()
-        if not items:
-            return "break"
-        
+    def _select_item(self, item):
+        self.tree.selection_set(item)
+        self.tree.focus(item)
+        self.tree.see(item)
+    
+    def _move_selection(self, pasos, sin_seleccion):
+        """Mueve la selección `pasos` filas visibles (siguiendo los enlaces del TreeView)"""
         selection = self.tree.selection()
-        if not selection:
-            self.tree.selection_set(items[-1])
-            self.tree.focus(items[-1])
-            self.tree.see(items[-1])
+        if not selection or not self.tree.exists(selection[0]):
+            item = sin_seleccion()
         else:
-            current = selection[0]
-            try:
-                current_index = items.index(current)
-                if current_index > 0:
-                    prev_item = items[current_index - 1]
-                    self.tree.selection_set(prev_item)
-                    self.tree.focus(prev_item)
-                    self.tree.see(prev_item)
-            except ValueError:
-                pass
+            item = self.navigator.mover(selection[0], pasos)
+            if item == selection[0]:
+                item = None
+        if item:
+            self._select_item(item)
         return "break"
     
+    def _on_arrow_up(self, event):
+        """Maneja flecha arriba"""
+        return self._move_selection(-1, self.navigator.ultimo)
+    
     def _on_arrow_down(self, event):
         """Maneja flecha abajo"""
-        items = self._get_visible_items()
-        if not items:
-            return "break"
-        
-        selection = self.tree.selection()
-        if not selection:
-            self.tree.selection_set(items[0])
-            self.tree.focus(items[0])
-            self.tree.see(items[0])
-        else:
-            current = selection[0]
-            try:
-                current_index = items.index(current)
-                if current_index < len(items) - 1:
-                    next_item = items[current_index + 1]
-                    self.tree.selection_set(next_item)
-                    self.tree.focus(next_item)
-                    self.tree.see(next_item)
-            except ValueError:
-                pass
-        return "break"
+        return self._move_selection(1, self.navigator.primero)
     
     def _on_home_key(self, event):
         """Maneja Home"""
-        items = self._get_visible_items()
-        if items:
-            self.tree.selection_set(items[0])
-            self.tree.focus(items[0])
-            self.tree.see(items[0])
+        item = self.navigator.primero()
+        if item:
+            self._select_item(item)
         return "break"
     
     def _on_end_key(self, event):
         """Maneja End"""
-        items = self._get_visible_items()
-        if items:
-            self.tree.selection_set(items[-1])
-            self.tree.focus(items[-1])
-            self.tree.see(items[-1])
+        item = self.navigator.ultimo()
+        if item:
+            self._select_item(item)
         return "break"
     
     def _on_page_up(self, event):
         """Maneja Page Up"""
-        items = self._get_visible_items()
-        if not items:
-            return "break"
-        
-        selection = self.tree.selection()
-        if selection:
-            current = selection[0]
-            try:
-                current_index = items.index(current)
-                new_index = max(0, current_index - 5)
-                new_item = items[new_index]
-                self.tree.selection_set(new_item)
-                self.tree.focus(new_item)
-                self.tree.see(new_item)
-            except ValueError:
-                pass
-        return "break"
+        return self._move_selection(-5, lambda: None)
     
     def _on_page_down(self, event):
         """Maneja Page Down"""
-        items = self._get_visible_items()
-        if not items:
-            return "break"
-        
-        selection = self.tree.selection()
-        if selection:
-            current = selection[0]
-            try:
-                current_index = items.index(current)
-                new_index = min(len(items) - 1, current_index + 5)
-                new_item = items[new_index]
-                self.tree.selection_set(new_item)
-                self.tree.focus(new_item)
-                self.tree.see(new_item)
-            except ValueError:
-                pass
-        return "break"
-    
-    def _get_visible_items(self):
-        """Obtiene todos los elementos visibles en el árbol"""
-        def get_visible_recursive(parent=''):
-            items = []
-            for child in self.tree.get_children(parent):
-                items.append(child)
-                if self.tree.item(child, 'open'):
-                    items.extend(get_visible_recursive(child))
-            return items
-        
-        return get_visible_recursive()
+        return self._move_selection(5, lambda: None)
     
     def _update_scrollbars(self, vsb, hsb):
         """Actualiza la visibilidad de las scrollbars"""
@@ -0,0 +1,173 @@
+# src/file_change_batcher.py - Eventos de archivos combinados en parches para el explorador
+import os
+import stat
+import threading
+import time
+
+
+class FileChangeBatcher:
+    """Junta los eventos de watchdog y los convierte en parches para el árbol
+
+    Los eventos de una ventana corta se combinan por ruta (crear y borrar lo
+    mismo se anula, mover algo recién creado es crearlo en el destino, etc.)
+    y salen como parches ('insert' | 'delete' | 'rename' | 'update') que el explorador
+    aplica en un solo lote en el hilo de Tk. Copiar 500 archivos produce un
+    lote, no 500 recargas.
+    """
+
+    VENTANA = 0.15  # segundos que se esperan eventos antes de aplicar
+
+    def __init__(self, explorer_manager):
+        self.explorer_manager = explorer_manager
+        self._lock = threading.Lock()
+        self._estado = {}  # {ruta: 'creado' | 'eliminado' | 'reemplazado' | 'modificado'}
+        self._renombres = {}  # {ruta_nueva: ruta_original}
+        self._eventos = 0
+        self._primer_evento = None  # perf_counter del primer evento de la ventana
+        self._timer = None
+
+        self.stats = {'eventos': 0, 'lotes': 0, 'parches': 0, 'ms_aplicando': 0.0, 'ms_totales': 0.0,
+                      'max_eventos_por_segundo': 0.0}
+
+    # Hilo de watchdog
+
+    def creado(self, ruta):
+        with self._lock:
+            if self._estado.get(ruta) == 'eliminado':
+                # Borrado y vuelto a crear: puede ser otro tipo, se reemplaza la fila
+                self._estado[ruta] = 'reemplazado'
+            else:
+                self._estado[ruta] = 'creado'
+            self._registrar()
+
+    def eliminado(self, ruta):
+        with self._lock:
+            origen = self._renombres.pop(ruta, None)
+            if origen is not None:
+                # Se renombró y después se borró: para el árbol se borró el original
+                self._estado[origen] = 'eliminado'
+            elif self._estado.get(ruta) == 'creado':
+                del self._estado[ruta]
+            else:
+                self._estado[ruta] = 'eliminado'
+            self._registrar()
+
+    def modificado(self, ruta):
+        """Archivo editado en el lugar: la carpeta no cambia de mtime, hay que avisar al cache"""
+        with self._lock:
+            if ruta not in self._estado and ruta not in self._renombres:
+                self._estado[ruta] = 'modificado'
+            self._registrar()
+
+    def movido(self, origen, destino):
+        with self._lock:
+            if self._estado.get(origen) == 'modificado':
+                del self._estado[origen]  # El renombre ya trae la fecha nueva
+            if self._estado.get(origen) == 'creado':
+                del self._estado[origen]
+                self._estado[destino] = 'creado'
+            else:
+                original = self._renombres.pop(origen, origen)
+                if original == destino:
+                    pass  # Volvió a su nombre
+                else:
+                    self._renombres[destino] = original
+            self._registrar()
+
+    def _registrar(self):
+        """Requiere el lock tomado"""
+        self._eventos += 1
+        self.stats['eventos'] += 1
+        if self._timer is None:
+            self._primer_evento = time.perf_counter()
+            self._timer = threading.Timer(self.VENTANA, self._cerrar_ventana)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def descartar(self):
+        with self._lock:
+            if self._timer:
+                self._timer.cancel()
+            self._timer = None
+            self._estado.clear()
+            self._renombres.clear()
+            self._eventos = 0
+
+    # Hilo del timer: arma los parches (los stat van aquí, no en el hilo de Tk)
+
+    def _cerrar_ventana(self):
+        with self._lock:
+            estado, self._estado = self._estado, {}
+            renombres, self._renombres = self._renombres, {}
+            eventos, self._eventos = self._eventos, 0
+            primer_evento, self._primer_evento = self._primer_evento, None
+            self._timer = None
+
+        # Las ediciones en el lugar no cambian el mtime de la carpeta: su listado guardado quedó viejo
+        cache = getattr(self.explorer_manager.app, 'listing_cache', None)
+        if cache:
+            for carpeta in {os.path.dirname(ruta) for ruta, cambio in estado.items() if cambio == 'modificado'}:
+                cache.invalidar(carpeta)
+
+        parches = []
+        for destino, origen in renombres.items():
+            info = self._info(destino)
+            if info:
+                parches.append(('rename', origen, destino) + info)
+            else:
+                parches.append(('delete', origen))
+        for ruta, cambio in estado.items():
+            if cambio == 'eliminado':
+                parches.append(('delete', ruta))
+                continue
+            if cambio == 'modificado':
+                info = self._info(ruta)
+                if info:
+                    parches.append(('update', ruta) + info)
+                continue
+            if cambio == 'reemplazado':
+                parches.append(('delete', ruta))
+            info = self._info(ruta)
+            if info:
+                parches.append(('insert', ruta) + info)
+
+        if parches:
+            app = self.explorer_manager.app
+            app.ui_dispatcher.publicar(self._aplicar, parches, eventos, primer_evento)
+
+    @staticmethod
+    def _info(ruta):
+        """(es_dir, mtime) o None si la ruta ya no existe"""
+        try:
+            st = os.stat(ruta)
+        except OSError:
+            return None
+        return stat.S_ISDIR(st.st_mode), st.st_mtime
+
+    # Hilo de Tk
+
+    def _aplicar(self, parches, eventos, primer_evento):
+        inicio = time.perf_counter()
+        try:
+            self.explorer_manager.apply_tree_patches(parches)
+        except Exception as e:
+            print(f"[MONITOR] Error aplicando cambios: {e}")
+        fin = time.perf_counter()
+        # Eventos/s de punta a punta: ventana, stats, espera del hilo de Tk y aplicación
+        segundos = fin - primer_evento
+
+        self.stats['lotes'] += 1
+        self.stats['parches'] += len(parches)
+        self.stats['ms_aplicando'] += (fin - inicio) * 1000
+        self.stats['ms_totales'] += segundos * 1000
+        if segundos > 0:
+            por_segundo = eventos / segundos
+            self.stats['max_eventos_por_segundo'] = max(self.stats['max_eventos_por_segundo'], por_segundo)
+            print(f"[MONITOR] {eventos} eventos → {len(parches)} cambios en {segundos * 1000:.1f}ms "
+                  f"(aplicar {(fin - inicio) * 1000:.1f}ms, {por_segundo:.0f} eventos/s)")
+
+    def get_stats(self):
+        stats = dict(self.stats)
+        if stats['ms_totales']:
+            stats['eventos_por_segundo'] = stats['eventos'] / (stats['ms_totales'] / 1000)
+        return stats
@@ -0,0 +1,47 @@
+# src/file_delta.py - Cambios de archivos hechos desde el explorador, para el resto de las vistas
+import os
+
+
+def delta(creados=(), eliminados=(), movidos=()):
+    """{'creados': [ruta], 'eliminados': [ruta], 'movidos': [(origen, destino)]} de primer nivel
+
+    Es lo que el explorador pasa a los resultados y al índice de búsqueda
+    después de pegar, arrastrar, renombrar, eliminar o crear. Las rutas son
+    las de primer nivel: lo que había dentro de una carpeta la acompaña.
+    Con "reemplazar" una misma ruta puede estar en eliminados y en creados;
+    se aplica primero lo eliminado, después lo movido y al final lo creado.
+    """
+    return {'creados': list(creados), 'eliminados': list(eliminados), 'movidos': list(movidos)}
+
+
+def vacio(cambios):
+    return not (cambios.get('creados') or cambios.get('eliminados') or cambios.get('movidos'))
+
+
+def clave_ruta(ruta):
+    """Forma comparable de una ruta (mayúsculas y separadores según el sistema)"""
+    return os.path.normcase(os.path.normpath(ruta))
+
+
+def ancestro_en(clave, claves):
+    """La primera de `claves` que es `clave` o una carpeta que la contiene, o None
+
+    Sube por los padres (pocos niveles) en vez de comparar contra cada
+    cambio, así aplicar cientos de cambios a miles de rutas sigue siendo lineal.
+    """
+    if not claves:
+        return None
+    actual = clave
+    while True:
+        if actual in claves:
+            return actual
+        padre = os.path.dirname(actual)
+        if padre == actual:
+            return None
+        actual = padre
+
+
+def reubicar(ruta, origen, destino):
+    """`ruta` (dentro de `origen`, ya comparada por clave) llevada a `destino`"""
+    resto = os.path.normpath(ruta)[len(clave_ruta(origen)):]
+    return destino + resto if resto else destino
@@ -1,17 +1,24 @@
 ﻿# src/file_explorer_manager.py - Gestor del Explorador V.4.5 - Crear carpeta inline
 import tkinter as tk
 from tkinter import ttk, messagebox
+import bisect
 import os
+import threading
 from datetime import datetime
 
 # Importar componentes separados
 from .explorer_ui import ExplorerUI
 from .file_monitor import FileMonitor
 from .file_operations import FileOperations
+from .file_delta import delta, vacio
+from .file_operation_queue import FileJob, FileOperationQueue, CONFLICTO_REEMPLAZAR, CONFLICTO_RENOMBRAR
 
 class FileExplorerManager:
     """Gestor principal del explorador de archivos - Con crear carpeta inline"""
     
+    CHUNK_SIZE = 200  # Filas insertadas por cuadro al cargar una carpeta
+    MAX_VISIBLE_ROWS = 100  # Tope de filas visibles al completar fechas
+    
     def __init__(self, app):
         self.app = app
         self.current_path = os.path.expanduser("~")
@@ -21,6 +28,7 @@ class FileExplorerManager:
         self.ui = None
         self.file_monitor = FileMonitor(self)
         self.file_ops = FileOperations(self)
+        self.file_queue = FileOperationQueue(app)
         
         # Variables de estado
         self.resize_start_x = 0
@@ -39,6 +47,11 @@ class FileExplorerManager:
         self.loading_items = set()
         self.loaded_items = set()
         self.expanding_items = set()
+        self._loads = {}  # {item: token} de la carga en curso de cada nodo
+        self._load_token = 0
+        self._pending_dates = {}  # {item: mtime} fechas aún sin formatear
+        self._dates_scheduled = False
+        self._folder_items = set()  # items que son carpetas (para ordenar al insertar)
 
         # Clipboard para Ctrl+X/C/V
         self._clipboard = {'paths': [], 'mode': None}
@@ -53,7 +66,7 @@ class FileExplorerManager:
         }
         self._drop_indicator = None
     
-        # Callback para notificar cambios al TreeView principal
+        # Callback para notificar cambios al TreeView principal: (operación, delta de file_delta)
         self.on_file_change_callback = None
 
     @property
@@ -148,6 +161,9 @@ class FileExplorerManager:
             self.ui.tree.bind('<Control-v>', lambda e: self.paste_item())
             self.ui.tree.bind('<Control-V>', lambda e: self.paste_item())
             
+            # Esc cancela copias/movimientos/eliminaciones en curso
+            self.ui.tree.bind('<Escape>', lambda e: self.cancel_file_operations())
+            
             # Drag & Drop visual
             self.ui.tree.bind('<B1-Motion>', self._on_drag_motion, add='+')
             self.ui.tree.bind('<ButtonRelease-1>', self._on_drag_release, add='+')
@@ -313,6 +329,7 @@ class FileExplorerManager:
             # Agregar al mapeo
             self.path_to_item[nueva_ruta] = self.editing_item
             self.item_to_path[self.editing_item] = nueva_ruta
+            self._folder_items.add(self.editing_item)
             
             # Agregar dummy si es necesario (para que muestre flecha de expansi├│n)
             # Aunque est├® vac├¡a, dejamos que el usuario pueda crear subcarpetas
@@ -324,8 +341,7 @@ class FileExplorerManager:
             print(f"[DEBUG] Carpeta creada exitosamente: {nueva_ruta}")
             
             # Notificar al TreeView principal
-            if self.on_file_change_callback:
-                self.on_file_change_callback('create', nueva_ruta)
+            self._notify_file_change('create', delta(creados=[nueva_ruta]))
             
         except PermissionError:
             messagebox.showerror(
@@ -403,9 +419,10 @@ class FileExplorerManager:
         
         self.path_to_item[self.current_path] = root_item
         self.item_to_path[root_item] = self.current_path
+        self._folder_items.add(root_item)
         
         # Cargar contenido del directorio ra├¡z
-        self._load_directory_children_sync(root_item, self.current_path)
+        self._load_directory_children_async(root_item, self.current_path)
         
         # Iniciar monitoreo
         if self.is_visible():
@@ -422,75 +439,172 @@ class FileExplorerManager:
         self.loading_items.clear()
         self.loaded_items.clear()
         self.expanding_items.clear()
+        self._loads.clear()
+        self._pending_dates.clear()
+        self._folder_items.clear()
     
-    def _load_directory_children_sync(self, parent_item, directory_path):
-        """Carga los hijos de un directorio sincronizadamente"""
+    def _load_directory_children_async(self, parent_item, directory_path):
+        """Carga los hijos de un directorio en un hilo de trabajo
+
+        El nodo muestra "Cargando..." enseguida; listar (y sondear
+        subcarpetas) ocurre fuera del hilo de Tk y las filas se insertan por
+        lotes, uno por cuadro, a medida que llegan.
+        """
         print(f"[DEBUG] Cargando hijos para: {directory_path}")
         
         if parent_item in self.loading_items or parent_item in self.loaded_items:
             return
         
         self.loading_items.add(parent_item)
+        self._clear_children(parent_item)
+        placeholder = self.tree.insert(parent_item, 'end', text="🔄 Cargando...",
+                                       values=('',), tags=('evenrow',))
+        
+        self._load_token += 1
+        token = self._load_token
+        self._loads[parent_item] = token
+        
+        def worker():
+            items = self.file_ops.get_directory_entries(directory_path)
+            self.app.ui_dispatcher.publicar(
+                self._on_directory_listed, parent_item, directory_path, placeholder, items, token)
+        
+        threading.Thread(target=worker, daemon=True).start()
+    
+    def _load_vigente(self, parent_item, token):
+        """La carga sigue siendo la última pedida para el nodo y el nodo existe"""
+        return self._loads.get(parent_item) == token and self.tree.exists(parent_item)
+    
+    def _on_directory_listed(self, parent_item, directory_path, placeholder, items, token):
+        """Hilo de Tk: llegó el listado de un nodo"""
+        if not self._load_vigente(parent_item, token):
+            self.loading_items.discard(parent_item)
+            return
+        
+        if self.tree.exists(placeholder):
+            self.tree.delete(placeholder)
+        
+        if items is None:
+            self._finish_directory_load(parent_item, token)
+            self._add_error_node(parent_item, "⚠ Acceso denegado")
+            return
+        
+        if not items:
+            print(f"[DEBUG] Directorio vacío: {directory_path}")
+        
+        self.loaded_items.add(parent_item)
+        self._insert_directory_chunk(parent_item, items, 0, token)
+    
+    def _insert_directory_chunk(self, parent_item, items, start, token):
+        """Inserta un lote de filas y deja el siguiente para el próximo cuadro"""
+        if not self._load_vigente(parent_item, token):
+            self.loading_items.discard(parent_item)
+            return
         
+        end = min(start + self.CHUNK_SIZE, len(items))
         try:
-            self._clear_children(parent_item)
-            
-            items = self.file_ops.get_directory_contents(directory_path)
-            if items is None:
-                self._add_error_node(parent_item, "ÔÜá Acceso denegado")
-                return
-            
-            if not items:
-                print(f"[DEBUG] Directorio vac├¡o: {directory_path}")
-                return
-            
-            self._add_directory_items(parent_item, items)
-            self.loaded_items.add(parent_item)
-                    
+            self._add_directory_items(parent_item, items[start:end], start)
         except Exception as e:
-            print(f"[ERROR] Error cargando directorio {directory_path}: {e}")
-            self._add_error_node(parent_item, f'ÔØî Error: {str(e)}')
-        finally:
-            self.loading_items.discard(parent_item)
+            print(f"[ERROR] Error cargando hijos: {e}")
+            self._add_error_node(parent_item, f'❌ Error: {str(e)}')
+            self._finish_directory_load(parent_item, token)
+            return
+        
+        if end < len(items):
+            self.app.ui_dispatcher.publicar(self._insert_directory_chunk, parent_item, items, end, token)
+            return
+        
+        self._finish_directory_load(parent_item, token)
+        
+        # Prelistar las subcarpetas que probablemente se expandan después
+        prefetcher = getattr(self.app, 'directory_prefetcher', None)
+        if prefetcher:
+            prefetcher.sugerir(full_path for _, is_dir, _, full_path in items if is_dir)
+    
+    def _finish_directory_load(self, parent_item, token):
+        self.loading_items.discard(parent_item)
+        if self._loads.get(parent_item) == token:
+            del self._loads[parent_item]
+        if self.ui and hasattr(self.ui, 'update_scrollbars'):
+            self.tree.after_idle(self.ui.update_scrollbars)
     
     def _clear_children(self, parent_item):
         """Limpia los hijos de un item"""
         children = self.tree.get_children(parent_item)
         for child in children:
-            if child in self.item_to_path:
-                path_to_remove = self.item_to_path[child]
-                if path_to_remove in self.path_to_item:
-                    del self.path_to_item[path_to_remove]
-                del self.item_to_path[child]
-            self.tree.delete(child)
+            self._forget_subtree(child)
+        if children:
+            self.tree.delete(*children)
+    
+    def _forget_subtree(self, item):
+        """Quita de los mapeos el item y todos sus descendientes (antes de borrarlo del árbol)"""
+        for child in self.tree.get_children(item):
+            self._forget_subtree(child)
+        path = self.item_to_path.pop(item, None)
+        if path is not None and self.path_to_item.get(path) == item:
+            del self.path_to_item[path]
+        self._pending_dates.pop(item, None)
+        self._folder_items.discard(item)
+        self.loaded_items.discard(item)
+        self._loads.pop(item, None)
     
     def _add_error_node(self, parent_item, text):
         """Agrega un nodo de error"""
         error_item = self.tree.insert(parent_item, 'end', text=text, 
                                     values=('',), tags=('evenrow',))
     
-    def _add_directory_items(self, parent_item, items):
-        """Agrega items del directorio al ├írbol"""
-        for i, (name, is_dir, fecha_mod, full_path) in enumerate(items):
+    def _add_directory_items(self, parent_item, items, start=0):
+        """Agrega items del directorio al árbol (la fecha se formatea al hacerse visible)"""
+        folders = []
+        for i, (name, is_dir, mtime, full_path) in enumerate(items, start):
             row_tag = 'evenrow' if i % 2 == 0 else 'oddrow'
+            display_name = f"📁 {name}" if is_dir else f"📄 {name}"
+            item_id = self.tree.insert(parent_item, 'end', text=display_name,
+                                     values=('',), tags=(row_tag,))
+            
+            self.path_to_item[full_path] = item_id
+            self.item_to_path[item_id] = full_path
+            self._pending_dates[item_id] = mtime
             
             if is_dir:
-                display_name = f"📁 {name}"
-                item_id = self.tree.insert(parent_item, 'end', text=display_name,
-                                         values=(fecha_mod,), tags=(row_tag,))
-                
-                self.path_to_item[full_path] = item_id
-                self.item_to_path[item_id] = full_path
-                
-                if self.file_ops.has_subdirectories(full_path):
-                    dummy = self.tree.insert(item_id, 'end', text='Cargando...', values=('',))
-            else:
-                display_name = f"📄 {name}"
-                item_id = self.tree.insert(parent_item, 'end', text=display_name,
-                                         values=(fecha_mod,), tags=(row_tag,))
-                
-                self.path_to_item[full_path] = item_id
-                self.item_to_path[item_id] = full_path
+                self._folder_items.add(item_id)
+                folders.append((item_id, full_path))
+        
+        # Flechas de expansión: sondeo en segundo plano
+        prober = getattr(self.app, 'children_prober', None)
+        if prober:
+            prober.solicitar(folders, destino=self._add_expand_arrows, por_busqueda=False)
+        else:
+            self._add_expand_arrows([item_id for item_id, full_path in folders
+                                     if self.file_ops.has_subdirectories(full_path)])
+        
+        self.schedule_visible_dates()
+    
+    def _add_expand_arrows(self, item_ids):
+        """Agrega el nodo "Cargando..." a las carpetas que siguen sin hijos"""
+        for item_id in item_ids:
+            try:
+                if self.tree.exists(item_id) and not self.tree.get_children(item_id):
+                    self.tree.insert(item_id, 'end', text='Cargando...', values=('',))
+            except Exception as e:
+                print(f"[ERROR] Error agregando flecha: {e}")
+    
+    def schedule_visible_dates(self):
+        """Formatea las fechas de las filas visibles cuando Tk quede ocioso (una vez por ciclo)"""
+        if self._dates_scheduled or not self._pending_dates or not self.tree:
+            return
+        self._dates_scheduled = True
+        self.tree.after_idle(self._format_visible_dates)
+    
+    def _format_visible_dates(self):
+        """Completa la columna Fecha solo de las filas que se ven"""
+        self._dates_scheduled = False
+        tree = self.tree
+        if not tree or not self._pending_dates:
+            return
+        for item in self.ui.navigator.en_pantalla(self.MAX_VISIBLE_ROWS):
+            if item in self._pending_dates:
+                tree.set(item, 'Fecha', self.file_ops.format_date(self._pending_dates.pop(item)))
     
     def handle_node_expansion_immediate(self, item):
         """Maneja expansi├│n de nodo inmediatamente"""
@@ -511,7 +625,7 @@ class FileExplorerManager:
                 break
         
         try:
-            self._load_directory_children_sync(item, path)
+            self._load_directory_children_async(item, path)
         except Exception as e:
             print(f"[ERROR] Error expandiendo nodo: {e}")
         finally:
@@ -520,16 +634,146 @@ class FileExplorerManager:
     def refresh_tree(self):
         """Refresca todo el ├írbol"""
         print("[DEBUG] Refrescando ├írbol completo")
+        # Los listados guardados no notan archivos editados en el lugar (la carpeta conserva su mtime)
+        cache = getattr(self.app, 'listing_cache', None)
+        if cache:
+            for item in self._folder_items:
+                path = self.item_to_path.get(item)
+                if path:
+                    cache.invalidar(path)
         self._clear_state()
         self.load_directory(self.current_path)
     
+    # ==================== PARCHES DEL ÁRBOL (sin recargar) ====================
+    
+    def apply_tree_patches(self, patches):
+        """Aplica cambios puntuales al árbol conservando lo expandido
+
+        patches: [('insert', ruta, es_dir, mtime) | ('delete', ruta) |
+        ('rename', ruta_vieja, ruta_nueva, es_dir, mtime) |
+        ('update', ruta, es_dir, mtime)]. Solo se tocan las filas afectadas;
+        las inserciones se agrupan por carpeta padre.
+        """
+        if not self.tree:
+            return
+        inserts = {}  # {carpeta padre: [(ruta, es_dir, mtime)]}
+        for patch in patches:
+            kind = patch[0]
+            if kind == 'delete':
+                self._remove_path(patch[1])
+            elif kind == 'rename':
+                _, old_path, new_path, is_dir, mtime = patch
+                if not self._rename_path(old_path, new_path):
+                    inserts.setdefault(os.path.dirname(new_path), []).append((new_path, is_dir, mtime))
+            elif kind == 'insert':
+                _, path, is_dir, mtime = patch
+                inserts.setdefault(os.path.dirname(path), []).append((path, is_dir, mtime))
+            elif kind == 'update':
+                _, path, is_dir, mtime = patch
+                item = self.path_to_item.get(path)
+                if item and self.tree.exists(item):
+                    self._pending_dates[item] = mtime
+        
+        for parent_path, entries in inserts.items():
+            self._insert_sorted(parent_path, entries)
+        
+        self.schedule_visible_dates()
+        if self.ui and hasattr(self.ui, 'update_scrollbars'):
+            self.tree.after_idle(self.ui.update_scrollbars)
+    
+    def _sort_key(self, item):
+        """Mismo orden que el listado: carpetas primero y luego por nombre"""
+        path = self.item_to_path.get(item)
+        if path is None:
+            return (2, '')  # "Cargando..." y errores al final
+        return (0 if item in self._folder_items else 1, os.path.basename(path).lower())
+    
+    def _remove_path(self, path):
+        item = self.path_to_item.get(path)
+        if not item or not self.tree.exists(item):
+            return False
+        self._forget_subtree(item)
+        self.tree.delete(item)
+        return True
+    
+    def _rename_path(self, old_path, new_path):
+        """Renombra la fila en su lugar (y las rutas de sus descendientes); False si no se pudo"""
+        item = self.path_to_item.get(old_path)
+        if not item or not self.tree.exists(item):
+            return False
+        if os.path.dirname(old_path) != os.path.dirname(new_path):
+            # Movida a otra carpeta: se quita aquí y se inserta en el destino
+            self._remove_path(old_path)
+            return False
+        
+        if new_path in self.path_to_item and self.path_to_item[new_path] != item:
+            self._remove_path(new_path)
+        
+        pending = [item]
+        while pending:
+            current = pending.pop()
+            path = self.item_to_path.get(current)
+            if path is not None:
+                updated = new_path + path[len(old_path):]
+                if self.path_to_item.get(path) == current:
+                    del self.path_to_item[path]
+                self.path_to_item[updated] = current
+                self.item_to_path[current] = updated
+            pending.extend(self.tree.get_children(current))
+        
+        prefix = "📁 " if item in self._folder_items else "📄 "
+        self.tree.item(item, text=f"{prefix}{os.path.basename(new_path)}")
+        
+        # Reubicar según el nombre nuevo
+        parent_item = self.tree.parent(item)
+        siblings = [c for c in self.tree.get_children(parent_item) if c != item]
+        keys = [self._sort_key(c) for c in siblings]
+        self.tree.move(item, parent_item, bisect.bisect(keys, self._sort_key(item)))
+        return True
+    
+    def _insert_sorted(self, parent_path, entries):
+        """Inserta filas nuevas en su posición dentro de una carpeta ya cargada"""
+        parent_item = self.path_to_item.get(parent_path)
+        if not parent_item or not self.tree.exists(parent_item):
+            return
+        if parent_item not in self.loaded_items or parent_item in self.loading_items:
+            # Sin hijos cargados: basta con que tenga flecha si llegó una carpeta
+            if any(is_dir for _, is_dir, _ in entries) and not self.tree.get_children(parent_item):
+                self._add_expand_arrows([parent_item])
+            return
+        
+        children = self.tree.get_children(parent_item)
+        keys = [self._sort_key(c) for c in children]
+        folders = []
+        for path, is_dir, mtime in entries:
+            if path in self.path_to_item:
+                continue
+            key = (0 if is_dir else 1, os.path.basename(path).lower())
+            index = bisect.bisect(keys, key)
+            row_tag = 'evenrow' if index % 2 == 0 else 'oddrow'
+            display_name = f"📁 {os.path.basename(path)}" if is_dir else f"📄 {os.path.basename(path)}"
+            item_id = self.tree.insert(parent_item, index, text=display_name,
+                                       values=('',), tags=(row_tag,))
+            keys.insert(index, key)
+            
+            self.path_to_item[path] = item_id
+            self.item_to_path[item_id] = path
+            self._pending_dates[item_id] = mtime
+            if is_dir:
+                self._folder_items.add(item_id)
+                folders.append((item_id, path))
+        
+        prober = getattr(self.app, 'children_prober', None)
+        if prober and folders:
+            prober.solicitar(folders, destino=self._add_expand_arrows, por_busqueda=False)
+    
     def refresh_current_node(self):
         """Refresca el nodo actual"""
         if self.current_path in self.path_to_item:
             item = self.path_to_item[self.current_path]
             if self.tree.item(item, 'open'):
                 self.loaded_items.discard(item)
-                self._load_directory_children_sync(item, self.current_path)
+                self._load_directory_children_async(item, self.current_path)
     
     def go_home(self):
         """Va al directorio home"""
@@ -634,31 +878,21 @@ class FileExplorerManager:
         
         if new_name and new_name != self.original_name:
             old_path = self.item_to_path.get(self.editing_item)
-            if old_path and self._rename_item(old_path, new_name):
-                self._update_item_after_rename(old_path, new_name)
+            if old_path and self.file_ops.rename_item(old_path, new_name):
+                self._apply_rename(old_path, os.path.join(os.path.dirname(old_path), new_name))
     
-    def _rename_item(self, old_path, new_name):
-        """Renombra un item"""
-        old_dir = os.path.dirname(old_path)
-        new_path = os.path.join(old_dir, new_name)
-        return self.file_ops.rename_item(old_path, new_name)
-    
-    def _update_item_after_rename(self, old_path, new_name):
-        """Actualiza el item despu├®s del renombrado"""
-        old_dir = os.path.dirname(old_path)
-        new_path = os.path.join(old_dir, new_name)
-        
-        del self.path_to_item[old_path]
-        del self.item_to_path[self.editing_item]
-        self.path_to_item[new_path] = self.editing_item
-        self.item_to_path[self.editing_item] = new_path
-        
-        is_dir = os.path.isdir(new_path)
-        prefix = "­ƒôü " if is_dir else "­ƒôä "
-        self.tree.item(self.editing_item, text=f"{prefix}{new_name}")
+    def _apply_rename(self, old_path, new_path):
+        """Renombra la fila en su lugar (conserva lo expandido debajo) y avisa a las demás vistas"""
+        try:
+            is_dir = os.path.isdir(new_path)
+            mtime = os.stat(new_path).st_mtime
+        except OSError:
+            return
+        self.apply_tree_patches([('rename', old_path, new_path, is_dir, mtime)])
         
         if hasattr(self.app, 'label_estado'):
-            self.app.label_estado.config(text=f"Renombrado: {new_name}")
+            self.app.label_estado.config(text=f"Renombrado: {os.path.basename(new_path)}")
+        self._notify_file_change('rename', delta(movidos=[(old_path, new_path)]))
     
     def cancel_inline_edit(self, event=None):
         """Cancela edici├│n inline (SOLO para renombrar)"""
@@ -854,33 +1088,10 @@ class FileExplorerManager:
         if not response:
             return
         
-        # Intentar eliminar
-        success = self.file_ops.delete_item(path)
-        
-        if success:
-            # Eliminar del ├írbol
-            self.tree.delete(item)
-            
-            # Limpiar mapeos
-            if path in self.path_to_item:
-                del self.path_to_item[path]
-            if item in self.item_to_path:
-                del self.item_to_path[item]
-            
-            # Actualizar estado
-            if hasattr(self.app, 'label_estado'):
-                self.app.label_estado.config(
-                    text=f"{item_type.capitalize()} eliminado: {item_name}"
-                )
-            
-            print(f"[DEBUG] Eliminado exitosamente: {path}")
-            
-            # Notificar al TreeView principal
-            if self.on_file_change_callback:
-                self.on_file_change_callback('delete', path)
-        else:
-            # El error ya fue mostrado por file_ops.delete_item
-            pass
+        # Eliminar en segundo plano; el árbol se actualiza al terminar
+        job = self.file_ops.delete_item(path)
+        if job:
+            self._start_file_job(job, 'delete')
     
     def update_shortcuts_context(self):
         """Actualiza la barra de atajos seg├║n la selecci├│n actual"""
@@ -940,10 +1151,7 @@ class FileExplorerManager:
             print('[FileExplorer] Error: no se pudo obtener rutas')
     
     def paste_item(self):
-        print('[FileExplorer] paste_item() LLAMADO')
-        """Pega el item del clipboard en la ubicaci├│n seleccionada"""
-        import shutil
-        
+        """Pega el item del clipboard en la ubicación seleccionada (en segundo plano)"""
         if not self._clipboard.get('paths'):
             print('[FileExplorer] Clipboard vac├¡o')
             return
@@ -960,59 +1168,76 @@ class FileExplorerManager:
             messagebox.showerror("Error", "Destino debe ser una carpeta")
             return
         
-        source_paths = self._clipboard['paths']
+        source_paths = [path for path in self._clipboard['paths'] if os.path.exists(path)]
         mode = self._clipboard['mode']
+        if not source_paths:
+            return
         
-        try:
-            successful = 0
-            for source_path in source_paths:
-                if not os.path.exists(source_path):
-                    continue
-                
-                item_name = os.path.basename(source_path)
-                new_path = os.path.join(dest_path, item_name)
-                
-                # Auto-renombrar si existe
-                if os.path.exists(new_path):
-                    base, ext = os.path.splitext(item_name)
-                    counter = 1
-                    while os.path.exists(new_path):
-                        new_name = f"{base}_{counter}{ext}" if ext else f"{item_name}_{counter}"
-                        new_path = os.path.join(dest_path, new_name)
-                        counter += 1
-                
-                # Copiar o mover
-                if mode == 'copy':
-                    if os.path.isdir(source_path):
-                        shutil.copytree(source_path, new_path, dirs_exist_ok=True)
-                    else:
-                        shutil.copy2(source_path, new_path)
-                    successful += 1
-                elif mode == 'cut':
-                    shutil.move(source_path, new_path)
-                    successful += 1
-            
-            if mode == 'cut':
-                self._clipboard = {'paths': [], 'mode': None}
-            
-            # Refresh en background para no congelar UI
-            self.ui.tree.after(100, self.refresh_tree)
-            print(f'[FileExplorer] {successful} items procesados')
-            
-            # Notificar al TreeView principal
-            if self.on_file_change_callback:
-                operation = 'move' if mode == 'cut' else 'copy'
-                self.on_file_change_callback(operation, source_paths)
-            
-        except PermissionError:
-            messagebox.showerror("Error", "Sin permisos para realizar la operaci├│n")
-        except OSError as e:
-            messagebox.showerror("Error", f"Error:\\n{str(e)}")
-        except Exception as e:
-            messagebox.showerror("Error", f"Error inesperado:\\n{str(e)}")
-            import traceback
-            traceback.print_exc()
-
+        conflict = self._ask_conflict_policy(source_paths, dest_path)
+        if conflict is None:
+            return
+        
+        if mode == 'cut':
+            self._clipboard = {'paths': [], 'mode': None}
+        
+        job = FileJob('copiar' if mode == 'copy' else 'mover', source_paths, dest_path, conflict)
+        self._start_file_job(job, 'move' if mode == 'cut' else 'copy')
+        print(f'[FileExplorer] {len(source_paths)} items encolados')
+    
+    def _ask_conflict_policy(self, source_paths, dest_path):
+        """Política para nombres existentes, elegida antes de empezar (None = cancelar)"""
+        conflicts = [os.path.basename(path) for path in source_paths
+                     if os.path.dirname(path) != dest_path
+                     and os.path.exists(os.path.join(dest_path, os.path.basename(path)))]
+        if not conflicts:
+            return CONFLICTO_RENOMBRAR
+        
+        listado = "\n".join(conflicts[:10]) + ("\n..." if len(conflicts) > 10 else "")
+        respuesta = messagebox.askyesnocancel(
+            "Elementos existentes",
+            f"{len(conflicts)} elemento(s) ya existen en el destino:\n{listado}\n\n"
+            "Sí: reemplazarlos\nNo: conservar ambos (renombrar)\nCancelar: no pegar"
+        )
+        if respuesta is None:
+            return None
+        return CONFLICTO_REEMPLAZAR if respuesta else CONFLICTO_RENOMBRAR
+    
+    # ==================== COLA DE OPERACIONES ====================
+    
+    def _start_file_job(self, job, operation):
+        """Encola la operación; progreso en la barra de estado y árbol parcheado al terminar"""
+        self.file_queue.encolar(
+            job,
+            al_terminar=lambda j: self._on_file_job_finished(j, operation),
+            al_progresar=self._on_file_job_progress)
+    
+    def _on_file_job_progress(self, job):
+        if hasattr(self.app, 'label_estado'):
+            self.app.label_estado.config(text=job.resumen())
+    
+    def _on_file_job_finished(self, job, operation):
+        """Hilo de Tk: solo se tocan las filas que cambiaron"""
+        self.apply_tree_patches(job.parches)
+        print(f'[FileExplorer] {job.resumen()}')
+        
+        if job.errores:
+            detalle = "\n".join(f"{os.path.basename(path)}: {error}" for path, error in job.errores[:5])
+            messagebox.showerror("Error", f"No se pudo completar la operación:\n{detalle}")
+        
+        # Lo que alcanzó a cambiar se notifica aunque se haya cancelado
+        self._notify_file_change(operation, job.delta())
+    
+    def _notify_file_change(self, operation, changes):
+        """Pasa el mismo delta que parcheó el árbol a los resultados y al índice"""
+        if self.on_file_change_callback and not vacio(changes):
+            self.on_file_change_callback(operation, changes)
+    
+    def cancel_file_operations(self):
+        """Cancela las operaciones en curso (Esc)"""
+        cancelled = self.file_queue.cancelar()
+        if cancelled and hasattr(self.app, 'label_estado'):
+            self.app.label_estado.config(text=f"Cancelando {cancelled} operación(es)...")
+    
     # ==================== DRAG & DROP METHODS ====================
     
     def _on_drag_motion(self, event):
@@ -1077,7 +1302,8 @@ class FileExplorerManager:
                 
                 # Validar carpeta v├ílida
                 if dest_path and os.path.isdir(dest_path):
-                    # Mover cada item v├ílido
+                    # Mover cada item v├ílido (en una sola operación)
+                    valid_paths = []
                     for source_path in self._drag_state['source_paths']:
                         source_dir = os.path.dirname(source_path)
                         
@@ -1090,8 +1316,11 @@ class FileExplorerManager:
                             print(f'[FileExplorer] Saltando subcarpeta: {source_path}')
                             continue
                         
-                        # Drop v├ílido: ejecutar movimiento
-                        self._drag_paste(source_path, dest_path)
+                        valid_paths.append(source_path)
+                    
+                    # Drop v├ílido: ejecutar movimiento
+                    if valid_paths:
+                        self._drag_paste(valid_paths, dest_path)
                 else:
                     print('[FileExplorer] Drop rechazado: destino no es carpeta v├ílida')
         
@@ -1105,42 +1334,11 @@ class FileExplorerManager:
                 'start_y': 0
             }
     
-    def _drag_paste(self, source_path, dest_path):
-        """Ejecuta paste durante drag & drop (siempre mueve)"""
-        import shutil
-        
-        try:
-            item_name = os.path.basename(source_path)
-            new_path = os.path.join(dest_path, item_name)
-            
-            # Auto-renombrar si existe
-            if os.path.exists(new_path):
-                base, ext = os.path.splitext(item_name)
-                counter = 1
-                while os.path.exists(new_path):
-                    if ext:
-                        new_name = f"{base}_{counter}{ext}"
-                    else:
-                        new_name = f"{item_name}_{counter}"
-                    new_path = os.path.join(dest_path, new_name)
-                    counter += 1
-                print(f'[FileExplorer] Auto-renombrado a: {os.path.basename(new_path)}')
-            
-            # Drag & Drop siempre mueve
-            shutil.move(source_path, new_path)
-            print(f'[FileExplorer] Movido (drag): {source_path} -> {new_path}')
-            
-            # Actualizar UI en background (no bloquear)
-            self.ui.tree.after(100, self.refresh_tree)
-            
-        except PermissionError:
-            messagebox.showerror("Error", "Sin permisos para mover")
-        except OSError as e:
-            messagebox.showerror("Error", f"Error moviendo:\\n{str(e)}")
-        except Exception as e:
-            messagebox.showerror("Error", f"Error inesperado:\\n{str(e)}")
-            import traceback
-            traceback.print_exc()
+    def _drag_paste(self, source_paths, dest_path):
+        """Ejecuta paste durante drag & drop (siempre mueve, auto-renombra si existe)"""
+        job = FileJob('mover', source_paths, dest_path, CONFLICTO_RENOMBRAR)
+        self._start_file_job(job, 'move')
+        print(f'[FileExplorer] Moviendo (drag): {len(source_paths)} items -> {dest_path}')
     
     def _show_drop_indicator(self, target_item):
         """Muestra l├¡nea gu├¡a azul en item destino"""
@@ -1,22 +1,24 @@
 # src/file_monitor.py
-import os
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
 
+from .file_change_batcher import FileChangeBatcher
+
 class FileMonitor:
     """Monitorea cambios en el sistema de archivos"""
-    
+
     def __init__(self, explorer_manager):
         self.explorer_manager = explorer_manager
         self.observer = None
         self.event_handler = None
-    
+        self.batcher = FileChangeBatcher(explorer_manager)
+
     def start(self, path):
         """Inicia el monitoreo de un directorio"""
         self.stop()
-        
+
         try:
-            self.event_handler = FileChangeHandler(self.explorer_manager)
+            self.event_handler = FileChangeHandler(self.batcher)
             self.observer = Observer()
             self.observer.schedule(self.event_handler, path, recursive=False)
             self.observer.start()
@@ -24,7 +26,7 @@ class FileMonitor:
         except Exception as e:
             print(f"[ERROR] No se pudo iniciar monitoreo: {e}")
             # El explorador funcionará sin monitoreo automático
-    
+
     def stop(self):
         """Detiene el monitoreo"""
         if self.observer and self.observer.is_alive():
@@ -32,29 +34,30 @@ class FileMonitor:
             self.observer.join(timeout=1)
             self.observer = None
             print("[DEBUG] Monitoreo detenido")
+        self.batcher.descartar()
+
+    def get_stats(self):
+        return self.batcher.get_stats()
 
 class FileChangeHandler(FileSystemEventHandler):
-    """Maneja eventos de cambios en archivos"""
-    
-    def __init__(self, explorer_manager):
-        self.explorer_manager = explorer_manager
-    
+    """Maneja eventos de cambios en archivos (hilo de watchdog: no toca Tk)"""
+
+    def __init__(self, batcher):
+        self.batcher = batcher
+
     def on_created(self, event):
         """Archivo o carpeta creado"""
-        print(f"[DEBUG] Creado: {event.src_path}")
-        self.explorer_manager.refresh_current_node()
-    
+        self.batcher.creado(event.src_path)
+
     def on_deleted(self, event):
         """Archivo o carpeta eliminado"""
-        print(f"[DEBUG] Eliminado: {event.src_path}")
-        self.explorer_manager.refresh_current_node()
-    
+        self.batcher.eliminado(event.src_path)
+
     def on_modified(self, event):
-        """Archivo o carpeta modificado"""
+        """Archivo modificado (las carpetas avisan de lo suyo con creado/eliminado/movido)"""
         if not event.is_directory:
-            print(f"[DEBUG] Modificado: {event.src_path}")
-    
+            self.batcher.modificado(event.src_path)
+
     def on_moved(self, event):
         """Archivo o carpeta movido/renombrado"""
-        print(f"[DEBUG] Movido: {event.src_path} -> {event.dest_path}")
-        self.explorer_manager.refresh_current_node()
\ No newline at end of file
+        self.batcher.movido(event.src_path, event.dest_path)
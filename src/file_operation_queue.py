@@ -0,0 +1,461 @@
+# src/file_operation_queue.py - Cola de copiar/mover/eliminar en segundo plano con progreso
+import itertools
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .copy_engine import CopiaCancelada, CopyEngine, copiar_archivo
+from .directory_stats import formatear_tamaño
+from .file_delta import delta
+
+# Políticas de conflicto (se deciden antes de encolar)
+CONFLICTO_RENOMBRAR = 'renombrar'
+CONFLICTO_REEMPLAZAR = 'reemplazar'
+CONFLICTO_OMITIR = 'omitir'
+
+INTERVALO_PROGRESO = 0.1  # segundos entre avisos de progreso
+
+_ids = itertools.count(1)
+
+
+class OperacionCancelada(Exception):
+    pass
+
+
+def nombre_libre(carpeta, nombre):
+    """Ruta en `carpeta` para `nombre`, con sufijo _N si ya existe (mismo criterio que el explorador)"""
+    ruta = os.path.join(carpeta, nombre)
+    base, ext = os.path.splitext(nombre)
+    contador = 1
+    while os.path.exists(ruta):
+        nuevo = f"{base}_{contador}{ext}" if ext else f"{nombre}_{contador}"
+        ruta = os.path.join(carpeta, nuevo)
+        contador += 1
+    return ruta
+
+
+class FileJob:
+    """Una operación de la cola: origen(es), destino, política y progreso
+
+    Al terminar deja en `creados`, `eliminados` y `movidos` las rutas de
+    primer nivel que cambiaron (también si se canceló a medias), en
+    `parches` los mismos cambios en el formato de
+    FileExplorerManager.apply_tree_patches y en `delta()` para las demás vistas.
+    """
+
+    VERBOS = {'copiar': "Copiando", 'mover': "Moviendo", 'eliminar': "Eliminando"}
+    PARTICIPIOS = {'copiar': "Copiado", 'mover': "Movido", 'eliminar': "Eliminado"}
+
+    def __init__(self, tipo, origenes, destino=None, conflicto=CONFLICTO_RENOMBRAR, permanente=False):
+        self.id = next(_ids)
+        self.tipo = tipo
+        self.origenes = list(origenes)
+        self.destino = destino
+        self.conflicto = conflicto
+        self.permanente = permanente
+
+        self.estado = 'en_cola'  # en_cola | calculando | en_curso | completado | cancelado | error
+        self.bytes_total = 0
+        self.bytes_hechos = 0
+        self.archivos_total = 0
+        self.archivos_hechos = 0
+        self.inicio = None
+        self.fin = None
+        self.errores = []
+        self._cancelar = threading.Event()
+        self._progreso_lock = threading.Lock()
+        self._ultimo_aviso = 0.0
+
+        self.creados = []
+        self.eliminados = []
+        self.movidos = []  # [(origen, destino)]
+        self.parches = []
+
+    def delta(self):
+        return delta(self.creados, self.eliminados, self.movidos)
+
+    # Progreso
+
+    def cancelar(self):
+        self._cancelar.set()
+
+    @property
+    def cancelado(self):
+        return self._cancelar.is_set()
+
+    def comprobar(self):
+        if self._cancelar.is_set():
+            raise OperacionCancelada()
+
+    def avanzar(self, bytes_copiados=0, archivos=0):
+        """Suma progreso; lo llaman varios hilos de copia a la vez"""
+        with self._progreso_lock:
+            self.bytes_hechos += bytes_copiados
+            self.archivos_hechos += archivos
+
+    def transcurrido(self):
+        if not self.inicio:
+            return 0.0
+        return (self.fin or time.perf_counter()) - self.inicio
+
+    def velocidad(self):
+        """Bytes por segundo desde el inicio"""
+        segundos = self.transcurrido()
+        return self.bytes_hechos / segundos if segundos > 0 else 0.0
+
+    def eta(self):
+        """Segundos restantes estimados, o None si aún no se puede estimar"""
+        velocidad = self.velocidad()
+        if velocidad <= 0 or not self.bytes_total:
+            return None
+        return max(0.0, (self.bytes_total - self.bytes_hechos) / velocidad)
+
+    def resumen(self):
+        verbo = self.VERBOS.get(self.tipo, self.tipo)
+        participio = self.PARTICIPIOS.get(self.tipo, self.tipo)
+        # Eliminar cuenta elementos de primer nivel, no archivos
+        unidad = "elementos" if self.tipo == 'eliminar' else "archivos"
+        if self.estado == 'calculando':
+            return f"{verbo}: calculando tamaño..."
+        if self.estado == 'completado':
+            tamaño = f", {formatear_tamaño(self.bytes_hechos)}" if self.bytes_hechos else ""
+            return f"✅ {participio}: {self.archivos_hechos} {unidad}{tamaño} en {self.transcurrido():.1f}s"
+        if self.estado == 'cancelado':
+            return f"⏹ Operación cancelada ({self.archivos_hechos} de {self.archivos_total} {unidad})"
+        if self.estado == 'error':
+            return f"⚠ {participio} con {len(self.errores)} error(es)"
+
+        partes = [f"{verbo} {self.archivos_hechos}/{self.archivos_total} {unidad}"]
+        if self.bytes_total:
+            partes.append(f"{formatear_tamaño(self.bytes_hechos)} de {formatear_tamaño(self.bytes_total)}")
+            partes.append(f"{formatear_tamaño(self.velocidad())}/s")
+            eta = self.eta()
+            if eta is not None:
+                partes.append(f"{eta:.0f}s restantes")
+        return " · ".join(partes)
+
+
+class FileOperationQueue:
+    """Ejecuta copiar/mover/eliminar en hilos de trabajo
+
+    El hilo de Tk solo encola (con la política de conflictos ya elegida) y
+    recibe avisos de progreso combinados por cuadro a través del
+    ui_dispatcher; `al_terminar(job)` se llama en el hilo de Tk.
+    """
+
+    def __init__(self, app, max_workers=2, hilos_copia=8):
+        self.app = app
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="archivos")
+        self.copy_engine = CopyEngine(max_workers=hilos_copia)
+        self._lock = threading.Lock()
+        self._activos = {}  # {id: job}
+        self.stats = {'completados': 0, 'cancelados': 0, 'con_error': 0, 'bytes': 0, 'archivos': 0}
+
+    def encolar(self, job, al_terminar=None, al_progresar=None):
+        with self._lock:
+            self._activos[job.id] = job
+        self._executor.submit(self._ejecutar, job, al_terminar, al_progresar)
+        return job
+
+    def cancelar(self, job_id=None):
+        """Cancela una operación (o todas); lo ya copiado se conserva"""
+        with self._lock:
+            jobs = [self._activos[job_id]] if job_id in self._activos else (
+                list(self._activos.values()) if job_id is None else [])
+        for job in jobs:
+            job.cancelar()
+        return len(jobs)
+
+    def activos(self):
+        with self._lock:
+            return list(self._activos.values())
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats['activos'] = len(self._activos)
+        return stats
+
+    # Hilo de trabajo
+
+    def _ejecutar(self, job, al_terminar, al_progresar):
+        job.inicio = time.perf_counter()
+        try:
+            job.estado = 'calculando'
+            self._avisar(job, al_progresar, forzar=True)
+            self._medir(job)
+            job.estado = 'en_curso'
+            for origen in job.origenes:
+                job.comprobar()
+                try:
+                    getattr(self, f"_{job.tipo}")(job, origen, al_progresar)
+                except OperacionCancelada:
+                    raise
+                except OSError as e:
+                    job.errores.append((origen, str(e)))
+                    print(f"[ARCHIVOS] Error en {job.tipo} {origen}: {e}")
+            job.estado = 'error' if job.errores else 'completado'
+        except OperacionCancelada:
+            job.estado = 'cancelado'
+        except Exception as e:
+            job.errores.append(("", str(e)))
+            job.estado = 'error'
+            print(f"[ARCHIVOS] Error inesperado: {e}")
+        finally:
+            job.fin = time.perf_counter()
+            job.parches = self._armar_parches(job)
+            with self._lock:
+                self._activos.pop(job.id, None)
+                clave = {'completado': 'completados', 'cancelado': 'cancelados'}.get(job.estado, 'con_error')
+                self.stats[clave] += 1
+                self.stats['bytes'] += job.bytes_hechos
+                self.stats['archivos'] += job.archivos_hechos
+            self.app.ui_dispatcher.publicar(self._terminar, job, al_terminar, al_progresar)
+
+    def _terminar(self, job, al_terminar, al_progresar):
+        if al_progresar:
+            al_progresar(job)
+        if al_terminar:
+            al_terminar(job)
+
+    def _avisar(self, job, al_progresar, forzar=False):
+        if not al_progresar:
+            return
+        ahora = time.perf_counter()
+        if forzar or ahora - job._ultimo_aviso >= INTERVALO_PROGRESO:
+            job._ultimo_aviso = ahora
+            self.app.ui_dispatcher.publicar_ultimo(('operacion', job.id), al_progresar, job)
+
+    def _medir(self, job):
+        """Totales de archivos y bytes para el progreso (mover en el mismo disco no copia nada)"""
+        if job.tipo == 'eliminar':
+            # Se elimina cada elemento de una vez (send2trash/rmtree): no hace falta recorrerlo
+            job.archivos_total = len(job.origenes)
+            return
+        for origen in job.origenes:
+            job.comprobar()
+            if job.tipo == 'mover' and self._mismo_disco(origen, job.destino):
+                job.archivos_total += 1
+                continue
+            if os.path.isdir(origen) and not os.path.islink(origen):
+                pendientes = [origen]
+                while pendientes:
+                    job.comprobar()
+                    try:
+                        with os.scandir(pendientes.pop()) as entradas:
+                            for entrada in entradas:
+                                try:
+                                    if entrada.is_dir(follow_symlinks=False):
+                                        pendientes.append(entrada.path)
+                                    else:
+                                        job.archivos_total += 1
+                                        job.bytes_total += entrada.stat().st_size
+                                except OSError:
+                                    continue
+                    except OSError:
+                        continue
+            else:
+                try:
+                    job.bytes_total += os.path.getsize(origen)
+                except OSError:
+                    pass
+                job.archivos_total += 1
+
+    @staticmethod
+    def _mismo_disco(origen, destino):
+        try:
+            return os.stat(origen).st_dev == os.stat(destino).st_dev
+        except OSError:
+            return False
+
+    def _resolver_destino(self, job, origen):
+        """(ruta final, True si reemplaza una existente) según la política de conflictos; (None, False) si se omite
+
+        Lo existente no se toca aquí: se reemplaza recién cuando lo nuevo
+        está completo (`_reemplazar`).
+        """
+        nombre = os.path.basename(origen.rstrip(os.sep)) or origen
+        ruta = os.path.join(job.destino, nombre)
+        if not os.path.exists(ruta):
+            return ruta, False
+        if os.path.normcase(os.path.normpath(ruta)) == os.path.normcase(os.path.normpath(origen)):
+            # Pegar en su propia carpeta: copiar hace un duplicado, mover no hace nada
+            return (nombre_libre(job.destino, nombre), False) if job.tipo == 'copiar' else (None, False)
+        if job.conflicto == CONFLICTO_OMITIR:
+            return None, False
+        if job.conflicto == CONFLICTO_REEMPLAZAR:
+            return ruta, True
+        return nombre_libre(job.destino, nombre), False
+
+    @staticmethod
+    def _temporal(ruta):
+        """Ruta hermana libre donde se escribe lo que va a reemplazar a `ruta`"""
+        return nombre_libre(os.path.dirname(ruta), f"~{os.path.basename(ruta)}.tmp")
+
+    @staticmethod
+    def _borrar(ruta):
+        try:
+            if os.path.isdir(ruta) and not os.path.islink(ruta):
+                shutil.rmtree(ruta)
+            elif os.path.lexists(ruta):
+                os.remove(ruta)
+        except OSError as e:
+            print(f"[ARCHIVOS] No se pudo borrar {ruta}: {e}")
+
+    def _reemplazar(self, job, nuevo, ruta):
+        """Pone `nuevo` (ya completo) en lugar de `ruta` y recién entonces borra lo anterior"""
+        if not (os.path.isdir(ruta) or os.path.isdir(nuevo)):
+            os.replace(nuevo, ruta)
+        else:
+            # Una carpeta no se reemplaza de una vez: lo anterior se aparta mientras se intercambia
+            apartado = nombre_libre(os.path.dirname(ruta), f"~{os.path.basename(ruta)}.anterior")
+            os.rename(ruta, apartado)
+            try:
+                os.rename(nuevo, ruta)
+            except OSError:
+                os.rename(apartado, ruta)
+                raise
+            self._borrar(apartado)
+        job.eliminados.append(ruta)
+
+    # Operaciones
+
+    def _copiar(self, job, origen, al_progresar):
+        destino, reemplazar = self._resolver_destino(job, origen)
+        if destino is None:
+            return
+        if not reemplazar:
+            if os.path.isdir(origen):
+                os.makedirs(destino, exist_ok=True)
+                job.creados.append(destino)  # Aunque se cancele, la carpeta ya existe
+                self._copiar_arbol(job, origen, destino, al_progresar)
+            else:
+                self._copiar_archivo(job, origen, destino, al_progresar)
+                job.creados.append(destino)
+            return
+
+        temporal = self._copiar_al_lado(job, origen, destino, al_progresar)
+        if temporal:
+            self._reemplazar(job, temporal, destino)
+            job.creados.append(destino)
+
+    def _copiar_al_lado(self, job, origen, destino, al_progresar):
+        """Copia `origen` a una ruta hermana de `destino`; None (y nada queda) si falla algo o se cancela
+
+        Así "reemplazar" no pierde lo existente si la copia no termina.
+        """
+        temporal = self._temporal(destino)
+        try:
+            if os.path.isdir(origen):
+                os.makedirs(temporal)
+                completo = self._copiar_arbol(job, origen, temporal, al_progresar)
+            else:
+                self._copiar_archivo(job, origen, temporal, al_progresar)
+                completo = True
+        except BaseException:
+            self._borrar(temporal)
+            raise
+        if not completo:
+            self._borrar(temporal)
+            return None
+        return temporal
+
+    def _copiar_arbol(self, job, origen, destino, al_progresar):
+        """Copia la carpeta con el CopyEngine (varios archivos a la vez); los errores por archivo van a job.errores"""
+        def avanzar(n):
+            job.avanzar(bytes_copiados=n)
+            self._avisar(job, al_progresar)
+
+        def archivo_listo():
+            job.avanzar(archivos=1)
+            self._avisar(job, al_progresar)
+
+        errores = []
+        try:
+            self.copy_engine.copiar_arbol(origen, destino, avanzar, archivo_listo,
+                                          lambda: job.cancelado, errores)
+        except CopiaCancelada:
+            raise OperacionCancelada()
+        finally:
+            job.errores.extend(errores)
+        return not errores
+
+    def _copiar_archivo(self, job, origen, destino, al_progresar):
+        def avanzar(n):
+            job.avanzar(bytes_copiados=n)
+            self._avisar(job, al_progresar)
+
+        try:
+            copiar_archivo(origen, destino, avanzar, lambda: job.cancelado)
+        except CopiaCancelada:
+            raise OperacionCancelada()
+        job.avanzar(archivos=1)
+        self._avisar(job, al_progresar)
+
+    def _mover(self, job, origen, al_progresar):
+        destino, reemplazar = self._resolver_destino(job, origen)
+        if destino is None:
+            return
+        if self._mismo_disco(origen, job.destino):
+            if reemplazar:
+                self._reemplazar(job, origen, destino)
+            else:
+                os.rename(origen, destino)
+            job.avanzar(archivos=1)
+            self._avisar(job, al_progresar)
+        elif reemplazar:
+            # Otro disco y reemplazar: se intercambia lo copiado y recién entonces se borra el origen
+            temporal = self._copiar_al_lado(job, origen, destino, al_progresar)
+            if not temporal:
+                return  # Algo no se copió: el origen y lo existente se conservan
+            self._reemplazar(job, temporal, destino)
+            if os.path.isdir(origen) and not os.path.islink(origen):
+                shutil.rmtree(origen)
+            else:
+                os.remove(origen)
+        else:
+            # Otro disco o recurso de red: copiar y después borrar el origen
+            if os.path.isdir(origen):
+                # Aunque se cancele o falle, la copia parcial ya existe y debe verse
+                job.creados.append(destino)
+                if not self._copiar_arbol(job, origen, destino, al_progresar):
+                    # Algo no se copió: el origen se conserva completo
+                    return
+                job.creados.remove(destino)
+                shutil.rmtree(origen)
+            else:
+                self._copiar_archivo(job, origen, destino, al_progresar)
+                os.remove(origen)
+        job.movidos.append((origen, destino))
+
+    def _eliminar(self, job, origen, al_progresar):
+        if not job.permanente:
+            import send2trash
+            send2trash.send2trash(origen)
+        elif os.path.isdir(origen) and not os.path.islink(origen):
+            shutil.rmtree(origen)
+        else:
+            os.remove(origen)
+        job.avanzar(archivos=1)
+        job.eliminados.append(origen)
+        self._avisar(job, al_progresar)
+
+    # Resultado
+
+    @staticmethod
+    def _armar_parches(job):
+        """Cambios de primer nivel en el formato de apply_tree_patches (con stat aquí, no en Tk)"""
+        parches = [('delete', ruta) for ruta in job.eliminados]
+        for origen, destino in job.movidos:
+            try:
+                parches.append(('rename', origen, destino, os.path.isdir(destino), os.stat(destino).st_mtime))
+            except OSError:
+                parches.append(('delete', origen))
+        for ruta in job.creados:
+            try:
+                parches.append(('insert', ruta, os.path.isdir(ruta), os.stat(ruta).st_mtime))
+            except OSError:
+                continue
+        return parches
@@ -5,36 +5,35 @@ import subprocess
 from datetime import datetime
 from tkinter import messagebox
 
+from .file_operation_queue import FileJob
+from .listing_cache import listar_directorio
+
 class FileOperations:
     """Maneja operaciones con archivos y directorios"""
     
     def __init__(self, explorer_manager):
         self.explorer_manager = explorer_manager
     
-    def get_directory_contents(self, directory_path):
-        """Obtiene el contenido de un directorio ordenado"""
+    def _listar(self, directory_path):
+        """Listado desde el cache compartido (si la app lo tiene) o del disco"""
+        app = self.explorer_manager.app
+        prefetcher = getattr(app, 'directory_prefetcher', None)
+        if prefetcher:
+            return prefetcher.listar(directory_path)
+        return listar_directorio(directory_path)
+    
+    @staticmethod
+    def format_date(mtime):
+        """Fecha de modificación para la columna Fecha"""
         try:
-            items = []
-            for entry in os.scandir(directory_path):
-                try:
-                    nombre = entry.name
-                    es_dir = entry.is_dir()
-                    
-                    try:
-                        fecha_mod = datetime.fromtimestamp(
-                            entry.stat().st_mtime
-                        ).strftime("%d/%m/%Y %H:%M")
-                    except:
-                        fecha_mod = "N/A"
-                    
-                    full_path = entry.path
-                    items.append((nombre, es_dir, fecha_mod, full_path))
-                    
-                except PermissionError:
-                    continue
-                except Exception as e:
-                    print(f"Error procesando {entry.name}: {e}")
-                    continue
+            return datetime.fromtimestamp(mtime).strftime("%d/%m/%Y %H:%M")
+        except Exception:
+            return "N/A"
+    
+    def get_directory_entries(self, directory_path):
+        """[(nombre, es_dir, mtime, ruta)] ordenado, sin formatear fechas (apto para hilos de trabajo)"""
+        try:
+            items = list(self._listar(directory_path))
             
             # Ordenar: carpetas primero, luego archivos, alfabéticamente
             items.sort(key=lambda x: (not x[1], x[0].lower()))
@@ -47,8 +46,20 @@ class FileOperations:
             print(f"Error listando directorio: {e}")
             return None
     
+    def get_directory_contents(self, directory_path):
+        """Obtiene el contenido de un directorio ordenado"""
+        items = self.get_directory_entries(directory_path)
+        if items is None:
+            return None
+        return [(nombre, es_dir, self.format_date(mtime), full_path)
+                for nombre, es_dir, mtime, full_path in items]
+    
     def has_subdirectories(self, directory_path):
         """Verifica si un directorio tiene subdirectorios"""
+        cache = getattr(self.explorer_manager.app, 'listing_cache', None)
+        listado = cache.obtener(directory_path) if cache else None
+        if listado is not None:
+            return any(es_dir for _, es_dir, _, _ in listado)
         try:
             for entry in os.scandir(directory_path):
                 if entry.is_dir():
@@ -122,61 +133,34 @@ class FileOperations:
             )
     
     def delete_item(self, path):
-        """Elimina un archivo o carpeta (intenta usar papelera)"""
-        try:
-            # Verificar permisos
-            if not os.access(path, os.W_OK):
-                messagebox.showerror(
-                    "Error de permisos",
-                    "No tiene permisos para eliminar este elemento"
-                )
-                return False
-            
-            # Intentar usar papelera de reciclaje primero (más seguro)
-            try:
-                import send2trash
-                send2trash.send2trash(path)
-                print(f"[DEBUG] Enviado a papelera: {path}")
-                return True
-            except ImportError:
-                # Si send2trash no está instalado, eliminar permanentemente
-                print("[WARNING] send2trash no disponible, eliminación permanente")
-                response = messagebox.askyesno(
-                    "Eliminación permanente",
-                    "La biblioteca 'send2trash' no está instalada.\n\n"
-                    "El elemento será ELIMINADO PERMANENTEMENTE.\n\n"
-                    "¿Deseas continuar?",
-                    icon='warning'
-                )
-                
-                if not response:
-                    return False
-                
-                # Eliminar permanentemente
-                if os.path.isdir(path):
-                    import shutil
-                    shutil.rmtree(path)
-                else:
-                    os.remove(path)
-                
-                print(f"[DEBUG] Eliminado permanentemente: {path}")
-                return True
-                
-        except PermissionError:
+        """Prepara la eliminación de un archivo o carpeta (intenta usar papelera)
+
+        Permisos y papelera se deciden aquí, en el hilo de Tk; el borrado lo
+        hace la cola de operaciones. Devuelve el FileJob a encolar o None.
+        """
+        # Verificar permisos
+        if not os.access(path, os.W_OK):
             messagebox.showerror(
                 "Error de permisos",
                 "No tiene permisos para eliminar este elemento"
             )
-            return False
-        except OSError as e:
-            messagebox.showerror(
-                "Error al eliminar",
-                f"No se pudo eliminar el elemento:\n{str(e)}"
-            )
-            return False
-        except Exception as e:
-            messagebox.showerror(
-                "Error inesperado",
-                f"Error al eliminar:\n{str(e)}"
+            return None
+        
+        # Intentar usar papelera de reciclaje primero (más seguro)
+        try:
+            import send2trash
+            return FileJob('eliminar', [path])
+        except ImportError:
+            # Si send2trash no está instalado, eliminar permanentemente
+            print("[WARNING] send2trash no disponible, eliminación permanente")
+            response = messagebox.askyesno(
+                "Eliminación permanente",
+                "La biblioteca 'send2trash' no está instalada.\n\n"
+                "El elemento será ELIMINADO PERMANENTEMENTE.\n\n"
+                "¿Deseas continuar?",
+                icon='warning'
             )
-            return False
\ No newline at end of file
+            
+            if not response:
+                return None
+            return FileJob('eliminar', [path], permanente=True)
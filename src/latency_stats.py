@@ -0,0 +1,81 @@
+# src/latency_stats.py - Histogramas de latencia con cubetas fijas
+import threading
+import time
+from contextlib import contextmanager
+
+# Límites superiores de cada cubeta en milisegundos (la última es "más de")
+CUBETAS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class LatencyHistogram:
+    """Histograma de latencias en memoria fija y seguro entre hilos"""
+
+    def __init__(self, cubetas=CUBETAS_MS):
+        self.cubetas = tuple(cubetas)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._conteos = [0] * (len(self.cubetas) + 1)
+            self._total = 0
+            self._suma = 0.0
+            self._minimo = None
+            self._maximo = 0.0
+
+    def registrar(self, segundos):
+        ms = segundos * 1000
+        indice = len(self.cubetas)
+        for i, limite in enumerate(self.cubetas):
+            if ms <= limite:
+                indice = i
+                break
+
+        with self._lock:
+            self._conteos[indice] += 1
+            self._total += 1
+            self._suma += ms
+            self._minimo = ms if self._minimo is None else min(self._minimo, ms)
+            self._maximo = max(self._maximo, ms)
+
+    @contextmanager
+    def medir(self):
+        """with histograma.medir(): ... registra la duración del bloque"""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.registrar(time.perf_counter() - inicio)
+
+    def percentil(self, p):
+        """Límite de la cubeta que contiene el percentil p (0-100), en ms"""
+        with self._lock:
+            return self._percentil(p)
+
+    def _percentil(self, p):
+        if not self._total:
+            return 0.0
+        objetivo = self._total * p / 100
+        acumulado = 0
+        for i, conteo in enumerate(self._conteos):
+            acumulado += conteo
+            if acumulado >= objetivo:
+                # El límite de la cubeta nunca supera el máximo observado
+                return min(float(self.cubetas[i]), self._maximo) if i < len(self.cubetas) else self._maximo
+        return self._maximo
+
+    def resumen(self):
+        """Conteo, promedio, mínimo, máximo y percentiles (ms) más las cubetas"""
+        with self._lock:
+            etiquetas = [f"≤{limite}ms" for limite in self.cubetas] + [f">{self.cubetas[-1]}ms"]
+            return {
+                'conteo': self._total,
+                'promedio_ms': self._suma / self._total if self._total else 0.0,
+                'min_ms': self._minimo or 0.0,
+                'max_ms': self._maximo,
+                'p50_ms': self._percentil(50),
+                'p95_ms': self._percentil(95),
+                'p99_ms': self._percentil(99),
+                'cubetas': {etiqueta: conteo for etiqueta, conteo
+                            in zip(etiquetas, self._conteos) if conteo}
+            }
@@ -0,0 +1,146 @@
+# src/listing_cache.py - Cache LRU acotado de listados de carpetas validado por mtime
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+
+def listar_directorio(ruta, cancelado=None):
+    """[(nombre, es_dir, mtime, ruta_completa)] de la carpeta con un solo os.scandir
+
+    El mtime sale del DirEntry (sin stat extra en Windows). Si `cancelado()`
+    se vuelve verdadero durante el listado devuelve None.
+    """
+    entradas = []
+    with os.scandir(ruta) as iterador:
+        for i, entrada in enumerate(iterador):
+            if cancelado and i % 64 == 0 and cancelado():
+                return None
+            try:
+                es_dir = entrada.is_dir()
+            except OSError:
+                continue
+            try:
+                mtime = entrada.stat().st_mtime
+            except OSError:
+                mtime = None
+            entradas.append((entrada.name, es_dir, mtime, entrada.path))
+    return entradas
+
+
+def tamaño_aproximado(valor):
+    """Bytes aproximados de listas/dicts/tuplas de valores simples (sin compartir referencias)"""
+    tamaño = sys.getsizeof(valor)
+    if isinstance(valor, dict):
+        for clave, contenido in valor.items():
+            tamaño += tamaño_aproximado(clave) + tamaño_aproximado(contenido)
+    elif isinstance(valor, (list, tuple, set)):
+        for contenido in valor:
+            tamaño += tamaño_aproximado(contenido)
+    return tamaño
+
+
+class ListingCache:
+    """Listados de carpetas con límite de memoria y desalojo LRU
+
+    Los listados son los de listar_directorio; cada vista arma sus filas a
+    partir de ellos, así que un listado sirve a todos los árboles. Cada
+    entrada guarda el mtime de la carpeta tomado antes de listarla. Al
+    reutilizarla se hace un solo stat: si el mtime cambió (se creó, borró o
+    renombró algo dentro) la entrada se descarta y hay que listar de nuevo.
+    """
+
+    def __init__(self, max_bytes=16 * 1024 * 1024, max_entradas=2000):
+        self.max_bytes = max_bytes
+        self.max_entradas = max_entradas
+        self._entradas = OrderedDict()  # {ruta: (mtime, datos, bytes)}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.stats = {'aciertos': 0, 'fallos': 0, 'invalidadas': 0, 'desalojadas': 0}
+
+    @staticmethod
+    def mtime(ruta):
+        """mtime actual de la carpeta, o None si no se puede leer"""
+        try:
+            return os.stat(ruta).st_mtime
+        except OSError:
+            return None
+
+    def obtener(self, ruta):
+        """Listado vigente de `ruta` o None (ausente o la carpeta cambió)"""
+        with self._lock:
+            entrada = self._entradas.get(ruta)
+        if entrada is None:
+            self.stats['fallos'] += 1
+            return None
+
+        # El stat se hace fuera del lock: puede tardar en unidades de red
+        if self.mtime(ruta) != entrada[0]:
+            with self._lock:
+                if self._entradas.get(ruta) is entrada:
+                    self._quitar(ruta)
+                self.stats['invalidadas'] += 1
+                self.stats['fallos'] += 1
+            return None
+
+        with self._lock:
+            if ruta in self._entradas:
+                self._entradas.move_to_end(ruta)
+            self.stats['aciertos'] += 1
+        return entrada[1]
+
+    def guardar(self, ruta, datos, mtime):
+        """Guarda el listado; `mtime` debe tomarse antes de listar la carpeta"""
+        if mtime is None:
+            return
+        tamaño = tamaño_aproximado(datos) + tamaño_aproximado(ruta)
+        if tamaño > self.max_bytes:
+            return
+        with self._lock:
+            if ruta in self._entradas:
+                self._quitar(ruta)
+            self._entradas[ruta] = (mtime, datos, tamaño)
+            self._bytes += tamaño
+            while self._entradas and (self._bytes > self.max_bytes or len(self._entradas) > self.max_entradas):
+                self._quitar(next(iter(self._entradas)))
+                self.stats['desalojadas'] += 1
+
+    def listar(self, ruta):
+        """Listado de `ruta` desde el cache o del disco (lo guarda); OSError si no se puede leer"""
+        listado = self.obtener(ruta)
+        if listado is None:
+            mtime = self.mtime(ruta)
+            listado = listar_directorio(ruta)
+            self.guardar(ruta, listado, mtime)
+        return listado
+
+    def contiene(self, ruta):
+        """Hay entrada para `ruta` (sin validar ni tocar el orden LRU)"""
+        with self._lock:
+            return ruta in self._entradas
+
+    def _quitar(self, ruta):
+        """Requiere el lock tomado"""
+        _, _, tamaño = self._entradas.pop(ruta)
+        self._bytes -= tamaño
+
+    def invalidar(self, ruta):
+        with self._lock:
+            if ruta in self._entradas:
+                self._quitar(ruta)
+
+    def clear(self):
+        with self._lock:
+            self._entradas.clear()
+            self._bytes = 0
+
+    def __len__(self):
+        return len(self._entradas)
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats['entradas'] = len(self._entradas)
+            stats['bytes'] = self._bytes
+            stats['max_bytes'] = self.max_bytes
+        return stats
@@ -0,0 +1,121 @@
+# src/location_overlap.py - Detección de ubicaciones anidadas o duplicadas
+import os
+
+
+def canonical_path(path):
+    """Ruta canónica para comparar ubicaciones (real, normalizada y sin mayúsculas en Windows)"""
+    try:
+        return os.path.normcase(os.path.realpath(os.path.normpath(path)))
+    except (OSError, ValueError):
+        return os.path.normcase(os.path.normpath(path))
+
+
+def relacion_rutas(canon_a, canon_b):
+    """Relación entre dos rutas canónicas: 'igual', 'dentro' (a dentro de b), 'contiene' o None"""
+    if canon_a == canon_b:
+        return 'igual'
+    if canon_a.startswith(canon_b.rstrip(os.sep) + os.sep):
+        return 'dentro'
+    if canon_b.startswith(canon_a.rstrip(os.sep) + os.sep):
+        return 'contiene'
+    return None
+
+
+class ScanRoot:
+    """Subárbol que se indexa y recorre una sola vez"""
+
+    def __init__(self, location, canonical):
+        self.location = location
+        self.canonical = canonical
+        # [(prefijo_relativo_normalizado, location)] ordenado del más profundo al menos
+        self.nested = []
+
+    def owner_for(self, ruta_rel):
+        """Ubicación más específica que contiene ruta_rel y la ruta relativa a ella"""
+        if self.nested:
+            ruta_norm = os.path.normcase(ruta_rel)
+            for prefijo, location in self.nested:
+                if not prefijo:
+                    continue
+                if ruta_norm.startswith(prefijo + os.sep):
+                    return location, ruta_rel[len(prefijo) + 1:]
+        return self.location, ruta_rel
+
+    def result_key(self, ruta_rel):
+        """Clave canónica de un resultado sin llamar a realpath por resultado"""
+        return self.canonical + os.sep + os.path.normcase(os.path.normpath(ruta_rel))
+
+
+class LocationOverlapPlan:
+    """Agrupa ubicaciones anidadas o duplicadas bajo una sola raíz de escaneo
+
+    Las rutas se resuelven con realpath una vez por ubicación; los resultados
+    se deduplican con result_key() a partir de la ruta relativa a la raíz.
+    """
+
+    def __init__(self, locations, path_of=None):
+        self.path_of = path_of or (lambda loc: loc['path'])
+        self.scan_roots = []
+        self._root_of = {}
+        self._build(locations)
+
+    def _build(self, locations):
+        entries = [(canonical_path(self.path_of(loc)), loc) for loc in locations]
+
+        # Rutas más cortas primero: los ancestros se registran antes que sus hijos
+        for canonical, location in sorted(entries, key=lambda e: len(e[0])):
+            root = self._find_root(canonical)
+            if root is None:
+                root = ScanRoot(location, canonical)
+                self.scan_roots.append(root)
+            else:
+                prefijo = canonical[len(root.canonical):].lstrip(os.sep)
+                root.nested.append((prefijo, location))
+            self._root_of[id(location)] = root
+
+        for root in self.scan_roots:
+            root.nested.sort(key=lambda n: len(n[0]), reverse=True)
+
+        # Mantener el orden configurado por el usuario
+        orden = {id(loc): i for i, loc in enumerate(locations)}
+        self.scan_roots.sort(key=lambda r: orden[id(r.location)])
+
+    def _find_root(self, canonical):
+        for root in self.scan_roots:
+            if relacion_rutas(canonical, root.canonical) in ('igual', 'dentro'):
+                return root
+        return None
+
+    def root_for(self, location):
+        """Raíz de escaneo que indexa la ubicación dada"""
+        return self._root_of.get(id(location))
+
+    def is_nested(self, location):
+        """True si la ubicación se comparte con otra raíz de escaneo"""
+        root = self.root_for(location)
+        return root is not None and root.location is not location
+
+    def iter_merged(self, root, resultados, vistos):
+        """Resultados de una raíz como (nombre, ruta_rel, ruta_abs, nombre_ubicacion), sin duplicados
+
+        Cada resultado se asigna a la ubicación más específica que lo contiene;
+        `vistos` acumula las claves canónicas entre raíces.
+        """
+        for result in resultados:
+            if not isinstance(result, tuple) or len(result) < 3:
+                continue
+            nombre, ruta_rel, ruta_abs = result[:3]
+            key = root.result_key(ruta_rel)
+            if key in vistos:
+                continue
+            vistos.add(key)
+            location, ruta_rel_owner = root.owner_for(ruta_rel)
+            yield (nombre, ruta_rel_owner, ruta_abs, location['name'])
+
+    def merge_results(self, results_por_raiz):
+        """Combina resultados [(root, [(nombre, ruta_rel, ruta_abs), ...])] sin duplicados"""
+        vistos = set()
+        combinados = []
+        for root, resultados in results_por_raiz:
+            combinados.extend(self.iter_merged(root, resultados, vistos))
+        return combinados
@@ -3,9 +3,12 @@ import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import os
 import json
-import threading
 from datetime import datetime
 
+from .location_overlap import LocationOverlapPlan, canonical_path, relacion_rutas
+from .cache_build_queue import (EN_COLA, CONSTRUYENDO, COMPLETADO, CANCELADO, ERROR,
+                                PRIORIDAD_ALTA, PRIORIDAD_NORMAL, formatear_eta)
+
 class LocationItem:
     """Representa una ubicación de búsqueda"""
     def __init__(self, path, name=None, enabled=True):
@@ -44,9 +47,12 @@ class LocationsConfigModal:
         self.config_file = "search_locations.json"
         
         # Variables de control
-        self.building_cache = False
         self.progress_var = tk.StringVar()
         self.progress_bar = None
+        self._row_for_path = {}
+        
+        # La construcción de caches vive en la app; el modal solo se suscribe
+        self.build_queue = getattr(app, 'cache_build_queue', None)
         
         self.load_locations()
     
@@ -59,6 +65,12 @@ class LocationsConfigModal:
         self._create_modal_window()
         self._create_modal_content()
         self._populate_tree()
+        
+        if self.build_queue:
+            self.build_queue.subscribe(self._on_build_update)
+            if self.build_queue.is_busy():
+                self._mostrar_progreso()
+                self._actualizar_progreso_global()
     
     def _create_modal_window(self):
         """Crea la ventana modal"""
@@ -117,7 +129,7 @@ class LocationsConfigModal:
         progress_frame = tk.Frame(main_frame, bg="#f6f5f5")
         progress_frame.pack(fill='x', pady=(10, 0))
         
-        self.progress_bar = ttk.Progressbar(progress_frame, mode='indeterminate')
+        self.progress_bar = ttk.Progressbar(progress_frame, mode='determinate', maximum=100)
         self.progress_bar.pack(fill='x', pady=(0, 5))
         
         progress_label = tk.Label(progress_frame, 
@@ -219,11 +231,19 @@ class LocationsConfigModal:
         # Limpiar árbol
         for item in self.tree.get_children():
             self.tree.delete(item)
+        self._row_for_path = {}
+        
+        plan = self._get_overlap_plan()
         
         # Agregar ubicaciones
         for i, location in enumerate(self.locations):
             status = "✅ Activa" if location.enabled else "⭕ Inactiva"
             cache_info = f"{location.cache_size:,}" if location.cache_size > 0 else "Sin cache"
+            
+            # Ubicaciones anidadas usan el índice de su raíz
+            if location.enabled and plan.is_nested(location):
+                status = "🔗 Anidada"
+                cache_info = f"En {plan.root_for(location).location.name}"
             last_scan = location.last_scanned or "Nunca"
             
             # Color según estado
@@ -232,10 +252,16 @@ class LocationsConfigModal:
                 tags = ('invalid',)
                 status = "❌ No existe"
             
-            self.tree.insert("", "end",
+            # Construcción en curso o en cola
+            job = self.build_queue.get_job(location.path) if self.build_queue else None
+            if job and job.estado in (EN_COLA, CONSTRUYENDO):
+                status = self._texto_estado_job(job)
+            
+            row_id = self.tree.insert("", "end",
                            text=location.name,
                            values=(location.path, status, cache_info, last_scan),
                            tags=tags)
+            self._row_for_path[location.path] = row_id
         
         # Configurar tags de colores
         self.tree.tag_configure('enabled', background='#f1f8e9')
@@ -250,12 +276,26 @@ class LocationsConfigModal:
         )
         
         if folder_path:
-            # Verificar si ya existe
+            # Verificar duplicados y anidamiento con rutas reales normalizadas
+            nueva_canonica = canonical_path(folder_path)
             for location in self.locations:
-                if os.path.normpath(location.path) == os.path.normpath(folder_path):
+                relacion = relacion_rutas(nueva_canonica, canonical_path(location.path))
+                
+                if relacion == 'igual':
                     messagebox.showwarning("Ubicación duplicada", 
-                                         f"La ubicación ya existe:\n{folder_path}")
+                                         f"La ubicación ya existe:\n{folder_path}\n\n"
+                                         f"(misma carpeta que '{location.name}')")
                     return
+                
+                if relacion:
+                    detalle = ("está dentro de" if relacion == 'dentro' else "contiene a")
+                    if not messagebox.askyesno("Ubicaciones superpuestas",
+                                             f"La carpeta seleccionada {detalle} '{location.name}':\n"
+                                             f"{location.path}\n\n"
+                                             "El subárbol común se indexará una sola vez y los "
+                                             "resultados no se duplicarán.\n\n¿Agregar de todos modos?"):
+                        return
+                    break
             
             # Crear nueva ubicación
             location = LocationItem(folder_path)
@@ -286,93 +326,122 @@ class LocationsConfigModal:
     
     def _build_all_caches(self):
         """Construye cache para todas las ubicaciones"""
-        if self.building_cache:
-            messagebox.showinfo("Cache en construcción", "Ya se está construyendo un cache")
-            return
-        
         enabled_locations = [loc for loc in self.locations if loc.enabled and loc.is_valid]
         if not enabled_locations:
             messagebox.showinfo("Sin ubicaciones", "No hay ubicaciones activas para construir cache")
             return
         
+        # Solo se construyen las raíces; las ubicaciones anidadas comparten su índice
+        roots = self._get_build_roots(enabled_locations)
+        compartidas = len(enabled_locations) - len(roots)
+        detalle = f"\n({compartidas} anidadas comparten índice)" if compartidas else ""
+        
         if messagebox.askyesno("Construir Caches",
-                             f"¿Construir cache para {len(enabled_locations)} ubicaciones?\n\n"
+                             f"¿Construir cache para {len(roots)} ubicaciones?{detalle}\n\n"
                              "Esto puede tomar varios minutos."):
-            self._start_batch_cache_build(enabled_locations)
+            self._start_batch_cache_build(roots)
     
-    def _start_batch_cache_build(self, locations):
-        """Inicia construcción de cache en batch"""
-        self.building_cache = True
-        self.progress_frame.pack(fill='x', pady=(10, 0))
-        self.progress_bar.start()
-        self.progress_var.set("Preparando construcción de caches...")
+    def _get_overlap_plan(self):
+        """Plan de solapamiento entre ubicaciones activas"""
+        enabled_locations = [loc for loc in self.locations if loc.enabled and loc.is_valid]
+        return LocationOverlapPlan(enabled_locations, path_of=lambda loc: loc.path)
+    
+    def _get_build_roots(self, locations):
+        """Reemplaza ubicaciones anidadas por la raíz que las indexa (sin repetir)"""
+        plan = self._get_overlap_plan()
+        roots = []
+        for location in locations:
+            root = plan.root_for(location)
+            target = root.location if root else location
+            if target not in roots:
+                roots.append(target)
+        return roots
+    
+    def _start_batch_cache_build(self, locations, prioridad=PRIORIDAD_NORMAL):
+        """Encola la construcción de caches en el servicio de la app"""
+        if not self.build_queue:
+            messagebox.showerror("Error en Cache", "El servicio de construcción de caches no está disponible")
+            return
         
-        def build_worker():
-            try:
-                for i, location in enumerate(locations):
-                    self.modal.after(0, lambda: self.progress_var.set(
-                        f"Construyendo cache {i+1}/{len(locations)}: {location.name}"
-                    ))
-                    
-                    # Construir cache real usando el cache_manager de la app
-                    self._build_cache_sync(location)
-                    
-                self.modal.after(0, self._finish_batch_build)
-                
-            except Exception as e:
-                self.modal.after(0, lambda: self._handle_build_error(str(e)))
+        for location in locations:
+            self.build_queue.enqueue(location.path, location.name, prioridad)
         
-        threading.Thread(target=build_worker, daemon=True).start()
+        self._mostrar_progreso()
+        self._actualizar_progreso_global()
     
-    def _build_cache_sync(self, location):
-        """Construye cache para una ubicación usando el sistema real CON NOMBRE ÚNICO"""
-        try:
-            # USAR EL SISTEMA REAL DE CACHE CON NOMBRES ÚNICOS
-            from .cache_manager import CacheManager
-            import hashlib
-            
-            # Generar nombre único de archivo cache basado en la ruta
-            path_hash = hashlib.md5(location.path.encode()).hexdigest()[:8]
-            cache_filename = f"cache_{path_hash}.pkl"
-            
-            # Crear cache manager temporal para esta ubicación
-            temp_cache = CacheManager(location.path)
-            temp_cache.cache_file = cache_filename  # Usar nombre único
-            
-            # Callback de progreso silencioso
-            def silent_callback(progress, total, msg):
-                pass  # No mostrar progreso individual
-            
-            temp_cache.callback_progreso = silent_callback
-            
-            # Construir cache
-            if temp_cache.construir_cache():
-                # Actualizar información de la ubicación
-                stats = temp_cache.get_cache_stats()
-                location.cache_size = stats.get('carpetas', 0)
-                location.last_scanned = datetime.now().strftime("%H:%M:%S")
-                location.is_valid = True
-                print(f"[DEBUG] Cache construido para {location.name}: {location.cache_size} carpetas (archivo: {cache_filename})")
+    def _on_build_update(self, job):
+        """Recibe cambios de la cola (desde hilos de trabajo) y los pasa al hilo de Tk"""
+        if self.modal:
+            try:
+                # Solo el último estado de cada ubicación llega a pintarse
+                self.app.ui_dispatcher.publicar_ultimo(('construccion', job.path), self._aplicar_actualizacion, job)
+            except (tk.TclError, RuntimeError):
+                pass
+    
+    def _aplicar_actualizacion(self, job):
+        """Actualiza solo la fila de la ubicación afectada y el progreso global"""
+        if not self.modal:
+            return
+        
+        location = next((loc for loc in self.locations if loc.path == job.path), None)
+        if location and job.estado == COMPLETADO:
+            location.cache_size = job.carpetas
+            location.last_scanned = datetime.now().strftime("%H:%M:%S")
+            location.is_valid = True
+        
+        row_id = self._row_for_path.get(job.path)
+        if location and row_id and self.tree.exists(row_id):
+            if job.estado in (EN_COLA, CONSTRUYENDO, CANCELADO, ERROR):
+                self.tree.set(row_id, "status", self._texto_estado_job(job))
             else:
-                print(f"[ERROR] Falló construcción de cache para {location.name}")
-                
-        except Exception as e:
-            print(f"[ERROR] Error construyendo cache para {location.name}: {e}")
+                self._populate_tree()
+        
+        self._actualizar_progreso_global()
     
-    def _finish_batch_build(self):
-        """Finaliza construcción de cache en batch"""
-        self.building_cache = False
-        self.progress_bar.stop()
-        self.progress_frame.pack_forget()
-        self._populate_tree()
-        messagebox.showinfo("Cache Completado", "Todos los caches han sido construidos exitosamente")
+    def _texto_estado_job(self, job):
+        """Texto de estado por ubicación: cola, porcentaje y ETA"""
+        if job.estado == EN_COLA:
+            return "🕒 En cola"
+        if job.estado == CONSTRUYENDO:
+            eta = formatear_eta(job.get_eta())
+            return f"⏳ {job.progreso}%" + (f" · {eta}" if eta else "")
+        if job.estado == CANCELADO:
+            return "⛔ Cancelado"
+        if job.estado == ERROR:
+            return "❌ Error"
+        return "✅ Activa"
+    
+    def _mostrar_progreso(self):
+        self.progress_frame.pack(fill='x', pady=(10, 0))
+    
+    def _actualizar_progreso_global(self):
+        """Progreso agregado de los trabajos activos; se oculta al terminar"""
+        jobs = self.build_queue.get_jobs() if self.build_queue else []
+        activos = [j for j in jobs if j.estado in (EN_COLA, CONSTRUYENDO)]
+        
+        if not activos:
+            self.progress_bar['value'] = 100
+            self.progress_var.set("Construcción de caches finalizada")
+            self.modal.after(3000, self._ocultar_progreso_si_inactivo)
+            return
+        
+        construyendo = [j for j in activos if j.estado == CONSTRUYENDO]
+        promedio = sum(j.progreso for j in activos) / len(activos)
+        etas = [j.get_eta() for j in construyendo if j.get_eta() is not None]
+        eta_texto = f" · ETA {formatear_eta(max(etas))}" if etas else ""
+        
+        self.progress_bar['value'] = promedio
+        self.progress_var.set(f"Construyendo {len(construyendo)} · En cola {len(activos) - len(construyendo)}"
+                              f" · {promedio:.0f}%{eta_texto}")
     
-    def _handle_build_error(self, error_msg):
-        """Maneja errores en construcción de cache"""
-        self.building_cache = False
-        self.progress_bar.stop()
-        self.progress_frame.pack_forget()
-        messagebox.showerror("Error en Cache", f"Error construyendo cache:\n{error_msg}")
+    def _ocultar_progreso_si_inactivo(self):
+        if self.modal and not (self.build_queue and self.build_queue.is_busy()):
+            self.progress_frame.pack_forget()
+    
+    def _cancel_build(self, location):
+        """Cancela la construcción de una ubicación"""
+        if self.build_queue:
+            self.build_queue.cancel(location.path)
     
     def _on_item_double_click(self, event):
         """Maneja doble click en item"""
@@ -406,6 +475,11 @@ class LocationsConfigModal:
             context_menu.add_command(label="Construir cache", 
                                    command=lambda: self._build_cache_for_location(location))
             
+            job = self.build_queue.get_job(location.path) if self.build_queue else None
+            if job and job.estado in (EN_COLA, CONSTRUYENDO):
+                context_menu.add_command(label="Cancelar construcción",
+                                       command=lambda: self._cancel_build(location))
+            
             context_menu.add_separator()
             context_menu.add_command(label="Abrir carpeta", 
                                    command=lambda: self._open_location_folder(location.path))
@@ -422,8 +496,8 @@ class LocationsConfigModal:
             self._populate_tree()
     
     def _build_cache_for_location(self, location):
-        """Construye cache para una ubicación específica"""
-        self._start_batch_cache_build([location])
+        """Construye cache para una ubicación específica (o la raíz que la contiene)"""
+        self._start_batch_cache_build(self._get_build_roots([location]), PRIORIDAD_ALTA)
     
     def _open_location_folder(self, path):
         """Abre carpeta de ubicación en el explorador"""
@@ -457,11 +531,9 @@ class LocationsConfigModal:
         self._close_modal()
     
     def _close_modal(self):
-        """Cierra el modal"""
-        if self.building_cache:
-            if not messagebox.askyesno("Construcción en progreso", 
-                                     "Se está construyendo un cache. ¿Cancelar y cerrar?"):
-                return
+        """Cierra el modal (las construcciones en curso continúan en segundo plano)"""
+        if self.build_queue:
+            self.build_queue.unsubscribe(self._on_build_update)
         
         if self.modal:
             self.modal.grab_release()
@@ -123,18 +123,14 @@ class MenuManager:
                         
                         # Construir nuevo cache
                         if self.app.cache_manager.construir_cache():
-                            self.app.master.after(0, lambda: [
-                                self.app.actualizar_info_carpeta(),
-                                self.app.ui_callbacks.actualizar_estado("Nueva carpeta configurada - Caché listo")
-                            ])
+                            self.app.ui_dispatcher.publicar(self.app.actualizar_info_carpeta)
+                            self.app.ui_callbacks.actualizar_estado_async("Nueva carpeta configurada - Caché listo")
                             print(f"[CACHE] Cache construido para nueva ruta: {nueva_ruta}")
                         else:
-                            self.app.master.after(0, lambda: 
-                                self.app.ui_callbacks.actualizar_estado("Nueva carpeta configurada - Use búsqueda directa"))
+                            self.app.ui_callbacks.actualizar_estado_async("Nueva carpeta configurada - Use búsqueda directa")
                     except Exception as e:
                         print(f"[CACHE] Error construyendo cache para nueva ruta: {e}")
-                        self.app.master.after(0, lambda: 
-                            self.app.ui_callbacks.actualizar_estado("Nueva carpeta configurada - Error en caché"))
+                        self.app.ui_callbacks.actualizar_estado_async("Nueva carpeta configurada - Error en caché")
                 
                 threading.Thread(target=construir_nuevo_cache, daemon=True).start()
                 
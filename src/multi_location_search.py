@@ -4,6 +4,8 @@ import os
 import time
 from datetime import datetime
 
+from .location_overlap import LocationOverlapPlan
+
 class MultiLocationSearch:
     """Maneja búsquedas en múltiples ubicaciones"""
     
@@ -13,6 +15,8 @@ class MultiLocationSearch:
         self.config_file = "search_locations.json"
         self.location_caches = {}
         self.rotation_index = 0
+        self._scan_plan = None
+        self._scan_plan_key = None
         self.load_locations()
     
     def load_locations(self):
@@ -27,11 +31,27 @@ class MultiLocationSearch:
         except Exception as e:
             print(f"Error cargando ubicaciones: {e}")
             self.locations = []
+        self._scan_plan = None
     
     def get_enabled_locations(self):
         """Obtiene ubicaciones habilitadas"""
         return [loc for loc in self.locations if loc.get('enabled', True) and os.path.exists(loc['path'])]
     
+    def get_scan_plan(self):
+        """Plan de escaneo: ubicaciones anidadas o duplicadas comparten una sola raíz"""
+        enabled_locations = self.get_enabled_locations()
+        plan_key = tuple(loc['path'] for loc in enabled_locations)
+        
+        if self._scan_plan is None or self._scan_plan_key != plan_key:
+            self._scan_plan = LocationOverlapPlan(enabled_locations)
+            self._scan_plan_key = plan_key
+            
+            for root in self._scan_plan.scan_roots:
+                for _, nested in root.nested:
+                    print(f"[MULTI] '{nested['name']}' comparte índice con '{root.location['name']}'")
+        
+        return self._scan_plan
+    
     def search_in_all_locations(self, criterio):
         """Busca en todas las ubicaciones habilitadas"""
         enabled_locations = self.get_enabled_locations()
@@ -40,26 +60,19 @@ class MultiLocationSearch:
         if not enabled_locations:
             return None
         
-        all_results = []
+        plan = self.get_scan_plan()
+        results_por_raiz = []
         
-        for location in enabled_locations:
+        # Cada subárbol se recorre una sola vez aunque varias ubicaciones lo contengan
+        for root in plan.scan_roots:
             try:
-                # Buscar en cada ubicación
-                location_results = self._search_in_location(location, criterio)
-                
-                # Agregar metadatos de ubicación a cada resultado
-                for result in location_results:
-                    if isinstance(result, tuple) and len(result) >= 3:
-                        nombre, ruta_rel, ruta_abs = result[:3]
-                        # Agregar nombre de ubicación como cuarto elemento
-                        enhanced_result = (nombre, ruta_rel, ruta_abs, location['name'])
-                        all_results.append(enhanced_result)
-                
+                results_por_raiz.append((root, self._search_in_location(root.location, criterio)))
             except Exception as e:
-                print(f"Error buscando en {location['name']}: {e}")
+                print(f"Error buscando en {root.location['name']}: {e}")
                 continue
         
-        return all_results
+        # Agrega el nombre de ubicación como cuarto elemento, sin duplicados
+        return plan.merge_results(results_por_raiz)
     
     def _search_in_location(self, location, criterio):
         """Busca en una ubicación específica"""
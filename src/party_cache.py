@@ -0,0 +1,199 @@
+# src/party_cache.py - Cache de partes en dos niveles: LRU en memoria + SQLite en disco
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# Valor devuelto por get() cuando el radicado no está en ningún nivel
+FALTA = object()
+
+
+class PartyCache:
+    """Cache de (demandante, demandado) por radicado con TTL y negativos
+
+    El nivel en memoria es un LRU acotado; el nivel en disco guarda todo con
+    su marca de tiempo y sobrevive reinicios. Los resultados vacíos
+    (None, None) se guardan con un TTL más corto para no repetir consultas
+    sin partes, pero volver a verificarlas pronto.
+    """
+
+    def __init__(self, db_file="partes_cache.db", max_memoria=500,
+                 ttl_positivo=7 * 24 * 3600, ttl_negativo=3600):
+        self.db_file = db_file
+        self.max_memoria = max_memoria
+        self.ttl_positivo = ttl_positivo
+        self.ttl_negativo = ttl_negativo
+
+        self._lock = threading.RLock()
+        self._memoria = OrderedDict()  # {radicado: (valor, guardado)}
+        self._conn = None
+        self._abrir_disco()
+
+        self.stats = {
+            'hits_memoria': 0,
+            'hits_disco': 0,
+            'misses': 0,
+            'expirados': 0,
+            'evictions': 0,
+            'negativos': 0
+        }
+
+    def _abrir_disco(self):
+        try:
+            self._conn = sqlite3.connect(self.db_file, check_same_thread=False)
+            with self._conn:
+                self._conn.execute("""
+                    CREATE TABLE IF NOT EXISTS partes_cache (
+                        radicado TEXT PRIMARY KEY,
+                        demandante TEXT,
+                        demandado TEXT,
+                        guardado REAL NOT NULL
+                    )
+                """)
+        except Exception as e:
+            print(f"[CACHE PARTES] Disco no disponible, solo memoria: {e}")
+            self._conn = None
+
+    # Consultas
+
+    def get(self, radicado):
+        """(demandante, demandado) vigente o FALTA"""
+        return self.get_many([radicado]).get(radicado, FALTA)
+
+    def get_many(self, radicados):
+        """{radicado: valor} de los radicados vigentes en memoria o disco"""
+        encontrados = {}
+        ahora = time.time()
+
+        with self._lock:
+            en_disco = []
+            for radicado in radicados:
+                entrada = self._memoria.get(radicado)
+                if entrada is None:
+                    en_disco.append(radicado)
+                    continue
+                valor, guardado = entrada
+                if self._vigente(valor, guardado, ahora):
+                    self._memoria.move_to_end(radicado)
+                    encontrados[radicado] = valor
+                    self.stats['hits_memoria'] += 1
+                else:
+                    del self._memoria[radicado]
+                    self.stats['expirados'] += 1
+                    en_disco.append(radicado)
+
+            for radicado, (valor, guardado) in self._leer_disco(en_disco).items():
+                if self._vigente(valor, guardado, ahora):
+                    self._guardar_memoria(radicado, valor, guardado)
+                    encontrados[radicado] = valor
+                    self.stats['hits_disco'] += 1
+                else:
+                    self.stats['expirados'] += 1
+
+            self.stats['misses'] += sum(1 for rad in en_disco if rad not in encontrados)
+
+        return encontrados
+
+    def _vigente(self, valor, guardado, ahora):
+        ttl = self.ttl_negativo if valor == (None, None) else self.ttl_positivo
+        return ahora - guardado <= ttl
+
+    # Escritura
+
+    def put(self, radicado, valor):
+        self.put_many({radicado: valor})
+
+    def put_many(self, valores):
+        """Guarda {radicado: (demandante, demandado)} en ambos niveles"""
+        if not valores:
+            return
+        ahora = time.time()
+        with self._lock:
+            for radicado, valor in valores.items():
+                valor = tuple(valor)
+                if valor == (None, None):
+                    self.stats['negativos'] += 1
+                self._guardar_memoria(radicado, valor, ahora)
+
+            if self._conn is not None:
+                try:
+                    with self._conn:
+                        self._conn.executemany(
+                            "INSERT OR REPLACE INTO partes_cache VALUES (?, ?, ?, ?)",
+                            [(rad, val[0], val[1], ahora) for rad, val in valores.items()])
+                except Exception as e:
+                    print(f"[CACHE PARTES] Error guardando en disco: {e}")
+
+    def _guardar_memoria(self, radicado, valor, guardado):
+        """Requiere el lock tomado"""
+        self._memoria[radicado] = (valor, guardado)
+        self._memoria.move_to_end(radicado)
+        while len(self._memoria) > self.max_memoria:
+            self._memoria.popitem(last=False)
+            self.stats['evictions'] += 1
+
+    def _leer_disco(self, radicados):
+        """Requiere el lock tomado"""
+        if self._conn is None or not radicados:
+            return {}
+        filas = {}
+        try:
+            for i in range(0, len(radicados), 500):
+                lote = radicados[i:i + 500]
+                placeholders = ", ".join("?" for _ in lote)
+                for rad, demandante, demandado, guardado in self._conn.execute(
+                        f"SELECT radicado, demandante, demandado, guardado FROM partes_cache "
+                        f"WHERE radicado IN ({placeholders})", lote):
+                    filas[rad] = ((demandante, demandado), guardado)
+        except Exception as e:
+            print(f"[CACHE PARTES] Error leyendo disco: {e}")
+        return filas
+
+    # Mantenimiento
+
+    def purgar_expirados(self):
+        """Borra del disco las entradas vencidas"""
+        if self._conn is None:
+            return 0
+        ahora = time.time()
+        with self._lock:
+            try:
+                with self._conn:
+                    cursor = self._conn.execute("""
+                        DELETE FROM partes_cache
+                        WHERE (demandante IS NULL AND demandado IS NULL AND guardado < ?)
+                           OR guardado < ?
+                    """, (ahora - self.ttl_negativo, ahora - self.ttl_positivo))
+                return cursor.rowcount
+            except Exception as e:
+                print(f"[CACHE PARTES] Error purgando: {e}")
+                return 0
+
+    def clear(self):
+        with self._lock:
+            self._memoria.clear()
+            if self._conn is not None:
+                try:
+                    with self._conn:
+                        self._conn.execute("DELETE FROM partes_cache")
+                except Exception as e:
+                    print(f"[CACHE PARTES] Error limpiando disco: {e}")
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats['size'] = len(self._memoria)
+            stats['max_size'] = self.max_memoria
+            stats['disco'] = self._contar_disco()
+        hits = stats['hits_memoria'] + stats['hits_disco']
+        total = hits + stats['misses']
+        stats['hit_rate'] = hits / total if total else 0.0
+        return stats
+
+    def _contar_disco(self):
+        if self._conn is None:
+            return 0
+        try:
+            return self._conn.execute("SELECT COUNT(*) FROM partes_cache").fetchone()[0]
+        except Exception:
+            return 0
@@ -0,0 +1,289 @@
+# src/party_mirror.py - Réplica local SQLite de las partes de los procesos (T112DRSUJEPROC)
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from datetime import datetime
+
+from .radicado import PREFIJO_JUZGADO
+
+
+def agrupar_partes(rows):
+    """Agrupa filas (radicado, código, nombre) en {radicado: (demandante, demandado)}"""
+    demandantes = {}
+    demandados = {}
+
+    for row in rows:
+        radicado = str(row[0]).strip()
+        codigo = row[1]
+        nombre = row[2].strip() if row[2] else ""
+
+        if codigo == '0001': # Demandante
+            demandantes.setdefault(radicado, []).append(nombre)
+        elif codigo == '0002': # Demandado
+            demandados.setdefault(radicado, []).append(nombre)
+
+    partes = {}
+    for radicado in set(demandantes) | set(demandados):
+        # Unir múltiples partes con " | "
+        str_demandante = " | ".join(demandantes.get(radicado, [])) or "Desconocido"
+        str_demandado = " | ".join(demandados.get(radicado, [])) or "Desconocido"
+        partes[radicado] = (str_demandante, str_demandado)
+    return partes
+
+
+def palabras_nombre(nombre):
+    """Palabras del nombre sin tildes y en mayúsculas ('Peña Gómez' → ['PENA', 'GOMEZ'])"""
+    texto = unicodedata.normalize('NFKD', str(nombre or ''))
+    texto = ''.join(c for c in texto if not unicodedata.combining(c)).upper()
+    return [palabra for palabra in re.findall(r'[A-Z0-9]+', texto) if len(palabra) >= 2]
+
+
+def tokens_nombre(nombre):
+    """Tokens distintos de un nombre para el índice"""
+    return set(palabras_nombre(nombre))
+
+
+class PartyMirror:
+    """Réplica local de las partes del juzgado para consultas sin red
+
+    La carga completa recorre el origen con fetchmany; la sincronización
+    delta vuelve a traer solo los radicados desde el año anterior (los
+    procesos nuevos o con partes recién registradas). El origen es cualquier
+    conexión DB-API con parámetros '?' (pyodbc o sqlite3).
+
+    La tabla `tokens` indexa cada palabra de los nombres para la búsqueda
+    inversa nombre → radicados.
+
+    Lo que llega del origen se guarda por bloques en tablas temporales; el
+    lock solo se toma para cada bloque y para el reemplazo final, así las
+    consultas (algunas desde el hilo de Tk) no esperan a la red.
+    """
+
+    FETCH_SIZE = 5000
+    SQLITE_LOOKUP_BATCH = 500
+
+    def __init__(self, db_file="partes_local.db", prefijo=PREFIJO_JUZGADO):
+        self.db_file = db_file
+        self.prefijo = prefijo
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(db_file, check_same_thread=False)
+        self._sync_lock = threading.Lock()  # Una carga o sync a la vez (comparten las tablas temporales)
+        self._sync_thread = None
+        self._sync_stop = threading.Event()
+        self._crear_esquema()
+
+    def _crear_esquema(self):
+        with self._lock, self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS partes (
+                    radicado TEXT NOT NULL,
+                    codigo TEXT,
+                    nombre TEXT
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_partes_radicado ON partes(radicado)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS meta (clave TEXT PRIMARY KEY, valor TEXT)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS tokens (token TEXT NOT NULL, radicado TEXT NOT NULL)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_tokens_token ON tokens(token, radicado)")
+
+            # Réplicas anteriores al índice de nombres: indexar lo ya cargado
+            sin_tokens = self._conn.execute("SELECT 1 FROM tokens LIMIT 1").fetchone() is None
+            con_partes = self._conn.execute("SELECT 1 FROM partes LIMIT 1").fetchone() is not None
+            if sin_tokens and con_partes:
+                filas = self._conn.execute("SELECT radicado, nombre FROM partes").fetchall()
+                self._indexar_tokens(filas)
+
+    # Consultas
+
+    def esta_cargado(self):
+        """True si ya se hizo al menos una carga completa"""
+        return self._get_meta('ultima_carga') is not None
+
+    def obtener_partes(self, radicados):
+        """{radicado: (demandante, demandado)} de los radicados presentes en la réplica"""
+        radicados = list(radicados)
+        partes = {}
+        with self._lock:
+            for i in range(0, len(radicados), self.SQLITE_LOOKUP_BATCH):
+                lote = radicados[i:i + self.SQLITE_LOOKUP_BATCH]
+                placeholders = ", ".join("?" for _ in lote)
+                rows = self._conn.execute(
+                    f"SELECT radicado, codigo, nombre FROM partes WHERE radicado IN ({placeholders})",
+                    lote).fetchall()
+                partes.update(agrupar_partes(rows))
+        return partes
+
+    def buscar_radicados(self, nombre, limite=500):
+        """Radicados con partes que contienen todas las palabras del nombre
+
+        La última palabra se compara por prefijo para admitir nombres a medio
+        escribir; cada palabra es un rango sobre el índice de tokens.
+        """
+        palabras = palabras_nombre(nombre)
+        if not palabras:
+            return []
+
+        consultas = []
+        parametros = []
+        for palabra in dict.fromkeys(palabras):
+            if palabra == palabras[-1]:
+                consultas.append("SELECT radicado FROM tokens WHERE token >= ? AND token < ?")
+                parametros.extend([palabra, palabra + "\uffff"])
+            else:
+                consultas.append("SELECT radicado FROM tokens WHERE token = ?")
+                parametros.append(palabra)
+
+        sql = " INTERSECT ".join(consultas) + " ORDER BY radicado DESC LIMIT ?"
+        with self._lock:
+            rows = self._conn.execute(sql, parametros + [limite]).fetchall()
+        return [row[0] for row in rows]
+
+    def cubre(self, radicado):
+        """True si el radicado pertenece al juzgado replicado y la réplica está cargada"""
+        return radicado.startswith(self.prefijo) and self.esta_cargado()
+
+    # Sincronización
+
+    def carga_completa(self, origen):
+        """Carga todas las partes del prefijo del juzgado con lectura por bloques"""
+        inicio = time.time()
+        with self._sync_lock:
+            cursor = origen.cursor()
+            try:
+                cursor.execute("""
+                    SELECT A112LLAVPROC, A112CODISUJE, A112NOMBSUJE
+                    FROM T112DRSUJEPROC
+                    WHERE A112LLAVPROC LIKE ?
+                """, (self.prefijo + '%',))
+                total = self._descargar(cursor)
+            finally:
+                cursor.close()
+
+            with self._lock, self._conn:
+                self._conn.execute("DELETE FROM partes")
+                self._conn.execute("DELETE FROM tokens")
+                self._reemplazar_desde_staging()
+                self._set_meta('ultima_carga', datetime.now().isoformat(timespec='seconds'))
+                self._set_meta('ultima_sync', datetime.now().isoformat(timespec='seconds'))
+
+        print(f"[ESPEJO] Carga completa: {total:,} partes en {time.time() - inicio:.1f}s")
+        return total
+
+    def sync_delta(self, origen, desde_año=None):
+        """Vuelve a traer los radicados desde el año indicado (por defecto, el anterior)"""
+        if not self.esta_cargado():
+            return self.carga_completa(origen)
+
+        inicio = time.time()
+        desde_año = desde_año or datetime.now().year - 1
+        desde = f"{self.prefijo}{desde_año}"
+
+        with self._sync_lock:
+            cursor = origen.cursor()
+            try:
+                cursor.execute("""
+                    SELECT A112LLAVPROC, A112CODISUJE, A112NOMBSUJE
+                    FROM T112DRSUJEPROC
+                    WHERE A112LLAVPROC >= ? AND A112LLAVPROC LIKE ?
+                """, (desde, self.prefijo + '%'))
+                total = self._descargar(cursor)
+            finally:
+                cursor.close()
+
+            with self._lock, self._conn:
+                for tabla in ("partes", "tokens"):
+                    self._conn.execute(f"DELETE FROM {tabla} WHERE radicado >= ? AND radicado LIKE ?",
+                                       (desde, self.prefijo + '%'))
+                self._reemplazar_desde_staging()
+                self._set_meta('ultima_sync', datetime.now().isoformat(timespec='seconds'))
+
+        print(f"[ESPEJO] Sync delta desde {desde_año}: {total:,} partes en {time.time() - inicio:.1f}s")
+        return total
+
+    def _descargar(self, cursor):
+        """Lee el origen por bloques a las tablas temporales; el lock se toma solo al insertar cada bloque"""
+        with self._lock, self._conn:
+            self._conn.execute("CREATE TEMP TABLE IF NOT EXISTS partes_nuevas "
+                               "(radicado TEXT NOT NULL, codigo TEXT, nombre TEXT)")
+            self._conn.execute("CREATE TEMP TABLE IF NOT EXISTS tokens_nuevos "
+                               "(token TEXT NOT NULL, radicado TEXT NOT NULL)")
+            self._conn.execute("DELETE FROM partes_nuevas")
+            self._conn.execute("DELETE FROM tokens_nuevos")
+
+        total = 0
+        while True:
+            rows = cursor.fetchmany(self.FETCH_SIZE)
+            if not rows:
+                break
+            filas = [(str(r[0]).strip(), r[1], r[2]) for r in rows]
+            tokens = self._filas_tokens((radicado, nombre) for radicado, _, nombre in filas)
+            with self._lock, self._conn:
+                self._conn.executemany(
+                    "INSERT INTO partes_nuevas (radicado, codigo, nombre) VALUES (?, ?, ?)", filas)
+                self._conn.executemany("INSERT INTO tokens_nuevos (token, radicado) VALUES (?, ?)", tokens)
+            total += len(rows)
+        return total
+
+    def _reemplazar_desde_staging(self):
+        """Pasa lo descargado a las tablas reales. Requiere el lock y la transacción abiertos"""
+        self._conn.execute("INSERT INTO partes (radicado, codigo, nombre) "
+                           "SELECT radicado, codigo, nombre FROM partes_nuevas")
+        self._conn.execute("INSERT INTO tokens (token, radicado) SELECT token, radicado FROM tokens_nuevos")
+        self._conn.execute("DELETE FROM partes_nuevas")
+        self._conn.execute("DELETE FROM tokens_nuevos")
+
+    @staticmethod
+    def _filas_tokens(filas):
+        """filas: (radicado, nombre) → [(token, radicado)]"""
+        return [(token, radicado) for radicado, nombre in filas for token in tokens_nombre(nombre)]
+
+    def _indexar_tokens(self, filas):
+        """filas: (radicado, nombre). Requiere el lock y la transacción abiertos"""
+        self._conn.executemany("INSERT INTO tokens (token, radicado) VALUES (?, ?)", self._filas_tokens(filas))
+
+    def iniciar_sync_programado(self, obtener_origen, intervalo=1800, retraso_inicial=10):
+        """Hilo que sincroniza cada `intervalo` segundos
+
+        `obtener_origen` es un context manager que entrega una conexión al origen
+        (por ejemplo, DatabaseManager.pool.connection).
+        """
+        if self._sync_thread and self._sync_thread.is_alive():
+            return
+
+        def loop():
+            espera = retraso_inicial
+            while not self._sync_stop.wait(espera):
+                espera = intervalo
+                try:
+                    with obtener_origen() as origen:
+                        self.sync_delta(origen)
+                except Exception as e:
+                    print(f"[ESPEJO] Sincronización fallida: {e}")
+
+        self._sync_stop.clear()
+        self._sync_thread = threading.Thread(target=loop, daemon=True)
+        self._sync_thread.start()
+
+    def detener_sync(self):
+        self._sync_stop.set()
+
+    def get_stats(self):
+        with self._lock:
+            filas = self._conn.execute("SELECT COUNT(*) FROM partes").fetchone()[0]
+        return {
+            'filas': filas,
+            'ultima_carga': self._get_meta('ultima_carga'),
+            'ultima_sync': self._get_meta('ultima_sync')
+        }
+
+    # Metadatos
+
+    def _get_meta(self, clave):
+        with self._lock:
+            row = self._conn.execute("SELECT valor FROM meta WHERE clave = ?", (clave,)).fetchone()
+            return row[0] if row else None
+
+    def _set_meta(self, clave, valor):
+        self._conn.execute("INSERT OR REPLACE INTO meta (clave, valor) VALUES (?, ?)", (clave, valor))
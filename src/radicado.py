@@ -0,0 +1,80 @@
+# src/radicado.py - Conversión de expedientes AAAA-EXP y nombres de carpeta a radicados
+import os
+import re
+
+# Prefijo del juzgado: ciudad (5) + entidad/especialidad (4) + despacho (3)
+PREFIJO_JUZGADO = "110013105017"
+
+_RE_CRITERIO = re.compile(r'(\d{4})-(\d+)$')
+_RE_RADICADO = re.compile(r'(?<!\d)(\d{23})')
+_RE_EXPEDIENTE = re.compile(r'(?<!\d)((?:19|20)\d{2})\s*-\s*(\d{1,5})(?!\d)')
+
+
+def construir_radicado(año, expediente):
+    """Formato: prefijo (12) + año (4) + expediente (5) + sufijo (2) = 23 dígitos"""
+    radicado = f"{PREFIJO_JUZGADO}{año}{str(expediente).zfill(5)}00"
+    return radicado if len(radicado) == 23 else None
+
+
+def radicado_desde_criterio(criterio):
+    """Convierte un criterio exacto AAAA-EXP a radicado de 23 dígitos
+
+    Ejemplo: 2025-10212 → 11001310501720251021200
+    """
+    match = _RE_CRITERIO.match(criterio.strip())
+    if not match:
+        return None
+    return construir_radicado(match.group(1), match.group(2))
+
+
+def radicado_desde_nombre(nombre):
+    """Extrae el radicado de un nombre de carpeta (23 dígitos o AAAA-EXP dentro del texto)"""
+    if not nombre:
+        return None
+
+    match = _RE_RADICADO.search(nombre)
+    if match:
+        return match.group(1)
+
+    match = _RE_EXPEDIENTE.search(nombre)
+    if match:
+        return construir_radicado(match.group(1), match.group(2))
+    return None
+
+
+def radicado_desde_ruta(nombre, ruta_abs=None, max_niveles=4):
+    """Radicado del resultado: su propio nombre o la carpeta de expediente que lo contiene"""
+    radicado = radicado_desde_nombre(nombre)
+    if radicado or not ruta_abs:
+        return radicado
+
+    # Subcarpetas (anexos, cuadernos...) heredan el radicado del expediente padre
+    ruta = os.path.dirname(os.path.normpath(ruta_abs))
+    for _ in range(max_niveles):
+        padre = os.path.basename(ruta)
+        if not padre:
+            break
+        radicado = radicado_desde_nombre(padre)
+        if radicado:
+            return radicado
+        ruta = os.path.dirname(ruta)
+    return None
+
+
+def indexar_radicados(carpetas):
+    """Índice {radicado: [posiciones]} de las carpetas de expediente
+
+    `carpetas` son los dicts del cache ({'nombre', 'ruta_relativa', 'ruta_absoluta'});
+    solo se indexa el radicado del nombre propio, no el heredado del padre.
+    """
+    indice = {}
+    for posicion, carpeta in enumerate(carpetas):
+        radicado = radicado_desde_nombre(carpeta.get('nombre', ''))
+        if radicado:
+            indice.setdefault(radicado, []).append(posicion)
+    return indice
+
+
+def limpiar_radicado(radicado):
+    """Solo dígitos, cortado a 23 (descarta sufijos)"""
+    return ''.join(filter(str.isdigit, str(radicado)))[:23]
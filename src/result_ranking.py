@@ -0,0 +1,105 @@
+# src/result_ranking.py - Ranking global de resultados (top-K con heap)
+import heapq
+import os
+
+from .constants import MAX_RESULTADOS
+
+# Niveles de coincidencia (menor es mejor)
+COINCIDENCIA_EXACTA = 0
+COINCIDENCIA_PREFIJO = 1
+COINCIDENCIA_PALABRA = 2
+COINCIDENCIA_PARCIAL = 3
+
+
+def nivel_coincidencia(nombre_lower, criterio_lower):
+    """Clasifica la coincidencia: exacta, prefijo, inicio de palabra o subcadena"""
+    if nombre_lower == criterio_lower:
+        return COINCIDENCIA_EXACTA
+    if nombre_lower.startswith(criterio_lower):
+        return COINCIDENCIA_PREFIJO
+
+    idx = nombre_lower.find(criterio_lower, 1)
+    while idx > 0:
+        if not nombre_lower[idx - 1].isalnum():
+            return COINCIDENCIA_PALABRA
+        idx = nombre_lower.find(criterio_lower, idx + 1)
+    return COINCIDENCIA_PARCIAL
+
+
+def puntuar(nombre, ruta_rel, criterio_lower):
+    """Puntaje ordenable de un resultado: coincidencia, profundidad y longitud del nombre"""
+    nivel = nivel_coincidencia(nombre.lower(), criterio_lower)
+    profundidad = ruta_rel.replace('/', os.sep).count(os.sep) if ruta_rel else 0
+    return (nivel, profundidad, len(nombre))
+
+
+class RankedMerger:
+    """Mezcla resultados de varias ubicaciones conservando los K mejores
+
+    Los resultados se agregan a medida que llegan (push/extend); un heap
+    acotado descarta el peor cuando se supera la capacidad. Las páginas se
+    sirven desde memoria, así "mostrar más" no repite la búsqueda.
+    """
+
+    def __init__(self, criterio, capacidad=MAX_RESULTADOS):
+        self.criterio_lower = criterio.lower()
+        self.capacidad = capacidad
+        self._heap = []  # (-puntaje, -secuencia, resultado): el peor queda en la cima
+        self._secuencia = 0
+        self._ordenados = None
+        self.descartados = 0
+
+    def push(self, resultado):
+        """Agrega un resultado (nombre, ruta_rel, ruta_abs, ...) al ranking"""
+        nombre, ruta_rel = resultado[0], resultado[1]
+        puntaje = puntuar(nombre, ruta_rel, self.criterio_lower)
+        entrada = (tuple(-p for p in puntaje), -self._secuencia, resultado)
+        self._secuencia += 1
+
+        if len(self._heap) < self.capacidad:
+            heapq.heappush(self._heap, entrada)
+        elif entrada > self._heap[0]:
+            heapq.heapreplace(self._heap, entrada)
+            self.descartados += 1
+        else:
+            self.descartados += 1
+            return False
+
+        self._ordenados = None
+        return True
+
+    def extend(self, resultados):
+        """Agrega varios resultados"""
+        for resultado in resultados:
+            self.push(resultado)
+
+    def _get_ordenados(self):
+        if self._ordenados is None:
+            self._ordenados = [e[2] for e in sorted(self._heap, reverse=True)]
+        return self._ordenados
+
+    def top(self, k):
+        """Los k mejores resultados"""
+        return self.page(0, k)
+
+    def page(self, offset, limit):
+        """Página de resultados ordenados por puntaje"""
+        return self._get_ordenados()[offset:offset + limit]
+
+    def reemplazar_desde(self, offset, resultados):
+        """Cambia los resultados desde `offset` (lo ya mostrado queda igual), conservando el orden
+
+        Para quitar o renombrar lo que el explorador eliminó o movió sin
+        volver a buscar; las páginas siguientes salen de `resultados`.
+        """
+        ordenados = self._get_ordenados()[:offset] + list(resultados)
+        self._heap = []
+        for secuencia, resultado in enumerate(ordenados):
+            puntaje = puntuar(resultado[0], resultado[1], self.criterio_lower)
+            self._heap.append((tuple(-p for p in puntaje), -secuencia, resultado))
+        heapq.heapify(self._heap)
+        self._secuencia = len(ordenados)
+        self._ordenados = ordenados
+
+    def __len__(self):
+        return len(self._heap)
@@ -1,6 +1,7 @@
 # src/results_display.py - Visualización de resultados con soporte de subcarpetas
 import tkinter as tk
-import os
+
+from .constants import UMBRAL_VISTA_VIRTUAL
 
 class ResultsDisplay:
     """Maneja la visualización de resultados en el TreeView"""
@@ -11,8 +12,11 @@ class ResultsDisplay:
     def mostrar_instantaneos(self, resultados, criterio, metodo):
         """Muestra resultados instantáneos"""
         try:
-            self._agregar_por_lotes(resultados, metodo)
-            self.app.ui_callbacks.actualizar_estado(f"✅ {len(resultados)} resultados ({metodo})")
+            resultados, virtual = self._mostrar_virtual_si_conviene(resultados, metodo)
+            if not virtual:
+                delay = self._agregar_por_lotes(resultados, metodo)
+                self._programar_fila_mostrar_mas(delay, metodo)
+            self.app.ui_callbacks.actualizar_estado(f"✅ {self.texto_cantidad(len(resultados))} resultados ({metodo})")
             self.app.btn_buscar.configure(state='normal', text='Buscar')
             self.app.btn_cancelar.configure(state='disabled')
             
@@ -35,6 +39,11 @@ class ResultsDisplay:
             return
         
         try:
+            resultados, virtual = self._mostrar_virtual_si_conviene(resultados, "Multi")
+            if virtual:
+                self._finalizar_multi(resultados, criterio)
+                return
+            
             batch_size = 3
             for i in range(0, len(resultados), batch_size):
                 batch = resultados[i:i+batch_size]
@@ -57,8 +66,11 @@ class ResultsDisplay:
             return
         
         try:
-            self._agregar_por_lotes(resultados, "Tradicional")
-            self.app.ui_callbacks.actualizar_estado(f"✅ {len(resultados)} resultados (Búsqueda tradicional)")
+            resultados, virtual = self._mostrar_virtual_si_conviene(resultados, "Tradicional")
+            if not virtual:
+                delay = self._agregar_por_lotes(resultados, "Tradicional")
+                self._programar_fila_mostrar_mas(delay, "Tradicional")
+            self.app.ui_callbacks.actualizar_estado(f"✅ {self.texto_cantidad(len(resultados))} resultados (Búsqueda tradicional)")
             self.app.btn_buscar.configure(state='normal', text='Buscar')
             self.app.btn_cancelar.configure(state='disabled')
             
@@ -73,6 +85,27 @@ class ResultsDisplay:
         except Exception as e:
             self.app.ui_callbacks.habilitar_busqueda()
     
+    def _mostrar_virtual_si_conviene(self, resultados, metodo):
+        """Con muchos resultados muestra el ranking completo en la vista virtual
+
+        Retorna (resultados mostrados, True si se usó la vista virtual).
+        """
+        virtual = getattr(self.app, 'virtual_results', None)
+        if not virtual or len(resultados) + self._resultados_restantes() < UMBRAL_VISTA_VIRTUAL:
+            self._registrar(resultados, metodo)
+            return resultados, False
+        
+        if hasattr(self.app, 'search_methods'):
+            resultados = list(resultados) + self.app.search_methods.tomar_restantes()
+        self._registrar(resultados, metodo)
+        virtual.mostrar(resultados, metodo)
+        return resultados, True
+    
+    def _registrar(self, resultados, metodo):
+        """Los resultados mostrados se pueden ordenar, agrupar y filtrar sin buscar de nuevo"""
+        if getattr(self.app, 'results_organizer', None):
+            self.app.results_organizer.registrar(resultados, metodo)
+    
     def _agregar_por_lotes(self, resultados, metodo):
         """Agrega resultados por lotes"""
         batch_size = 5
@@ -81,11 +114,74 @@ class ResultsDisplay:
             delay = (i // batch_size) * 2
             self.app.master.after(delay, lambda b=batch, idx=i, m=metodo: 
                 self._agregar_batch(b, idx, m))
+        
+        return ((len(resultados) // batch_size) + 1) * 2
+    
+    def agregar_pagina(self, pagina, inicio, metodo):
+        """Agrega la siguiente página del ranking al final del TreeView"""
+        self._quitar_fila_mostrar_mas()
+        if getattr(self.app, 'results_organizer', None):
+            self.app.results_organizer.agregar(pagina)
+        
+        if metodo == "Multi":
+            self._agregar_batch_multi(pagina, inicio)
+        else:
+            self._agregar_batch(pagina, inicio, metodo)
+        
+        self.agregar_fila_mostrar_mas(metodo)
+        self.app.ui_callbacks.actualizar_estado(
+            f"✅ {self.texto_cantidad(inicio + len(pagina))} resultados ({metodo})")
+        
+        if hasattr(self.app, 'configurar_scrollbars'):
+            self.app.configurar_scrollbars()
+    
+    def texto_cantidad(self, mostrados):
+        """'N' o 'N de M' si quedan resultados por mostrar, con el límite si se recortó el ranking"""
+        restantes = self._resultados_restantes()
+        texto = f"{mostrados} de {mostrados + restantes}" if restantes else f"{mostrados}"
+        limite = self.app.search_methods.limite_alcanzado() if hasattr(self.app, 'search_methods') else None
+        if limite:
+            texto += f" (máx. {limite:,})"
+        return texto
+    
+    def _resultados_restantes(self):
+        if hasattr(self.app, 'search_methods'):
+            return self.app.search_methods.resultados_restantes()
+        return 0
+    
+    def _programar_fila_mostrar_mas(self, delay, metodo):
+        """Agrega la fila "Mostrar más" cuando terminan los lotes"""
+        self.app.master.after(delay + 10, lambda: self.agregar_fila_mostrar_mas(metodo))
+    
+    def agregar_fila_mostrar_mas(self, metodo):
+        """Fila final para paginar el ranking sin repetir la búsqueda"""
+        restantes = self._resultados_restantes()
+        if restantes <= 0:
+            return
+        
+        try:
+            valores = ("+", "", "", "") if metodo == "Multi" else ("+", "")
+            self.app.tree.insert("", "end",
+                text=f"➕ Mostrar más ({restantes} restantes)",
+                values=valores,
+                tags=('mostrar_mas',))
+            self.app.tree.tag_configure('mostrar_mas', foreground='#1565c0')
+        except Exception as e:
+            print(f"[ERROR] Error agregando fila 'Mostrar más': {e}")
+    
+    def _quitar_fila_mostrar_mas(self):
+        try:
+            for item in self.app.tree.tag_has('mostrar_mas'):
+                self.app.tree.delete(item)
+        except Exception:
+            pass
     
     def _agregar_batch(self, batch, start_index, metodo):
         """Agrega un batch al TreeView CON soporte de subcarpetas"""
         try:
             letra_metodo = metodo[0].upper() if metodo else 'C'
+            pendientes = []
+            sondeos = []
             
             for i, resultado in enumerate(batch):
                 try:
@@ -104,20 +200,24 @@ class ResultsDisplay:
                             values=(letra_metodo, ruta_completa),
                             tags=(tag,))
                         
-                        # NUEVO: Agregar dummy si tiene subcarpetas
-                        if os.path.isdir(ruta_completa) and self._tiene_subcarpetas(ruta_completa):
-                            # Agregar nodo dummy para mostrar flecha de expansión
-                            self.app.tree.insert(item_id, "end", text="Cargando...", values=("", ""))
+                        pendientes.append((item_id, nombre, ruta_abs))
+                        sondeos.append((item_id, ruta_completa))
                             
                 except Exception as e:
                     print(f"[ERROR] Error agregando item: {e}")
                     continue
+            
+            self._solicitar_partes(pendientes)
+            self._sondear_hijos(sondeos)
         except Exception as e:
             print(f"[ERROR] Error en _agregar_batch: {e}")
     
     def _agregar_batch_multi(self, batch, start_index):
         """Agrega batch multi-ubicaciones CON soporte BD"""
         try:
+            pendientes = []
+            sondeos = []
+            
             for i, resultado in enumerate(batch):
                 try:
                     actual_index = start_index + i
@@ -137,33 +237,35 @@ class ResultsDisplay:
                             values=(ubicacion, ruta_abs, demandante, demandado),
                             tags=(tag,))
                         
-                        # Agregar dummy si tiene subcarpetas
-                        if os.path.isdir(ruta_abs) and self._tiene_subcarpetas(ruta_abs):
-                            self.app.tree.insert(item_id, "end", text="Cargando...", values=("", "", "", ""))
+                        sondeos.append((item_id, ruta_abs))
+                        
+                        if len(resultado) <= 4:
+                            pendientes.append((item_id, nombre, ruta_abs))
                             
                 except Exception as e:
                     print(f"[ERROR] Error agregando item multi: {e}")
                     continue
+            
+            self._solicitar_partes(pendientes)
+            self._sondear_hijos(sondeos)
         except Exception as e:
             print(f"[ERROR] Error en _agregar_batch_multi: {e}")
     
-    def _tiene_subcarpetas(self, ruta):
-        """Verifica si una carpeta tiene subcarpetas"""
-        try:
-            if not os.path.exists(ruta) or not os.path.isdir(ruta):
-                return False
-            
-            for entry in os.scandir(ruta):
-                if entry.is_dir():
-                    return True
-            return False
-        except:
-            return False
+    def _solicitar_partes(self, filas):
+        """Las partes (demandante/demandado) se completan en segundo plano"""
+        if filas and getattr(self.app, 'enrichment_service', None):
+            self.app.enrichment_service.solicitar(filas)
+    
+    def _sondear_hijos(self, filas):
+        """Las flechas de expansión se agregan cuando el sondeo en segundo plano responde"""
+        if filas and getattr(self.app, 'children_prober', None):
+            self.app.children_prober.solicitar(filas)
     
     def _finalizar_multi(self, resultados, criterio):
         """Finaliza búsqueda multi"""
         try:
-            self.app.ui_callbacks.actualizar_estado(f"✅ {len(resultados)} resultados en múltiples ubicaciones")
+            self.agregar_fila_mostrar_mas("Multi")
+            self.app.ui_callbacks.actualizar_estado(f"✅ {self.texto_cantidad(len(resultados))} resultados en múltiples ubicaciones")
             self.app.btn_buscar.configure(state='normal', text='Buscar')
             self.app.btn_cancelar.configure(state='disabled')
             
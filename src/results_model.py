@@ -0,0 +1,289 @@
+# src/results_model.py - Orden, agrupación y filtro en memoria de los resultados actuales
+import os
+import re
+
+from .file_delta import ancestro_en, clave_ruta, reubicar
+from .radicado import radicado_desde_ruta
+
+# Claves de orden disponibles (nombre visible en la UI)
+CLAVES_ORDEN = {
+    'nombre': "Nombre",
+    'ruta': "Ruta",
+    'profundidad': "Profundidad",
+    'ubicacion': "Ubicación",
+    'fecha': "Fecha modificación",
+    'demandante': "Demandante",
+    'demandado': "Demandado",
+}
+
+AGRUPACIONES = {
+    None: "Sin agrupar",
+    'ubicacion': "Ubicación",
+    'anio': "Año",
+}
+
+SIN_UBICACION = "Ubicación principal"
+SIN_AÑO = "Sin año"
+
+_RE_AÑO = re.compile(r'(?<!\d)((?:19|20)\d{2})(?!\d)')
+
+
+def ruta_de(resultado):
+    """Ruta que identifica un resultado (absoluta si existe)"""
+    return resultado[2] or resultado[1]
+
+
+class DeltaRutas:
+    """Un delta del explorador (file_delta) listo para consultar ruta por ruta
+
+    Lo creado no se agrega a los resultados: no se sabe si cumple el
+    criterio de la búsqueda. Una ruta eliminada y creada a la vez
+    ("reemplazar" al pegar) sigue existiendo y se conserva.
+    """
+
+    def __init__(self, cambios):
+        creados = {clave_ruta(r) for r in cambios.get('creados', [])}
+        self.quitar = {clave_ruta(r) for r in cambios.get('eliminados', [])} - creados
+        self.mover = {clave_ruta(origen): destino for origen, destino in cambios.get('movidos', [])}
+
+    def __bool__(self):
+        return bool(self.quitar or self.mover)
+
+    def nueva_ruta(self, ruta):
+        """None si ya no existe, la ruta nueva si se movió o la misma si no cambió"""
+        if not ruta:
+            return ruta
+        clave = clave_ruta(ruta)
+        if ancestro_en(clave, self.quitar):
+            return None
+        origen = ancestro_en(clave, self.mover)
+        return reubicar(ruta, origen, self.mover[origen]) if origen else ruta
+
+
+def aplicar_delta(resultados, cambios):
+    """Resultados sin las carpetas eliminadas y con las rutas de las movidas al día
+
+    Retorna (resultados, {ruta_vieja: ruta_nueva o None}) con solo los que cambiaron.
+    """
+    delta = DeltaRutas(cambios)
+    if not delta:
+        return resultados, {}
+
+    nuevos = []
+    cambiadas = {}
+    for resultado in resultados:
+        ruta = ruta_de(resultado)
+        nueva = delta.nueva_ruta(ruta)
+        if nueva != ruta:
+            cambiadas[ruta] = nueva
+            if nueva is None:
+                continue
+            ruta_rel = nueva
+            if resultado[2] and resultado[1]:
+                # La relativa conserva la ubicación base de la absoluta
+                absoluta, relativa = os.path.normpath(resultado[2]), os.path.normpath(resultado[1])
+                base = absoluta[:-len(relativa)] if absoluta.endswith(relativa) else ""
+                if base and clave_ruta(nueva).startswith(clave_ruta(base)):
+                    ruta_rel = os.path.relpath(nueva, base)
+            resultado = (os.path.basename(nueva), ruta_rel, nueva) + tuple(resultado[3:])
+        nuevos.append(resultado)
+    return nuevos, cambiadas
+
+
+class EncabezadoGrupo(tuple):
+    """Fila de encabezado de grupo dentro de la vista: (etiqueta, "", "")"""
+
+    def __new__(cls, etiqueta, cantidad):
+        encabezado = super().__new__(cls, (etiqueta, "", ""))
+        encabezado.cantidad = cantidad
+        return encabezado
+
+
+class ResultsModel:
+    """Resultados de la búsqueda actual con orden, grupos y filtro instantáneos
+
+    Las claves de orden se calculan una sola vez por columna (la primera vez
+    que se piden) y se reutilizan; reordenar es un sort de índices sobre
+    listas ya armadas. Las partes (demandante/demandado) se guardan por ruta
+    en `partes`, compartido con la vista, y se completan a medida que llegan.
+    """
+
+    def __init__(self, resultados, metodo, partes=None):
+        self.resultados = list(resultados)
+        self.rutas = [ruta_de(r) for r in self.resultados]
+        self.metodo = metodo
+        self.partes = partes if partes is not None else {}
+        for resultado in self.resultados:
+            if len(resultado) > 5 and (resultado[4] or resultado[5]):
+                self.partes.setdefault(ruta_de(resultado), (resultado[4], resultado[5]))
+
+        self.clave_orden = None
+        self.descendente = False
+        self.agrupacion = None
+        self.filtro = ""
+
+        self._claves = {}  # {clave: [valor por índice]}
+        self._fechas = None  # {índice: mtime}, se lee aparte porque toca el disco
+        self.vista = list(self.resultados)
+        self.visibles = len(self.resultados)
+
+    # Claves
+
+    def _calcular(self, clave):
+        if clave in self._claves:
+            return self._claves[clave]
+
+        if clave == 'nombre':
+            valores = [r[0].casefold() for r in self.resultados]
+        elif clave == 'ruta':
+            valores = [ruta.casefold() for ruta in self.rutas]
+        elif clave == 'profundidad':
+            valores = [r[1].replace('\\', '/').strip('/').count('/') for r in self.resultados]
+        elif clave == 'ubicacion':
+            valores = [self._ubicacion(r).casefold() for r in self.resultados]
+        elif clave == 'anio':
+            valores = [self._año(r) for r in self.resultados]
+        elif clave == 'texto':
+            valores = [" ".join((r[0], ruta_de(r), self._ubicacion(r))).casefold() for r in self.resultados]
+        else:
+            raise KeyError(clave)
+
+        self._claves[clave] = valores
+        return valores
+
+    def _ubicacion(self, resultado):
+        return resultado[3] if len(resultado) > 3 and resultado[3] else SIN_UBICACION
+
+    @staticmethod
+    def _año(resultado):
+        radicado = radicado_desde_ruta(resultado[0], resultado[2])
+        if radicado:
+            return radicado[12:16]
+        match = _RE_AÑO.search(resultado[0])
+        return match.group(1) if match else SIN_AÑO
+
+    def _valores(self, clave):
+        """Clave de orden por índice; partes y fechas cambian y no se guardan"""
+        if clave in ('demandante', 'demandado'):
+            posicion = 0 if clave == 'demandante' else 1
+            valores = []
+            for ruta in self.rutas:
+                parte = self.partes.get(ruta, ("", ""))[posicion]
+                # Filas sin partes conocidas van al final en orden ascendente
+                valores.append((0, parte.casefold()) if parte else (1, ""))
+            return valores
+        if clave == 'fecha':
+            fechas = self._fechas or {}
+            return [fechas.get(i, 0.0) for i in range(len(self.resultados))]
+        return self._calcular(clave)
+
+    def necesita_fechas(self):
+        return self._fechas is None
+
+    def leer_fechas(self):
+        """Lee las fechas de modificación (hilo de trabajo: toca el disco)"""
+        fechas = {}
+        for indice in range(len(self.rutas)):
+            try:
+                fechas[indice] = os.stat(self.rutas[indice]).st_mtime
+            except OSError:
+                continue
+        return fechas
+
+    def establecer_fechas(self, fechas):
+        self._fechas = fechas
+
+    def aplicar_cambios(self, cambios):
+        """Delta del explorador sin perder orden, grupos ni filtro; retorna {ruta_vieja: ruta_nueva o None}"""
+        resultados, cambiadas = aplicar_delta(self.resultados, cambios)
+        if not cambiadas:
+            return cambiadas
+
+        # Renombrar cambia las partes que salen del nombre: se piden de nuevo
+        for ruta in cambiadas:
+            self.partes.pop(ruta, None)
+        # Las fechas van por índice: se conservan las de lo que sigue (mover no cambia el mtime)
+        if self._fechas is not None:
+            por_ruta = {self.rutas[i]: mtime for i, mtime in self._fechas.items()}
+            anteriores = {nueva: vieja for vieja, nueva in cambiadas.items() if nueva}
+
+        self.resultados = resultados
+        self.rutas = [ruta_de(r) for r in resultados]
+        self._claves = {}
+        if self._fechas is not None:
+            self._fechas = {i: por_ruta[anteriores.get(ruta, ruta)] for i, ruta in enumerate(self.rutas)
+                            if anteriores.get(ruta, ruta) in por_ruta}
+        self.aplicar()
+        return cambiadas
+
+    def sin_partes(self):
+        """Resultados cuyas partes aún no se conocen"""
+        return [r for r, ruta in zip(self.resultados, self.rutas) if ruta not in self.partes]
+
+    # Operaciones
+
+    def ordenar(self, clave, descendente=None):
+        """Ordena por `clave`; sin `descendente` explícito, repetir la clave invierte el orden"""
+        if descendente is None:
+            descendente = not self.descendente if clave == self.clave_orden else False
+        self.clave_orden = clave
+        self.descendente = descendente
+        return self.aplicar()
+
+    def agrupar(self, agrupacion):
+        self.agrupacion = agrupacion
+        return self.aplicar()
+
+    def filtrar(self, texto):
+        self.filtro = texto.strip()
+        return self.aplicar()
+
+    def aplicar(self):
+        """Recalcula la vista: filtro → orden → grupos (con filas de encabezado)"""
+        indices = range(len(self.resultados))
+
+        if self.filtro:
+            terminos = self.filtro.casefold().split()
+            textos = self._calcular('texto')
+            if self.partes:
+                # Las partes llegan después: se suman al texto al filtrar
+                partes, rutas = self.partes, self.rutas
+                textos = [f"{texto} {partes[ruta][0]} {partes[ruta][1]}".casefold() if ruta in partes else texto
+                          for texto, ruta in zip(textos, rutas)]
+            indices = [i for i in indices if all(termino in textos[i] for termino in terminos)]
+
+        indices = list(indices)
+        if self.clave_orden:
+            valores = self._valores(self.clave_orden)
+            indices.sort(key=valores.__getitem__, reverse=self.descendente)
+
+        self.visibles = len(indices)
+        if not self.agrupacion:
+            self.vista = [self.resultados[i] for i in indices]
+            return self.vista
+
+        # Sort estable: dentro de cada grupo se conserva el orden anterior
+        grupos = self._calcular(self.agrupacion)
+        indices.sort(key=grupos.__getitem__)
+
+        vista = []
+        actual = None
+        inicio = 0
+        for i in indices:
+            if grupos[i] != actual:
+                if actual is not None:
+                    vista[inicio] = EncabezadoGrupo(vista[inicio][0], len(vista) - inicio - 1)
+                actual = grupos[i]
+                inicio = len(vista)
+                vista.append(EncabezadoGrupo(self._etiqueta_grupo(i), 0))
+            vista.append(self.resultados[i])
+        if actual is not None:
+            vista[inicio] = EncabezadoGrupo(vista[inicio][0], len(vista) - inicio - 1)
+
+        self.vista = vista
+        return vista
+
+    def _etiqueta_grupo(self, indice):
+        if self.agrupacion == 'ubicacion':
+            return self._ubicacion(self.resultados[indice])
+        return self._calcular('anio')[indice]
@@ -0,0 +1,405 @@
+# src/results_organizer.py - Ordenar, agrupar y filtrar los resultados mostrados sin buscar de nuevo
+import os
+import threading
+import time
+
+from .results_model import AGRUPACIONES, CLAVES_ORDEN, DeltaRutas, ResultsModel, aplicar_delta, ruta_de
+
+# Columnas del TreeView de resultados que ordenan al hacer clic en el encabezado
+CLAVE_POR_COLUMNA = {
+    '#0': 'nombre',
+    'Método': 'ubicacion',
+    'Ruta': 'ruta',
+    'Demandante': 'demandante',
+    'Demandado': 'demandado',
+}
+FLECHAS = (" ▲", " ▼")
+
+
+class ResultsOrganizer:
+    """Une los controles de orden/grupo/filtro con ResultsModel y la vista virtual
+
+    Cada búsqueda registra aquí lo que muestra. El modelo se arma recién
+    cuando el usuario ordena, agrupa o filtra: toma también los resultados
+    del ranking aún no mostrados y desde ahí todo se ve en la vista virtual.
+    """
+
+    ESPERA_FILTRO_MS = 150
+    ESPERA_REORDEN_MS = 500
+
+    def __init__(self, app):
+        self.app = app
+        self.resultados = []
+        self.metodo = None
+        self.modelo = None
+        self._filtro_pendiente = None
+        self._reorden_pendiente = None
+        self._encabezado_presionado = None
+        self._actualizando_controles = False
+
+    def configurar(self):
+        """Vincula encabezados y controles (después de crear la interfaz)"""
+        tree = self.app.tree
+        tree.bind('<ButtonPress-1>', self._on_presionar_encabezado, add='+')
+        tree.bind('<ButtonRelease-1>', self._on_soltar_encabezado, add='+')
+
+        entry_filtro = getattr(self.app, 'entry_filtro', None)
+        if entry_filtro:
+            entry_filtro.bind('<KeyRelease>', self.programar_filtro)
+        combo_orden = getattr(self.app, 'combo_orden', None)
+        if combo_orden:
+            combo_orden.bind('<<ComboboxSelected>>', self._on_combo_orden)
+        combo_agrupar = getattr(self.app, 'combo_agrupar', None)
+        if combo_agrupar:
+            combo_agrupar.bind('<<ComboboxSelected>>', self._on_combo_agrupar)
+
+    # Registro de la búsqueda actual
+
+    def registrar(self, resultados, metodo):
+        """Una búsqueda nueva muestra `resultados`; lo anterior se descarta"""
+        self.resultados = list(resultados)
+        self.metodo = metodo
+        self.modelo = None
+        self._restablecer_controles()
+
+    def agregar(self, pagina):
+        """Página agregada con "Mostrar más"""
+        if self.modelo is None:
+            self.resultados.extend(pagina)
+
+    def reiniciar(self):
+        self.resultados = []
+        self.modelo = None
+        for pendiente in (self._filtro_pendiente, self._reorden_pendiente):
+            if pendiente:
+                try:
+                    self.app.master.after_cancel(pendiente)
+                except Exception:
+                    pass
+        self._filtro_pendiente = self._reorden_pendiente = None
+        self._actualizar_encabezados()
+
+    def _asegurar_modelo(self):
+        if self.modelo is not None:
+            return self.modelo
+        if not self.resultados:
+            return None
+
+        # Lo que el ranking aún no mostró también se ordena y filtra
+        resultados = self.resultados
+        if hasattr(self.app, 'search_methods'):
+            resultados = resultados + self.app.search_methods.tomar_restantes()
+
+        virtual = self.app.virtual_results
+        partes = virtual.partes_conocidas() if virtual.activa else self._partes_filas_reales()
+        self.modelo = ResultsModel(resultados, self.metodo, partes)
+        return self.modelo
+
+    def _partes_filas_reales(self):
+        """{ruta: (demandante, demandado)} ya escritas en las filas paginadas (no se vuelven a pedir)"""
+        tree = self.app.tree
+        registradas = self._por_texto_ruta(self.resultados)
+        partes = {}
+        for item_id in tree.get_children():
+            try:
+                demandante = tree.set(item_id, "Demandante")
+                demandado = tree.set(item_id, "Demandado")
+            except Exception:
+                return partes  # Sin columnas de partes
+            if not (demandante or demandado):
+                continue
+            valores = tree.item(item_id, 'values')
+            resultado = registradas.get(valores[1] if len(valores) > 1 else None)
+            if resultado:
+                partes[ruta_de(resultado)] = (demandante, demandado)
+        return partes
+
+    @staticmethod
+    def _por_texto_ruta(resultados):
+        """{texto de la columna Ruta: tupla registrada} (relativa o absoluta)"""
+        registradas = {}
+        for resultado in resultados:
+            registradas.setdefault(resultado[1], resultado)
+            if resultado[2]:
+                registradas.setdefault(resultado[2], resultado)
+        return registradas
+
+    # Operaciones
+
+    def ordenar_por(self, clave, descendente=None):
+        modelo = self._asegurar_modelo()
+        if not modelo:
+            return
+
+        if clave == 'fecha' and modelo.necesita_fechas():
+            self._leer_fechas(lambda: self.ordenar_por(clave, descendente))
+            return
+        inicio = time.perf_counter()
+        modelo.ordenar(clave, descendente)
+        self._mostrar(inicio)
+        if clave in ('demandante', 'demandado'):
+            # Después de _mostrar: pasar a la vista virtual descarta lo pedido para las filas reales
+            self._completar_partes()
+
+    def agrupar_por(self, agrupacion):
+        modelo = self._asegurar_modelo()
+        if not modelo:
+            return
+        inicio = time.perf_counter()
+        modelo.agrupar(agrupacion)
+        self._mostrar(inicio)
+
+    def programar_filtro(self, event=None):
+        """El filtro se aplica cuando se deja de escribir un momento"""
+        if self._filtro_pendiente:
+            self.app.master.after_cancel(self._filtro_pendiente)
+        self._filtro_pendiente = self.app.master.after(self.ESPERA_FILTRO_MS, self._aplicar_filtro)
+
+    def _aplicar_filtro(self):
+        self._filtro_pendiente = None
+        texto = self.app.entry_filtro.get()
+        if self.modelo is None and not texto.strip():
+            return
+        modelo = self._asegurar_modelo()
+        if not modelo or modelo.filtro == texto.strip():
+            return
+        inicio = time.perf_counter()
+        modelo.filtrar(texto)
+        self._mostrar(inicio)
+
+    def _mostrar(self, inicio, offset=0):
+        modelo = self.modelo
+        virtual = self.app.virtual_results
+        if not virtual.activa:
+            self._quitar_filas_reales()
+        virtual.mostrar(modelo.vista, modelo.metodo, modelo.partes)
+        if offset:
+            virtual.desplazar_a(offset)
+        self._actualizar_encabezados()
+
+        ms = (time.perf_counter() - inicio) * 1000
+        detalle = []
+        if modelo.filtro:
+            detalle.append(f"filtro '{modelo.filtro}'")
+        if modelo.clave_orden:
+            sentido = "desc." if modelo.descendente else "asc."
+            detalle.append(f"orden {CLAVES_ORDEN[modelo.clave_orden].lower()} {sentido}")
+        if modelo.agrupacion:
+            detalle.append(f"por {AGRUPACIONES[modelo.agrupacion].lower()}")
+        cantidad = (f"{modelo.visibles} de {len(modelo.resultados)}"
+                    if modelo.visibles != len(modelo.resultados) else f"{modelo.visibles}")
+        self.app.ui_callbacks.actualizar_estado(
+            f"✅ {cantidad} resultados ({', '.join(detalle) or 'orden original'}) en {ms:.0f}ms")
+
+    def _quitar_filas_reales(self):
+        """Las filas paginadas se reemplazan por la vista virtual"""
+        for servicio in ('enrichment_service', 'children_prober'):
+            if getattr(self.app, servicio, None):
+                getattr(self.app, servicio).nueva_busqueda()
+        tree = self.app.tree
+        tree.delete(*tree.get_children())
+
+    # Cambios hechos desde el explorador
+
+    def aplicar_cambios(self, cambios):
+        """Delta del explorador: lo eliminado sale de los resultados y lo movido cambia de ruta, sin buscar de nuevo
+
+        También se corrige lo que el ranking aún no mostró ("Mostrar más").
+        Retorna cuántos resultados cambiaron.
+        """
+        if hasattr(self.app, 'search_methods'):
+            self.app.search_methods.aplicar_cambios(cambios)
+
+        anteriores = self.resultados
+        self.resultados, cambiadas = aplicar_delta(anteriores, cambios)
+        virtual = self.app.virtual_results
+
+        if self.modelo is not None:
+            cambiadas = self.modelo.aplicar_cambios(cambios)
+            if cambiadas:
+                self._mostrar(time.perf_counter(), virtual.offset)
+        elif virtual.activa:
+            if cambiadas:
+                partes = virtual.partes_conocidas()
+                for ruta in cambiadas:
+                    partes.pop(ruta, None)
+                offset = virtual.offset
+                virtual.mostrar(self.resultados, self.metodo, partes)
+                virtual.desplazar_a(offset)
+        else:
+            cambiadas = self._actualizar_filas_reales(DeltaRutas(cambios), anteriores)
+        return len(cambiadas)
+
+    def _actualizar_filas_reales(self, delta, anteriores):
+        """Filas paginadas (y subcarpetas expandidas): se borran o se renombran en su lugar
+
+        La columna Ruta puede mostrar la ruta relativa; la absoluta sale de
+        la tupla registrada con ese texto. Las subcarpetas expandidas ya
+        muestran la absoluta.
+        """
+        if not delta:
+            return {}
+        tree = self.app.tree
+        registradas = self._por_texto_ruta(anteriores)
+
+        cambiadas = {}
+        pendientes = list(tree.get_children())
+        while pendientes:
+            item_id = pendientes.pop()
+            valores = list(tree.item(item_id, 'values'))
+            mostrada = valores[1] if len(valores) > 1 else None
+            resultado = registradas.get(mostrada)
+            ruta = ruta_de(resultado) if resultado else mostrada
+            nueva = delta.nueva_ruta(ruta)
+            if nueva is None and ruta:
+                cambiadas[ruta] = None
+                tree.delete(item_id)
+                continue
+            if nueva != ruta:
+                cambiadas[ruta] = nueva
+                if resultado and mostrada == resultado[1] and mostrada != resultado[2]:
+                    # Se mostraba la relativa: se muestra la relativa nueva
+                    nuevo_resultado = aplicar_delta([resultado], {'movidos': [(ruta, nueva)]})[0][0]
+                    valores[1] = nuevo_resultado[1]
+                else:
+                    valores[1] = nueva
+                icono = str(tree.item(item_id, 'text')).split(' ', 1)[0]
+                tree.item(item_id, text=f"{icono} {os.path.basename(nueva)}", values=valores)
+            pendientes.extend(tree.get_children(item_id))
+        return cambiadas
+
+    # Claves que requieren trabajo de fondo
+
+    def _leer_fechas(self, continuar):
+        modelo = self.modelo
+        self.app.ui_callbacks.actualizar_estado(f"Leyendo fechas de {len(modelo.resultados)} carpetas...")
+
+        def worker():
+            fechas = modelo.leer_fechas()
+
+            def listo():
+                modelo.establecer_fechas(fechas)
+                if self.modelo is modelo:
+                    continuar()
+
+            self.app.ui_dispatcher.publicar(listo)
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def _completar_partes(self):
+        """Ordenar por partes necesita las de todas las filas, no solo las vistas"""
+        enrichment = getattr(self.app, 'enrichment_service', None)
+        if not enrichment:
+            return
+        filas = [(ruta_de(r), r[0], r[2]) for r in self.modelo.sin_partes()]
+        if filas:
+            enrichment.solicitar(filas, destino=self._on_partes)
+
+    def _on_partes(self, actualizaciones):
+        modelo = self.modelo
+        if modelo is None:
+            return
+        for ruta, demandante, demandado in actualizaciones:
+            modelo.partes[ruta] = (demandante, demandado)
+        self.app.virtual_results.aplicar_partes(actualizaciones)
+
+        # Reordenar una vez que dejan de llegar partes
+        if modelo.clave_orden in ('demandante', 'demandado'):
+            if self._reorden_pendiente:
+                self.app.master.after_cancel(self._reorden_pendiente)
+            self._reorden_pendiente = self.app.master.after(self.ESPERA_REORDEN_MS, self._reordenar)
+
+    def _reordenar(self):
+        self._reorden_pendiente = None
+        if self.modelo is None:
+            return
+        offset = self.app.virtual_results.offset
+        inicio = time.perf_counter()
+        self.modelo.aplicar()
+        self._mostrar(inicio, offset)
+
+    # Encabezados y controles
+
+    def _columna(self, x):
+        """Nombre de la columna bajo x ('#0' para la del árbol)"""
+        tree = self.app.tree
+        column_id = tree.identify_column(x)
+        if column_id == '#0':
+            return column_id
+        visibles = list(tree['displaycolumns'])
+        if not visibles or visibles == ['#all']:
+            visibles = list(tree['columns'])
+        try:
+            return visibles[int(column_id[1:]) - 1]
+        except (ValueError, IndexError):
+            return None
+
+    def _on_presionar_encabezado(self, event):
+        if self.app.tree.identify_region(event.x, event.y) == 'heading':
+            self._encabezado_presionado = (self._columna(event.x), event.x)
+        else:
+            self._encabezado_presionado = None
+
+    def _on_soltar_encabezado(self, event):
+        presionado, self._encabezado_presionado = self._encabezado_presionado, None
+        if not presionado or self.app.tree.identify_region(event.x, event.y) != 'heading':
+            return
+        columna, x = presionado
+        # Arrastrar un encabezado reordena columnas (TreeColumnConfig), no ordena
+        if abs(event.x - x) > 5 or self._columna(event.x) != columna:
+            return
+        clave = CLAVE_POR_COLUMNA.get(columna)
+        if clave:
+            self.ordenar_por(clave)
+
+    def _on_combo_orden(self, event=None):
+        if self._actualizando_controles:
+            return
+        etiqueta = self.app.combo_orden.get()
+        clave = next((c for c, texto in CLAVES_ORDEN.items() if texto == etiqueta), None)
+        if clave:
+            self.ordenar_por(clave, descendente=False)
+
+    def _on_combo_agrupar(self, event=None):
+        if self._actualizando_controles:
+            return
+        etiqueta = self.app.combo_agrupar.get()
+        self.agrupar_por(next((a for a, texto in AGRUPACIONES.items() if texto == etiqueta), None))
+
+    def _restablecer_controles(self):
+        self._actualizando_controles = True
+        try:
+            if getattr(self.app, 'entry_filtro', None):
+                self.app.entry_filtro.delete(0, 'end')
+            if getattr(self.app, 'combo_orden', None):
+                self.app.combo_orden.set("")
+            if getattr(self.app, 'combo_agrupar', None):
+                self.app.combo_agrupar.set(AGRUPACIONES[None])
+        finally:
+            self._actualizando_controles = False
+        self._actualizar_encabezados()
+
+    def _actualizar_encabezados(self):
+        """Flecha de orden en el encabezado de la columna activa"""
+        tree = self.app.tree
+        activa = self.modelo.clave_orden if self.modelo else None
+        flecha = FLECHAS[1] if self.modelo and self.modelo.descendente else FLECHAS[0]
+        columnas = set(tree['columns']) | {'#0'}
+        for columna, clave in CLAVE_POR_COLUMNA.items():
+            if columna not in columnas:
+                continue
+            try:
+                texto = str(tree.heading(columna, 'text'))
+                for f in FLECHAS:
+                    if texto.endswith(f):
+                        texto = texto[:-len(f)]
+                tree.heading(columna, text=texto + flecha if clave == activa else texto)
+            except Exception:
+                continue
+
+        if self.modelo and getattr(self.app, 'combo_orden', None) and activa:
+            self._actualizando_controles = True
+            try:
+                self.app.combo_orden.set(CLAVES_ORDEN[activa])
+            finally:
+                self._actualizando_controles = False
@@ -3,6 +3,8 @@ import time
 import threading
 import os
 
+from .results_display import ResultsDisplay
+
 class SearchCoordinator:
     """Coordina las búsquedas sin bloquear la UI - OPTIMIZADO sin redundancias"""
     
@@ -52,7 +54,7 @@ class SearchCoordinator:
             
             # Actualizar UI de forma asíncrona
             if not silenciosa:
-                self.app.master.after(0, lambda: self.app.ui_callbacks.actualizar_estado("Buscando..."))
+                self.app.ui_callbacks.actualizar_estado_async("Buscando...")
             
             # 1. INTENTAR BÚSQUEDA EN MÚLTIPLES UBICACIONES PRIMERO
             multi_results = None
@@ -82,44 +84,38 @@ class SearchCoordinator:
             
             if not self.search_cancelled:
                 # Programar actualización de UI
-                self.app.master.after(0, self._on_search_completed_async, 
-                                    multi_results, criterio, metodo, search_time, silenciosa)
+                self.app.ui_dispatcher.publicar(self._on_search_completed_async,
+                                                multi_results, criterio, metodo, search_time, silenciosa)
                 
         except Exception as e:
             print(f"Error en búsqueda: {e}")
             if not self.search_cancelled:
-                self.app.master.after(0, self._on_search_error, str(e))
+                self.app.ui_dispatcher.publicar(self._on_search_error, str(e))
     
     def _search_multi_locations_fast(self, criterio):
         """Búsqueda rápida en múltiples ubicaciones SIN bloquear"""
-        all_results = []
-        
         try:
-            enabled_locations = self.app.multi_location_search.get_enabled_locations()
+            plan = self.app.multi_location_search.get_scan_plan()
+            # El ranking queda en search_methods para "Mostrar más"
+            ranking = self.app.search_methods.nuevo_ranking(criterio, "Multi")
+            vistos = set()
             
-            for location in enabled_locations:
+            # Ubicaciones anidadas o duplicadas se recorren una sola vez
+            for root in plan.scan_roots:
                 if self.search_cancelled:
                     break
                 
                 # Búsqueda super rápida por ubicación (max 50ms cada una)
-                location_results = self._search_single_location_fast(location, criterio)
-                
-                # Agregar metadatos de ubicación
-                for result in location_results:
-                    if isinstance(result, tuple) and len(result) >= 3:
-                        nombre, ruta_rel, ruta_abs = result[:3]
-                        enhanced_result = (nombre, ruta_rel, ruta_abs, location['name'])
-                        all_results.append(enhanced_result)
+                location_results = self._search_single_location_fast(root.location, criterio)
                 
-                # Límite total para evitar sobrecarga
-                if len(all_results) >= 200:
-                    break
+                # Ranking global: las mejores coincidencias de cualquier ubicación
+                ranking.extend(plan.iter_merged(root, location_results, vistos))
+            
+            return self.app.search_methods.siguiente_pagina()[1]
             
         except Exception as e:
             print(f"[DEBUG] Error en búsqueda multi-ubicaciones: {e}")
             return []
-        
-        return all_results
     
     def _search_single_location_fast(self, location, criterio):
         """Búsqueda ultra-rápida en una sola ubicación"""
@@ -128,24 +124,19 @@ class SearchCoordinator:
             
             # USAR CACHE SI EXISTE con nombre único por ubicación
             from .cache_manager import CacheManager
-            import hashlib
             
-            # Generar nombre único de archivo cache basado en la ruta
-            path_hash = hashlib.md5(location['path'].encode()).hexdigest()[:8]
-            cache_filename = f"cache_{path_hash}.pkl"
+            # Nombre único de archivo cache basado en la ruta
+            cache_filename = CacheManager.cache_file_for(location['path'])
             
-            temp_cache = CacheManager(location['path'])
-            temp_cache.cache_file = cache_filename
+            # Cache de la ubicación ya cargado (se relee solo si se reconstruyó)
+            temp_cache = CacheManager.de_ubicacion(location['path'])
             
-            # Cargar cache existente con el nombre correcto
-            cache_loaded = temp_cache.cargar_cache()
-            
-            if cache_loaded and temp_cache.cache.valido and len(temp_cache.cache.directorios.get('directorios', [])) > 0:
+            if temp_cache and len(temp_cache.cache.directorios.get('directorios', [])) > 0:
                 print(f"[DEBUG] Cache válido encontrado para {location['name']}: {temp_cache.cache.directorios['total']} directorios")
                 results = temp_cache.buscar_en_cache(criterio)
                 if results:
                     print(f"[DEBUG] Cache devolvió {len(results)} resultados para {location['name']}")
-                    return results[:20]  # Limitar a 20
+                    return results
                 else:
                     print(f"[DEBUG] Cache no encontró resultados para '{criterio}' en {location['name']}")
                     return []
@@ -174,15 +165,12 @@ class SearchCoordinator:
                 if self.search_cancelled:
                     break
                 
-                # Procesar solo los primeros 20 directorios por nivel
-                for dirname in dirs[:20]:
+                # El ranking global decide qué resultados se muestran
+                for dirname in dirs:
                     if criterio_lower in dirname.lower():
                         ruta_completa = os.path.join(root, dirname)
                         ruta_relativa = os.path.relpath(ruta_completa, path)
                         results.append((dirname, ruta_relativa, ruta_completa))
-                        
-                        if len(results) >= 25:  # Max 25 resultados por ubicación
-                            return results
                 
                 # Limitar profundidad
                 depth = root.replace(path, '').count(os.sep)
@@ -215,7 +203,10 @@ class SearchCoordinator:
         """Búsqueda desde cache - OPTIMIZADA"""
         try:
             resultados = self.app.cache_manager.buscar_en_cache(criterio)
-            return resultados[:100] if resultados else []  # Limitar a 100 resultados
+            if not resultados:
+                return []
+            self.app.search_methods.nuevo_ranking(criterio, "Cache").extend(resultados)
+            return self.app.search_methods.siguiente_pagina()[1]
         except Exception as e:
             print(f"Error en búsqueda cache: {e}")
             return []
@@ -226,9 +217,9 @@ class SearchCoordinator:
             if not os.path.exists(self.app.search_engine.ruta_base):
                 return []
             
-            # Configurar límites más estrictos
+            # Todas las coincidencias van al ranking global; se muestra la primera página
             self.app.search_engine.busqueda_cancelada = False
-            resultados = []
+            ranking = self.app.search_methods.nuevo_ranking(criterio, "Tradicional")
             criterio_lower = criterio.lower()
             start_time = time.time()
             processed = 0
@@ -238,15 +229,11 @@ class SearchCoordinator:
                 if time.time() - start_time > 2.0 or self.search_cancelled:
                     break
                 
-                # Procesar directorios con límite
-                for dirname in dirs[:30]:  # Solo primeros 30 por nivel
+                for dirname in dirs:
                     if criterio_lower in dirname.lower():
                         ruta_completa = os.path.join(root, dirname)
                         ruta_relativa = os.path.relpath(ruta_completa, self.app.search_engine.ruta_base)
-                        resultados.append((dirname, ruta_relativa, ruta_completa))
-                        
-                        if len(resultados) >= 150:  # Max 150 resultados
-                            return resultados
+                        ranking.push((dirname, ruta_relativa, ruta_completa))
                 
                 processed += 1
                 # Limitar profundidad más agresivamente
@@ -258,7 +245,7 @@ class SearchCoordinator:
                 if processed % 50 == 0 and self.search_cancelled:
                     break
             
-            return resultados
+            return self.app.search_methods.siguiente_pagina()[1]
             
         except Exception as e:
             print(f"Error en búsqueda tradicional: {e}")
@@ -276,8 +263,12 @@ class SearchCoordinator:
         else:
             self.app.ui_callbacks.mostrar_resultados(resultados, metodo, tiempo)
         
+        # El resto del ranking se pagina sin repetir la búsqueda
+        display = ResultsDisplay(self.app)
+        display.agregar_fila_mostrar_mas(metodo)
+        
         # Mensaje de estado
-        mensaje = f"✅ {len(resultados)} carpetas encontradas ({metodo}) - {tiempo:.2f}s"
+        mensaje = f"✅ {display.texto_cantidad(len(resultados))} carpetas encontradas ({metodo}) - {tiempo:.2f}s"
         self.app.ui_callbacks.actualizar_estado(mensaje)
         
         # Agregar al historial si no es silenciosa
@@ -345,11 +336,71 @@ class SearchCoordinator:
             if not cache_stats['valido'] or cache_stats['carpetas'] == 0:
                 resultado += "\n\nRecomendación: El caché se construirá automáticamente en la próxima búsqueda"
             
+            resultado += self._diagnostico_bd()
+            resultado += self._diagnostico_ui()
+            
             self.app.ui_callbacks.mostrar_info("Resultados del diagnóstico", resultado)
             
         except Exception as e:
             self.app.ui_callbacks.mostrar_error(f"Error en diagnóstico: {str(e)}")
     
+    def _diagnostico_ui(self):
+        """Sección del despachador de UI: actualizaciones combinadas y costo por cuadro"""
+        dispatcher = getattr(self.app, 'ui_dispatcher', None)
+        if not dispatcher:
+            return ""
+        stats = dispatcher.get_stats()
+        return (f"\n\nActualizaciones de UI: {stats['ejecutadas']} aplicadas de {stats['publicadas']} "
+                f"({stats['descartadas']} estados descartados, {stats['combinadas']} lotes combinados, "
+                f"{stats['pendientes']} pendientes)\n"
+                f"Cuadros: {stats['cuadros']}, máx {stats['max_ms_cuadro']:.1f}ms, "
+                f"{stats['cuadros_excedidos']} sobre presupuesto, {stats['errores']} errores")
+    
+    def _diagnostico_bd(self):
+        """Sección de base de datos del diagnóstico: latencias, pool, cache y circuito"""
+        db = getattr(self.app, 'database_manager', None)
+        if not db:
+            return "\n\nBase de datos: no disponible (pyodbc no instalado)"
+        
+        try:
+            stats = db.get_db_stats()
+        except Exception as e:
+            return f"\n\nBase de datos: error obteniendo estadísticas ({e})"
+        
+        lineas = ["", "", "Base de datos:"]
+        
+        circuito = stats['circuito']
+        estado = circuito['estado']
+        if circuito['reintento_en']:
+            estado += f" (reintento en {circuito['reintento_en']:.0f}s)"
+        lineas.append(f"Circuito: {estado} - {circuito['fallos']} fallos, {circuito['rechazadas']} omitidas")
+        
+        for fase, lat in stats['latencias'].items():
+            if lat['conteo']:
+                lineas.append(f"{fase}: {lat['conteo']} × prom {lat['promedio_ms']:.0f}ms, "
+                              f"p50 {lat['p50_ms']:.0f}ms, p95 {lat['p95_ms']:.0f}ms, máx {lat['max_ms']:.0f}ms")
+            else:
+                lineas.append(f"{fase}: sin mediciones")
+        
+        pool = stats['pool']
+        lineas.append(f"Pool: {pool['en_uso']} en uso, {pool['inactivas']} inactivas de {pool['max_size']} "
+                      f"(pico {pool['pico_en_uso']}, {pool['creadas']} creadas, {pool['timeouts']} timeouts)")
+        
+        cache = stats['cache']
+        lineas.append(f"Cache partes: {cache['hit_rate']:.0%} aciertos "
+                      f"({cache['hits_memoria']} memoria, {cache['hits_disco']} disco, {cache['misses']} fallos), "
+                      f"{cache['size']}/{cache['max_size']} en memoria, {cache['disco']} en disco")
+        
+        c = stats['contadores']
+        lineas.append(f"Resueltos: {c['resueltos_cache']} cache, {c['resueltos_espejo']} réplica, "
+                      f"{c['resueltos_servidor']} servidor ({c['lotes']} lotes), {c['omitidos_circuito']} omitidos")
+        
+        if 'espejo' in stats:
+            espejo = stats['espejo']
+            lineas.append(f"Réplica local: {espejo['filas']:,} partes, última sync {espejo['ultima_sync'] or 'nunca'}")
+        
+        return "\n".join(lineas)
+    
     def limpiar_cache(self):
         """Limpia el cache completamente - MÉTODO MANTENIDO para compatibilidad"""
         self.app.cache_manager.limpiar()
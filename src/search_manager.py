@@ -109,7 +109,7 @@ class SearchManager:
                             [], "Tradicional", tiempo_total
                         )
                 
-                self.ui_callbacks.app.master.after(0, finalizar_busqueda)
+                self.ui_callbacks.app.ui_dispatcher.publicar(finalizar_busqueda)
                 
             else:
                 self.ui_callbacks.actualizar_estado_async("Error en la búsqueda tradicional")
@@ -2,19 +2,89 @@
 import os
 import time
 import threading
-import hashlib
+
+from .constants import RESULTADOS_POR_PAGINA, PREFIJO_BUSQUEDA_PARTES
+from .result_ranking import RankedMerger
+from .results_model import aplicar_delta
+from .radicado import radicado_desde_criterio
 
 class SearchMethods:
     """Maneja todos los métodos de búsqueda"""
     
     def __init__(self, app):
         self.app = app
+        
+        # Ranking de la última búsqueda para paginar sin volver a buscar
+        self.ranking = None
+        self.ranking_criterio = ""
+        self.ranking_modo = None
+        self.ranking_mostrados = 0
+    
+    def nuevo_ranking(self, criterio, modo):
+        """Reinicia el ranking global para una nueva búsqueda"""
+        self.ranking = RankedMerger(criterio)
+        self.ranking_criterio = criterio
+        self.ranking_modo = modo
+        self.ranking_mostrados = 0
+        return self.ranking
+    
+    def siguiente_pagina(self):
+        """Toma la siguiente página del ranking: (índice_inicial, resultados)"""
+        if not self.ranking:
+            return 0, []
+        inicio = self.ranking_mostrados
+        pagina = self.ranking.page(inicio, RESULTADOS_POR_PAGINA)
+        self.ranking_mostrados += len(pagina)
+        return inicio, pagina
+    
+    def resultados_restantes(self):
+        """Cantidad de resultados rankeados aún no mostrados"""
+        if not self.ranking:
+            return 0
+        return max(0, len(self.ranking) - self.ranking_mostrados)
+    
+    def limite_alcanzado(self):
+        """Capacidad del ranking si se descartaron resultados por superarla, si no None"""
+        if self.ranking and self.ranking.descartados:
+            return self.ranking.capacidad
+        return None
+    
+    def tomar_restantes(self):
+        """Todos los resultados rankeados aún no mostrados (para la vista virtual)"""
+        if not self.ranking:
+            return []
+        restantes = self.ranking.page(self.ranking_mostrados, len(self.ranking))
+        self.ranking_mostrados += len(restantes)
+        return restantes
+    
+    def aplicar_cambios(self, cambios):
+        """Quita o renombra en lo aún no mostrado lo que el explorador eliminó o movió"""
+        if not self.ranking:
+            return
+        restantes = self.ranking.page(self.ranking_mostrados, len(self.ranking))
+        nuevos, cambiadas = aplicar_delta(restantes, cambios)
+        if cambiadas:
+            self.ranking.reemplazar_desde(self.ranking_mostrados, nuevos)
+    
+    def mostrar_mas(self):
+        """Muestra la siguiente página del ranking sin repetir la búsqueda"""
+        inicio, pagina = self.siguiente_pagina()
+        if not pagina:
+            return
+        
+        from .results_display import ResultsDisplay
+        ResultsDisplay(self.app).agregar_pagina(pagina, inicio, self.ranking_modo)
     
     def ejecutar_busqueda(self, criterio):
         """Punto de entrada principal para búsquedas"""
         self.app.ui_callbacks.limpiar_resultados()
         self.app.ui_callbacks.actualizar_estado("Buscando...")
         
+        # 0. Búsqueda inversa por nombre de parte
+        if criterio.lower().startswith(PREFIJO_BUSQUEDA_PARTES):
+            self.buscar_por_partes(criterio[len(PREFIJO_BUSQUEDA_PARTES):].strip())
+            return
+        
         # 1. Multi-ubicaciones
         if hasattr(self.app, 'multi_location_search'):
             enabled_locations = self.app.multi_location_search.get_enabled_locations()
@@ -22,12 +92,11 @@ class SearchMethods:
                 self.app.master.after(5, lambda: self.buscar_multi_ubicaciones(criterio))
                 return
         
-        # 2. Cache principal
+        # 2. Cache principal (las partes se completan en segundo plano)
         if self._tiene_cache_valido():
             resultados = self._buscar_cache(criterio)
             if resultados:
                 from .results_display import ResultsDisplay
-                resultados = self._enriquecer_con_bd(resultados, criterio)
                 ResultsDisplay(self.app).mostrar_instantaneos(resultados, criterio, "Cache")
                 return
         
@@ -38,49 +107,91 @@ class SearchMethods:
     def buscar_multi_ubicaciones(self, criterio):
         """Búsqueda asíncrona en múltiples ubicaciones"""
         def worker():
-            all_results = []
-            enabled_locations = self.app.multi_location_search.get_enabled_locations()
+            plan = self.app.multi_location_search.get_scan_plan()
+            ranking = self.nuevo_ranking(criterio, "Multi")
+            vistos = set()
             
-            for location in enabled_locations:
+            # Ubicaciones anidadas comparten la búsqueda de su raíz; los
+            # resultados entran al ranking global a medida que llega cada raíz
+            for root in plan.scan_roots:
                 try:
-                    results = self._buscar_ubicacion(location, criterio)
-                    for result in results:
-                        if isinstance(result, tuple) and len(result) >= 3:
-                            nombre, ruta_rel, ruta_abs = result[:3]
-                            all_results.append((nombre, ruta_rel, ruta_abs, location['name']))
-                    
-                    if len(all_results) >= 100:
-                        break
+                    results = self._buscar_ubicacion(root.location, criterio)
+                    ranking.extend(plan.iter_merged(root, results, vistos))
                 except Exception as e:
                     continue
             
-            all_results = self._enriquecer_con_bd(all_results, criterio)
+            _, all_results = self.siguiente_pagina()
             
             from .results_display import ResultsDisplay
-            self.app.master.after(0, lambda: 
-                ResultsDisplay(self.app).mostrar_multi(all_results, criterio))
+            self.app.ui_dispatcher.publicar(ResultsDisplay(self.app).mostrar_multi, all_results, criterio)
         
         threading.Thread(target=worker, daemon=True).start()
     
+    def buscar_por_partes(self, nombre):
+        """Búsqueda inversa: nombre de parte → radicados (réplica) → carpetas (índice)"""
+        def terminar(resultados, mensaje=None):
+            from .results_display import ResultsDisplay
+            if resultados:
+                ResultsDisplay(self.app).mostrar_instantaneos(resultados, f"{PREFIJO_BUSQUEDA_PARTES} {nombre}", "Partes")
+            else:
+                self.app.ui_callbacks.actualizar_estado(mensaje or "No se encontraron resultados")
+                self.app.ui_callbacks.habilitar_busqueda()
+        
+        mirror = getattr(getattr(self.app, 'database_manager', None), 'mirror', None)
+        if not nombre or not mirror or not mirror.esta_cargado():
+            terminar([], "La réplica local de partes no está disponible")
+            return
+        
+        # Sin paginación: descartar el ranking de la búsqueda anterior
+        self.nuevo_ranking(nombre, "Partes")
+        
+        def worker():
+            radicados = mirror.buscar_radicados(nombre)
+            resultados = self._carpetas_de_radicados(radicados) if radicados else []
+            self.app.ui_dispatcher.publicar(terminar,
+                resultados, f"Sin carpetas para {len(radicados)} radicados de '{nombre}'" if radicados else None)
+        
+        threading.Thread(target=worker, daemon=True).start()
+    
+    def _carpetas_de_radicados(self, radicados):
+        """Carpetas de los radicados en el cache principal y en cada ubicación"""
+        from .cache_manager import CacheManager
+        resultados = []
+        vistos = set()
+        
+        if self._tiene_cache_valido():
+            for resultado in self.app.cache_manager.buscar_por_radicados(radicados):
+                vistos.add(os.path.normcase(resultado[2]))
+                resultados.append(resultado)
+        
+        if hasattr(self.app, 'multi_location_search'):
+            plan = self.app.multi_location_search.get_scan_plan()
+            for root in plan.scan_roots:
+                temp_cache = CacheManager.de_ubicacion(root.location['path'])
+                if not temp_cache:
+                    continue
+                for resultado in temp_cache.buscar_por_radicados(radicados):
+                    clave = os.path.normcase(resultado[2])
+                    if clave not in vistos:
+                        vistos.add(clave)
+                        resultados.append(resultado)
+        
+        return resultados
+    
     def _buscar_ubicacion(self, location, criterio):
         """Busca en una ubicación específica"""
-        # Generar cache único
-        path_hash = hashlib.md5(location['path'].encode()).hexdigest()[:8]
-        cache_filename = f"cache_{path_hash}.pkl"
-        
         from .cache_manager import CacheManager
-        temp_cache = CacheManager(location['path'])
-        temp_cache.cache_file = cache_filename
         
-        # Intentar cache
-        cache_loaded = temp_cache.cargar_cache()
-        if cache_loaded and temp_cache.cache.valido:
+        # Intentar cache (cargado una vez y compartido)
+        temp_cache = CacheManager.de_ubicacion(location['path'])
+        if temp_cache:
+            self._registrar_indice_hijos(temp_cache)
             try:
                 stats = temp_cache.cache.directorios
                 if stats.get('total', 0) > 0:
                     results = temp_cache.buscar_en_cache(criterio)
                     if results:
-                        return results[:20]
+                        return results
             except:
                 pass
         
@@ -96,14 +207,11 @@ class SearchMethods:
         criterio_lower = criterio.lower()
         
         for root, dirs, files in os.walk(path):
-            for dirname in dirs[:15]:
+            for dirname in dirs:
                 if criterio_lower in dirname.lower():
                     ruta_completa = os.path.join(root, dirname)
                     ruta_relativa = os.path.relpath(ruta_completa, path)
                     results.append((dirname, ruta_relativa, ruta_completa))
-                    
-                    if len(results) >= 20:
-                        break
             break  # Solo primer nivel
         
         return results
@@ -115,20 +223,17 @@ class SearchMethods:
             resultados = self._buscar_cache(criterio)
             if resultados:
                 from .results_display import ResultsDisplay
-                resultados = self._enriquecer_con_bd(resultados, criterio)
                 ResultsDisplay(self.app).mostrar_instantaneos(resultados, criterio, "Cache")
                 return
         
         # 2. Búsqueda directa
         def worker():
             if not hasattr(self.app, 'ruta_carpeta') or not self.app.ruta_carpeta:
-                self.app.master.after(0, lambda: [
-                    self.app.ui_callbacks.actualizar_estado("No se encontraron resultados"),
-                    self.app.ui_callbacks.habilitar_busqueda()
-                ])
+                self.app.ui_callbacks.actualizar_estado_async("No se encontraron resultados")
+                self.app.ui_callbacks.finalizar_busqueda_async()
                 return
             
-            resultados = []
+            ranking = self.nuevo_ranking(criterio, "Tradicional")
             criterio_lower = criterio.lower()
             
             for root, dirs, files in os.walk(self.app.ruta_carpeta):
@@ -136,22 +241,31 @@ class SearchMethods:
                     if criterio_lower in dirname.lower():
                         ruta_completa = os.path.join(root, dirname)
                         ruta_relativa = os.path.relpath(ruta_completa, self.app.ruta_carpeta)
-                        resultados.append((dirname, ruta_relativa, ruta_completa))
-                        
-                        if len(resultados) >= 100:
-                            break
-                
-                if len(resultados) >= 100:
-                    break
+                        ranking.push((dirname, ruta_relativa, ruta_completa))
             
-            resultados = self._enriquecer_con_bd(resultados, criterio)
+            _, resultados = self.siguiente_pagina()
             
             from .results_display import ResultsDisplay
-            self.app.master.after(0, lambda: 
-                ResultsDisplay(self.app).mostrar_tradicionales(resultados, criterio))
+            self.app.ui_dispatcher.publicar(ResultsDisplay(self.app).mostrar_tradicionales, resultados, criterio)
         
         threading.Thread(target=worker, daemon=True).start()
     
+    def _registrar_indice_hijos(self, cache_manager):
+        """Las flechas de expansión de carpetas indexadas no requieren sondear el disco"""
+        prober = getattr(self.app, 'children_prober', None)
+        if not prober:
+            return
+        
+        rutas = cache_manager.rutas_con_hijos()
+        if rutas is not None:
+            prober.registrar_indice(cache_manager.cache_file, rutas)
+            return
+        
+        # Cache anterior al índice: se arma fuera del hilo de la interfaz
+        def worker():
+            prober.registrar_indice(cache_manager.cache_file, cache_manager.completar_indice_con_hijos())
+        threading.Thread(target=worker, daemon=True).start()
+    
     def _tiene_cache_valido(self):
         """Verifica cache válido"""
         try:
@@ -162,10 +276,14 @@ class SearchMethods:
             return False
     
     def _buscar_cache(self, criterio):
-        """Búsqueda en cache"""
+        """Búsqueda en cache: primera página del ranking de coincidencias"""
         try:
             resultados = self.app.cache_manager.buscar_en_cache(criterio)
-            return resultados[:50] if resultados else []
+            if not resultados:
+                return []
+            self._registrar_indice_hijos(self.app.cache_manager)
+            self.nuevo_ranking(criterio, "Cache").extend(resultados)
+            return self.siguiente_pagina()[1]
         except:
             return []
 
@@ -175,56 +293,4 @@ class SearchMethods:
         Formato: 110013105017 + AAAA (año) + NNNNN (expediente 5 dígitos) + 00
         Ejemplo: 2025-10212 → 11001310501720251021200
         """
-        import re
-        # Detectar formato AAAA-EXP (año-expediente)
-        match = re.match(r'(\d{4})-(\d+)$', criterio)
-        if not match:
-            return None
-        
-        año = match.group(1)  # 4 dígitos del año
-        exp = match.group(2).zfill(5)  # Expediente con padding a 5 dígitos
-        
-        # Formato completo: prefijo (12) + año (4) + exp (5) + sufijo (2) = 23 dígitos
-        radicado = f"110013105017{año}{exp}00"
-        
-        # Verificar que sea exactamente 23 dígitos
-        return radicado if len(radicado) == 23 else None
-    
-    def _enriquecer_con_bd(self, resultados, criterio):
-        """Enriquece resultados con datos de la base de datos"""
-        if not hasattr(self.app, 'database_manager') or not self.app.database_manager:
-            # Sin database manager, retornar con valores vacíos
-            return [(r[0], r[1], r[2], "", "") if len(r) == 3 else 
-                    (r[0], r[1], r[2], r[3], "", "") if len(r) == 4 else r 
-                    for r in resultados]
-        
-        # Intentar convertir criterio a radicado
-        radicado = self._convertir_a_radicado(criterio)
-        if not radicado:
-            # Si no es formato AAAA-EXP, retornar con valores vacíos
-            return [(r[0], r[1], r[2], "", "") if len(r) == 3 else 
-                    (r[0], r[1], r[2], r[3], "", "") if len(r) == 4 else r 
-                    for r in resultados]
-        
-        # Consultar base de datos
-        demandante, demandado = self.app.database_manager.obtener_info_proceso(radicado)
-        
-        # Enriquecer resultados
-        # Tuplas pueden ser de 3 elementos (nombre, ruta_rel, ruta_abs) 
-        # o 4 elementos (nombre, ruta_rel, ruta_abs, ubicacion) para multi-ubicación
-        resultados_enriquecidos = []
-        for resultado in resultados:
-            if len(resultado) == 3:
-                # Búsqueda cache/tradicional: (nombre, ruta_rel, ruta_abs)
-                resultados_enriquecidos.append((
-                    resultado[0], resultado[1], resultado[2], demandante, demandado
-                ))
-            elif len(resultado) == 4:
-                # Búsqueda multi-ubicación: (nombre, ruta_rel, ruta_abs, ubicacion)
-                resultados_enriquecidos.append((
-                    resultado[0], resultado[1], resultado[2], resultado[3], demandante, demandado
-                ))
-            else:
-                resultados_enriquecidos.append(resultado)
-        
-        return resultados_enriquecidos
\ No newline at end of file
+        return radicado_desde_criterio(criterio)
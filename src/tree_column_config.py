@@ -35,13 +35,16 @@ class TreeColumnConfig:
         }
     }
     
-    def __init__(self, tree, config_id):
+    def __init__(self, tree, config_id, modelo_anchos=None):
         """
         Args:
             tree: TreeView instance existente (puede ser None si aún no existe)
             config_id: ID único para persistencia ('results' o 'historial')
+            modelo_anchos: ColumnWidthModel del tree; si existe, el autoajuste
+                usa sus máximos en lugar de recorrer las filas
         """
         self.tree = tree
+        self.modelo_anchos = modelo_anchos
         # Track de anchos originales para toggle
         self._original_widths = {}
         self.config_id = config_id
@@ -460,7 +463,9 @@ class TreeColumnConfig:
                 max_width = max(max_width, len(str(heading_text)) * 8)
             
             # Ancho del contenido
-            if column_id == '#0':
+            if self.modelo_anchos:
+                max_width = max(max_width, self.modelo_anchos.ancho_contenido(column_id))
+            elif column_id == '#0':
                 for item in items:
                     text = self.tree.item(item, 'text')
                     if text:
@@ -522,6 +527,16 @@ class TreeColumnConfig:
             if not items:
                 return
             
+            # Con modelo incremental: máximos ya calculados, sin recorrer filas
+            if self.modelo_anchos:
+                heading = str(self.tree.heading(column_id, 'text'))
+                max_width = max(50, self.modelo_anchos.ancho_texto(heading) + 50,
+                                self.modelo_anchos.ancho_contenido(column_id) + 50)
+                new_width = int(min(max_width * 1.1, 800))
+                self.tree.column(column_id, width=new_width)
+                print(f'[TreeColumnConfig] Column {column_id} autofitted: {new_width}px (was {current_width}px)')
+                return
+            
             # Obtener fuente del treeview para medicion real
             try:
                 import tkinter.font as tkfont
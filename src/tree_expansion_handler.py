@@ -2,6 +2,8 @@
 import os
 from datetime import datetime
 
+from .listing_cache import listar_directorio
+
 class TreeExpansionHandler:
     """Maneja la expansión de subcarpetas en el TreeView de resultados"""
     
@@ -63,30 +65,23 @@ class TreeExpansionHandler:
         try:
             items = []
             
-            # Listar contenido del directorio
-            for entry in os.scandir(parent_path):
-                try:
-                    if entry.is_dir():
-                        nombre = entry.name
-                        ruta_completa = entry.path
-                        
-                        try:
-                            fecha_mod = datetime.fromtimestamp(
-                                entry.stat().st_mtime
-                            ).strftime("%d/%m/%Y %H:%M")
-                        except:
-                            fecha_mod = "N/A"
-                        
-                        items.append((nombre, ruta_completa, fecha_mod))
-                except PermissionError:
+            # Listar contenido del directorio (cache compartido con los demás árboles)
+            prefetcher = getattr(self.app, 'directory_prefetcher', None)
+            listado = prefetcher.listar(parent_path) if prefetcher else listar_directorio(parent_path)
+            for nombre, es_dir, mtime, ruta_completa in listado:
+                if not es_dir:
                     continue
+                try:
+                    fecha_mod = datetime.fromtimestamp(mtime).strftime("%d/%m/%Y %H:%M")
                 except Exception:
-                    continue
+                    fecha_mod = "N/A"
+                items.append((nombre, ruta_completa, fecha_mod))
             
             # Ordenar alfabéticamente
             items.sort(key=lambda x: x[0].lower())
             
-            # Insertar en el TreeView
+            # Insertar en el TreeView; las flechas las agrega el sondeo en segundo plano
+            sondeos = []
             for i, (nombre, ruta, fecha) in enumerate(items):
                 # Determinar método (mantener el del padre)
                 parent_values = self.app.tree.item(parent_item, 'values')
@@ -105,9 +100,14 @@ class TreeExpansionHandler:
                     tags=(tag,)
                 )
                 
-                # Agregar nodo dummy si tiene subcarpetas
-                if self._tiene_subcarpetas(ruta):
-                    self.app.tree.insert(child_item, 'end', text='Cargando...', values=('', ''))
+                sondeos.append((child_item, ruta))
+            
+            prober = getattr(self.app, 'children_prober', None)
+            if prober:
+                prober.solicitar(sondeos)
+            # La próxima expansión probable es una de estas subcarpetas
+            if prefetcher:
+                prefetcher.sugerir(ruta for _, ruta in sondeos)
             
             print(f"[DEBUG] Cargadas {len(items)} subcarpetas de: {parent_path}")
             
@@ -116,19 +116,6 @@ class TreeExpansionHandler:
         except Exception as e:
             print(f"[ERROR] Error cargando subcarpetas: {e}")
     
-    def _tiene_subcarpetas(self, ruta):
-        """Verifica si una carpeta tiene subcarpetas"""
-        try:
-            if not os.path.exists(ruta) or not os.path.isdir(ruta):
-                return False
-            
-            for entry in os.scandir(ruta):
-                if entry.is_dir():
-                    return True
-            return False
-        except:
-            return False
-    
     def clear_cache(self):
         """Limpia el caché de items cargados"""
         self.loaded_items.clear()
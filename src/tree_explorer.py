@@ -3,9 +3,13 @@ import tkinter as tk
 from tkinter import ttk
 import os
 import threading
-import time
+from .directory_stats import DirectoryStatsService, formatear_tamaño
+from .listing_cache import ListingCache
 from .managers.base_tree_manager import BaseTreeManager
 
+# Subcarpetas mostradas por expansión antes de la fila "... y más carpetas"
+MAX_SUBCARPETAS = 100
+
 class TreeExplorer(BaseTreeManager):
     def __init__(self, master, app_reference):
         # Configuración para BaseTreeManager
@@ -21,9 +25,13 @@ class TreeExplorer(BaseTreeManager):
         
         # Atributos específicos del navegador
         self.master = master
-        self.temp_cache = {}
+        self.temp_cache = getattr(app_reference, 'listing_cache', None) or ListingCache()
+        self.prefetcher = getattr(app_reference, 'directory_prefetcher', None)
         self.loading_nodes = set()
         self.expanded_nodes = set()
+        self.dir_stats = getattr(app_reference, 'directory_stats', None) or DirectoryStatsService()
+        self._estadisticas = {}  # {ruta: stats} ya recibidas del servicio
+        self._filas_por_ruta = {}  # {ruta: {item_id: nombre}} esperando estadísticas
         
     def setup_explorer_mode(self):
         """Configura el TreeView existente para modo explorador"""
@@ -44,13 +52,16 @@ class TreeExplorer(BaseTreeManager):
         tree = self.app.tree
         
         tree.delete(*tree.get_children())
-        self.temp_cache.clear()
+        self.dir_stats.cancelar(grupo=self)  # Las filas anteriores ya no existen
+        # El cache de listados es el de toda la app y se valida por mtime: no se vacía
         self.loading_nodes.clear()
         self.expanded_nodes.clear()
+        self._filas_por_ruta.clear()
         
         if not resultados:
             return
         
+        filas = []
         for i, carpeta in enumerate(resultados):
             try:
                 if isinstance(carpeta, dict):
@@ -67,17 +78,17 @@ class TreeExplorer(BaseTreeManager):
                 icono_metodo = "C"  # Cache por defecto
                 
                 node_id = tree.insert("", "end", 
-                                    text=f"📁 {nombre}", 
+                                    text=self._texto_carpeta(nombre, path), 
                                     values=(icono_metodo, path if isinstance(carpeta, dict) else ruta_rel),
                                     open=False,
                                     tags=(tag,))
-                
-                if self.has_subdirectories(path):
-                    tree.insert(node_id, "end", text="Cargando...", values=("", ""))
+                filas.append((node_id, nombre, path))
                     
             except Exception:
                 continue
         
+        self._solicitar_estadisticas(filas)
+        
         if hasattr(self.app, 'configurar_scrollbars'):
             self.app.configurar_scrollbars()
         
@@ -141,8 +152,9 @@ class TreeExplorer(BaseTreeManager):
         
         self.expanded_nodes.add(node_id)
         
-        if path in self.temp_cache:
-            self.populate_children_from_cache(node_id, path)
+        listado = self.temp_cache.obtener(path)
+        if listado is not None:
+            self.populate_children_from_cache(node_id, path, self._subcarpetas(listado))
             
             if hasattr(self.app, 'ui_callbacks') and hasattr(self.app.ui_callbacks, '_ajustar_columnas_inmediato'):
                 self.app.ui_callbacks._ajustar_columnas_inmediato()
@@ -157,119 +169,113 @@ class TreeExplorer(BaseTreeManager):
         def load_subdirectories():
             try:
                 subdirs = self.scan_subdirectories(path)
-                self.master.after(0, self.on_subdirectories_loaded, node_id, path, subdirs)
+                self.app.ui_dispatcher.publicar(self.on_subdirectories_loaded, node_id, path, subdirs)
             except Exception as e:
-                self.master.after(0, self.on_subdirectories_error, node_id, str(e))
+                self.app.ui_dispatcher.publicar(self.on_subdirectories_error, node_id, str(e))
                 
         threading.Thread(target=load_subdirectories, daemon=True).start()
         
     def scan_subdirectories(self, path):
-        """Escanea subdirectorios de una carpeta"""
-        subdirs = []
-        
+        """Escanea subdirectorios de una carpeta (solo el primer nivel)
+
+        El listado sale del cache compartido (o de un os.scandir, sin stat ni
+        listados de los hijos). Archivos y tamaño los completa DirectoryStatsService.
+        """
         try:
-            if not os.path.exists(path) or not os.path.isdir(path):
-                return subdirs
-                
-            start_time = time.time()
-            
-            for item in os.listdir(path):
-                if time.time() - start_time > 2.0:  # Máximo 2 segundos
-                    break
-                    
-                item_path = os.path.join(path, item)
-                
-                if os.path.isdir(item_path):
-                    try:
-                        file_count = len([f for f in os.listdir(item_path) 
-                                        if os.path.isfile(os.path.join(item_path, f))])
-                        
-                        size = self.calculate_folder_size_quick(item_path)
-                        
-                        subdirs.append({
-                            'name': item,
-                            'path': item_path,
-                            'files': file_count,
-                            'size': self.format_size(size)
-                        })
-                        
-                    except (PermissionError, OSError):
-                        subdirs.append({
-                            'name': f"{item} (Sin acceso)",
-                            'path': item_path,
-                            'files': 0,
-                            'size': "N/A"
-                        })
-                        
-                if len(subdirs) >= 100:
-                    subdirs.append({
-                        'name': f"... y más carpetas ({len(os.listdir(path)) - len(subdirs)} adicionales)",
-                        'path': "",
-                        'files': 0,
-                        'size': ""
-                    })
-                    break
-                    
+            if self.prefetcher:
+                listado = self.prefetcher.listar(path)
+            else:
+                listado = self.temp_cache.listar(path)
         except (PermissionError, OSError):
-            pass
+            return []
+        return self._subcarpetas(listado)
+        
+    def _subcarpetas(self, listado):
+        """Filas de subcarpetas a partir de un listado del cache"""
+        carpetas = sorted(((nombre, ruta) for nombre, es_dir, _, ruta in listado if es_dir),
+                          key=lambda carpeta: carpeta[0].lower())
+        subdirs = [{'name': nombre, 'path': ruta, 'files': None, 'size': ""}
+                   for nombre, ruta in carpetas[:MAX_SUBCARPETAS]]
+        
+        if len(carpetas) > len(subdirs):
+            subdirs.append({
+                'name': f"... y más carpetas ({len(carpetas) - len(subdirs)} adicionales)",
+                'path': "",
+                'files': 0,
+                'size': ""
+            })
             
         return subdirs
         
-    def calculate_folder_size_quick(self, path):
-        """Calcula tamaño de carpeta de forma rápida"""
-        try:
-            total_size = 0
-            count = 0
-            
-            for item in os.listdir(path):
-                if count >= 50:
-                    break
-                    
-                item_path = os.path.join(path, item)
-                if os.path.isfile(item_path):
-                    total_size += os.path.getsize(item_path)
-                    count += 1
-                    
-            return total_size
-        except (PermissionError, OSError):
-            return 0
-            
     def format_size(self, size_bytes):
         """Formatea tamaño en bytes"""
-        if size_bytes == 0:
-            return "0 B"
-            
-        for unit in ['B', 'KB', 'MB', 'GB']:
-            if size_bytes < 1024.0:
-                return f"{size_bytes:.1f} {unit}"
-            size_bytes /= 1024.0
-            
-        return f"{size_bytes:.1f} TB"
+        return formatear_tamaño(size_bytes)
         
-    def on_subdirectories_loaded(self, node_id, path, subdirs):
-        """Callback cuando se cargan subdirectorios"""
+    # Estadísticas de carpetas (se completan en segundo plano)
+    
+    def _texto_carpeta(self, nombre, path):
+        stats = self._estadisticas.get(path)
+        if not stats:
+            return f"📁 {nombre}"
+        tamaño = stats['bytes_total'] if stats['bytes_total'] is not None else stats['bytes']
+        sufijo = "" if stats['bytes_total'] is not None else "+"
+        return f"📁 {nombre}  ({stats['archivos']} archivos, {formatear_tamaño(tamaño)}{sufijo})"
+        
+    def _solicitar_estadisticas(self, filas):
+        """filas: [(item_id, nombre, ruta)]. Flechas y estadísticas llegan después"""
+        if not filas:
+            return
+        pendientes = []
+        for item_id, nombre, path in filas:
+            if path not in self._filas_por_ruta:
+                pendientes.append(path)
+            self._filas_por_ruta.setdefault(path, {})[item_id] = nombre
+        
+        if hasattr(self.app, 'children_prober'):
+            self.app.children_prober.solicitar([(item_id, path) for item_id, _, path in filas])
+        self.dir_stats.solicitar(pendientes, self._on_estadisticas, grupo=self)
+        
+    def _on_estadisticas(self, path, stats):
+        """Hilo del pool: se combinan por cuadro y se aplican en el hilo de Tk"""
+        if stats is not None:
+            self.app.ui_dispatcher.publicar_lote('estadisticas', self._aplicar_estadisticas, [(path, stats)])
+        
+    def _aplicar_estadisticas(self, actualizaciones):
         tree = self.app.tree
+        for path, stats in actualizaciones:
+            self._estadisticas[path] = stats
+            filas = self._filas_por_ruta.get(path, {})
+            for item_id, nombre in list(filas.items()):
+                try:
+                    if tree.exists(item_id):
+                        tree.item(item_id, text=self._texto_carpeta(nombre, path))
+                        continue
+                except Exception:
+                    pass
+                del filas[item_id]
+            if stats['bytes_total'] is not None or not filas:
+                self._filas_por_ruta.pop(path, None)
         
-        children = tree.get_children(node_id)
-        for child in children:
-            tree.delete(child)
-            
-        self.temp_cache[path] = subdirs
-        self.populate_children_from_cache(node_id, path)
+    def on_subdirectories_loaded(self, node_id, path, subdirs):
+        """Callback cuando se cargan subdirectorios"""
+        self.populate_children_from_cache(node_id, path, subdirs)
         self.loading_nodes.discard(node_id)
         
         if hasattr(self.app, 'ui_callbacks') and hasattr(self.app.ui_callbacks, '_ajustar_columnas_inmediato'):
             self.app.ui_callbacks._ajustar_columnas_inmediato()
         
-    def populate_children_from_cache(self, node_id, path):
+    def populate_children_from_cache(self, node_id, path, subdirs=None):
         """Pobla hijos desde cache temporal"""
         tree = self.app.tree
-        subdirs = self.temp_cache.get(path, [])
+        if subdirs is None:
+            listado = self.temp_cache.obtener(path)
+            subdirs = self._subcarpetas(listado) if listado is not None else []
         
         children = tree.get_children(node_id)
-        for child in children:
-            tree.delete(child)
+        if children:
+            tree.delete(*children)
         
+        filas = []
         for i, subdir in enumerate(subdirs):
             tag = 'evenrow' if i % 2 == 0 else 'oddrow'
             
@@ -280,12 +286,16 @@ class TreeExplorer(BaseTreeManager):
                                      tags=(tag,))
             else:
                 child_id = tree.insert(node_id, "end",
-                                     text=f"📁 {subdir['name']}",
+                                     text=self._texto_carpeta(subdir['name'], subdir['path']),
                                      values=("E", subdir['path']),
                                      tags=(tag,))
-                
-                if self.has_subdirectories(subdir['path']):
-                    tree.insert(child_id, "end", text="Cargando...", values=("", ""))
+                filas.append((child_id, subdir['name'], subdir['path']))
+        
+        self._solicitar_estadisticas(filas)
+        
+        # Los hijos quedan justo debajo del cursor: se prelistan en ese orden
+        if self.prefetcher:
+            self.prefetcher.sugerir(path for _, _, path in filas)
                     
     def on_subdirectories_error(self, node_id, error_msg):
         """Callback cuando hay error cargando subdirectorios"""
@@ -415,18 +425,27 @@ class TreeExplorer(BaseTreeManager):
                 return None
         
     def clear_temp_cache(self):
-        """Limpia el cache temporal"""
-        self.temp_cache.clear()
+        """Limpia lo expandido y las estadísticas de la vista (los listados compartidos se conservan)"""
+        self.dir_stats.cancelar(grupo=self)
+        # Los listados compartidos se validan por mtime; vaciarlos le quitaría los suyos al explorador
         self.loading_nodes.clear()
         self.expanded_nodes.clear()
+        self._estadisticas.clear()
+        self._filas_por_ruta.clear()
         
         if hasattr(self.app, 'actualizar_info_carpeta'):
             self.app.actualizar_info_carpeta()
         
     def get_cache_stats(self):
         """Obtiene estadísticas del cache temporal"""
+        cache = self.temp_cache.get_stats()
         return {
-            'cached_paths': len(self.temp_cache),
+            'cached_paths': cache['entradas'],
             'loading_nodes': len(self.loading_nodes),
-            'memory_usage': sum(len(subdirs) for subdirs in self.temp_cache.values())
+            'memory_usage': cache['bytes'],
+            'memory_limit': cache['max_bytes'],
+            'cache_hits': cache['aciertos'],
+            'cache_invalidated': cache['invalidadas'],
+            'cache_evicted': cache['desalojadas'],
+            'dir_stats': self.dir_stats.get_stats()
         }
\ No newline at end of file
@@ -0,0 +1,76 @@
+# src/tree_navigation.py - Navegación con teclado por filas visibles del TreeView
+class VisibleRowNavigator:
+    """Fila visible siguiente/anterior sin armar la lista de filas visibles
+
+    El TreeView ya mantiene los enlaces padre/hermano al insertar, borrar,
+    expandir y colapsar; moverse una fila solo sigue esos enlaces, así que
+    el costo depende de la profundidad y no de cuántas filas hay abiertas.
+    """
+
+    def __init__(self, tree):
+        self.tree = tree
+
+    def _abierto(self, item):
+        return self.tree.tk.getboolean(self.tree.item(item, 'open'))
+
+    def _ultimo_visible(self, item):
+        """Último descendiente visible de `item` (o el mismo item)"""
+        while self._abierto(item):
+            hijos = self.tree.get_children(item)
+            if not hijos:
+                break
+            item = hijos[-1]
+        return item
+
+    def primero(self):
+        hijos = self.tree.get_children('')
+        return hijos[0] if hijos else None
+
+    def ultimo(self):
+        hijos = self.tree.get_children('')
+        return self._ultimo_visible(hijos[-1]) if hijos else None
+
+    def siguiente(self, item):
+        if self._abierto(item):
+            hijos = self.tree.get_children(item)
+            if hijos:
+                return hijos[0]
+        # Sin hijos visibles: el hermano siguiente de él o de su ancestro más cercano
+        while item:
+            hermano = self.tree.next(item)
+            if hermano:
+                return hermano
+            item = self.tree.parent(item)
+        return None
+
+    def anterior(self, item):
+        hermano = self.tree.prev(item)
+        if hermano:
+            return self._ultimo_visible(hermano)
+        return self.tree.parent(item) or None
+
+    def en_pantalla(self, maximo):
+        """Hasta `maximo` filas de las que se ven ahora, de arriba hacia abajo
+
+        No se sondea por píxel (con encabezados, identify_row(1) cae en
+        ellos y no da fila): se saltan las filas desplazadas hacia arriba,
+        que no tienen bbox, hasta la primera que sí.
+        """
+        item = self.primero()
+        while item and not self.tree.bbox(item):
+            item = self.siguiente(item)
+        filas = []
+        while item and len(filas) < maximo and self.tree.bbox(item):
+            filas.append(item)
+            item = self.siguiente(item)
+        return filas
+
+    def mover(self, item, pasos):
+        """Avanza (pasos > 0) o retrocede hasta `pasos` filas; se detiene en los extremos"""
+        paso = self.siguiente if pasos > 0 else self.anterior
+        for _ in range(abs(pasos)):
+            destino = paso(item)
+            if not destino:
+                break
+            item = destino
+        return item
@@ -2,76 +2,46 @@
 import tkinter as tk
 from tkinter import messagebox
 import os
-import time
 
 class UICallbacks:
     def __init__(self, app_instance):
         self.app = app_instance
-        self._last_adjust_time = 0
-        self._ajuste_en_progreso = False
 
     def _ajustar_columnas_inmediato(self):
-        """Ajuste de columnas automático optimizado"""
-        if self._ajuste_en_progreso or time.time() - self._last_adjust_time < 0.05:
-            return
-            
-        self._ajuste_en_progreso = True
+        """Ajusta la columna del árbol al texto visible más ancho
         
+        El ancho sale del modelo incremental (ColumnWidthModel), que ya tiene
+        el máximo de las filas visibles: no se recorre el árbol.
+        """
         try:
             tree = self.app.tree
-            if not tree or len(tree.get_children()) == 0:
+            modelo = getattr(self.app, 'column_widths', None)
+            if not tree or not modelo or not modelo.hay_filas():
                 return
             
-            max_length = 0
-            max_depth = 0
-            
-            def analizar_visibles(parent='', depth=0):
-                nonlocal max_length, max_depth
-                for item in tree.get_children(parent):
-                    texto = tree.item(item, 'text')
-                    if texto:
-                        texto_limpio = texto.replace('📁', '').replace('📂', '').strip()
-                        length_with_depth = len(texto_limpio) + (depth * 2)
-                        
-                        max_length = max(max_length, length_with_depth)
-                        max_depth = max(max_depth, depth)
-                    
-                    if tree.item(item, 'open'):
-                        analizar_visibles(item, depth + 1)
-            
-            analizar_visibles()
-            
-            if max_length == 0:
-                return
-            
-            # Calcular ancho óptimo
-            if max_length <= 12:
-                nuevo_ancho = 200
-            elif max_length <= 20:
-                nuevo_ancho = 200 + (max_length - 12) * 10
-            elif max_length <= 35:
-                nuevo_ancho = 280 + (max_length - 20) * 8
-            elif max_length <= 50:
-                nuevo_ancho = 400 + (max_length - 35) * 6
-            else:
-                nuevo_ancho = min(490 + (max_length - 50) * 4, 600)
-            
-            nuevo_ancho += max_depth * 12
+            # El modelo ya mide '#0' con la sangría; se suma el margen del ícono de expansión, entre 200 y 600px
+            ancho_contenido = modelo.ancho_contenido('#0')
+            nuevo_ancho = min(max(200, ancho_contenido + 40), 600)
             
             # Aplicar si hay diferencia significativa
             ancho_actual = tree.column('#0', 'width')
             if abs(nuevo_ancho - ancho_actual) > 5:
                 tree.column('#0', width=nuevo_ancho)
-                self._last_adjust_time = time.time()
-                tree.update_idletasks()
                 
         except Exception:
             pass
-        finally:
-            self._ajuste_en_progreso = False
 
     def limpiar_resultados(self):
         """Limpia resultados del TreeView"""
+        # Las partes pendientes de las filas anteriores ya no se aplican
+        if getattr(self.app, 'enrichment_service', None):
+            self.app.enrichment_service.nueva_busqueda()
+        if getattr(self.app, 'children_prober', None):
+            self.app.children_prober.nueva_busqueda()
+        if getattr(self.app, 'virtual_results', None):
+            self.app.virtual_results.desactivar()
+        if getattr(self.app, 'results_organizer', None):
+            self.app.results_organizer.reiniciar()
         try:
             for item in self.app.tree.get_children():
                 self.app.tree.delete(item)
@@ -90,6 +60,10 @@ class UICallbacks:
             return
         
         try:
+            if getattr(self.app, 'results_organizer', None):
+                self.app.results_organizer.registrar(
+                    [r for r in resultados if isinstance(r, tuple) and len(r) >= 3], metodo)
+            
             for i, resultado in enumerate(resultados):
                 tag = 'evenrow' if i % 2 == 0 else 'oddrow'
                 
@@ -324,13 +298,14 @@ Métodos de búsqueda:
 
     # Alias para compatibilidad
     def mostrar_resultados_async(self, resultados, metodo, tiempo_total):
-        self.app.master.after(0, lambda: self.mostrar_resultados(resultados, metodo, tiempo_total))
+        self.app.ui_dispatcher.publicar(self.mostrar_resultados, resultados, metodo, tiempo_total)
     
     def actualizar_estado_async(self, mensaje):
-        self.app.master.after(0, lambda: self.actualizar_estado(mensaje))
+        # Solo el último mensaje pendiente llega a pintarse
+        self.app.ui_dispatcher.publicar_ultimo('estado', self.actualizar_estado, mensaje)
     
     def finalizar_busqueda_inmediata(self):
         self.habilitar_busqueda()
     
     def finalizar_busqueda_async(self):
-        self.app.master.after(0, self.habilitar_busqueda)
\ No newline at end of file
+        self.app.ui_dispatcher.publicar(self.habilitar_busqueda)
\ No newline at end of file
@@ -2,6 +2,7 @@
 import tkinter as tk
 from tkinter import ttk
 from .components.tree_tooltip import TreeViewTooltip
+from .results_model import AGRUPACIONES, CLAVES_ORDEN
 
 
 class Colors:
@@ -138,6 +139,36 @@ class UIComponents:
         )
         btn_cancelar.pack(side=tk.LEFT)
         
+        # Filtro, orden y agrupación de los resultados ya mostrados
+        organizar_frame = tk.Frame(main_frame, bg=Colors.BACKGROUND)
+        organizar_frame.pack(fill=tk.X)
+        
+        tk.Label(organizar_frame, text="Filtrar:", font=Fonts.NORMAL,
+                 bg=Colors.BACKGROUND, fg=Colors.TITLE_FG).pack(side=tk.LEFT)
+        entry_filtro = tk.Entry(
+            organizar_frame,
+            width=24,
+            font=Fonts.NORMAL,
+            relief=tk.FLAT,
+            borderwidth=1,
+            bg="#ffffff",
+            fg=Colors.TITLE_FG
+        )
+        entry_filtro.pack(side=tk.LEFT, padx=(4, 12), ipady=2)
+        
+        tk.Label(organizar_frame, text="Ordenar:", font=Fonts.NORMAL,
+                 bg=Colors.BACKGROUND, fg=Colors.TITLE_FG).pack(side=tk.LEFT)
+        combo_orden = ttk.Combobox(organizar_frame, values=list(CLAVES_ORDEN.values()),
+                                   state="readonly", width=18, font=Fonts.NORMAL)
+        combo_orden.pack(side=tk.LEFT, padx=(4, 12))
+        
+        tk.Label(organizar_frame, text="Agrupar:", font=Fonts.NORMAL,
+                 bg=Colors.BACKGROUND, fg=Colors.TITLE_FG).pack(side=tk.LEFT)
+        combo_agrupar = ttk.Combobox(organizar_frame, values=list(AGRUPACIONES.values()),
+                                     state="readonly", width=12, font=Fonts.NORMAL)
+        combo_agrupar.set(AGRUPACIONES[None])
+        combo_agrupar.pack(side=tk.LEFT, padx=(4, 0))
+        
         # Tabla de resultados
         table_container = tk.Frame(main_frame, bg="#e9ecef", relief=tk.SOLID, borderwidth=1)
         table_container.pack(fill=tk.BOTH, expand=True, pady=(10, 15))
@@ -315,6 +346,10 @@ class UIComponents:
             'btn_buscar': btn_buscar,
             'btn_cancelar': btn_cancelar,
             'tree': tree,
+            'y_scroll': y_scroll,
+            'entry_filtro': entry_filtro,
+            'combo_orden': combo_orden,
+            'combo_agrupar': combo_agrupar,
             'btn_copiar': btn_copiar,
             'btn_abrir': btn_abrir,
             'label_estado': label_estado,
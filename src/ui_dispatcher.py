@@ -0,0 +1,139 @@
+# src/ui_dispatcher.py - Despachador central de actualizaciones de UI por cuadro
+import threading
+import time
+from collections import deque
+
+
+class UIDispatcher:
+    """Único punto por el que los hilos de trabajo tocan widgets
+
+    Los hilos publican actualizaciones en una cola; el hilo de Tk la drena
+    una vez por cuadro (`intervalo_ms`) sin pasar de `presupuesto_ms`. Lo
+    que no alcanza a ejecutarse queda para el cuadro siguiente, en orden.
+
+    Tipos de actualización:
+    - `publicar(fn, *args)`: se ejecuta tal cual, en orden de llegada.
+    - `publicar_ultimo(clave, fn, *args)`: solo cuenta la última por clave
+      (p. ej. el texto de estado); las anteriores pendientes se descartan y
+      la última conserva su lugar en la cola respecto de las demás.
+    - `publicar_lote(clave, fn, items)`: los items pendientes con la misma
+      clave se combinan y `fn(items)` se llama una sola vez.
+    """
+
+    def __init__(self, master, intervalo_ms=16, presupuesto_ms=8):
+        self.master = master
+        self.intervalo_ms = intervalo_ms
+        self.presupuesto = presupuesto_ms / 1000
+
+        self._lock = threading.Lock()
+        self._cola = deque()  # ('llamar', fn, args) | ('ultimo', clave, n) | ('lote', clave)
+        self._ultimos = {}  # {clave: (n, fn, args)}
+        self._secuencia = 0
+        self._lotes = {}  # {clave: (fn, [items])}
+        self._programado = False
+
+        self.stats = {
+            'publicadas': 0, 'ejecutadas': 0, 'descartadas': 0, 'combinadas': 0,
+            'cuadros': 0, 'cuadros_excedidos': 0, 'max_ms_cuadro': 0.0, 'errores': 0
+        }
+
+    # Publicación (cualquier hilo)
+
+    def publicar(self, fn, *args):
+        with self._lock:
+            self.stats['publicadas'] += 1
+            self._cola.append(('llamar', fn, args))
+        self._programar()
+
+    def publicar_ultimo(self, clave, fn, *args):
+        with self._lock:
+            self.stats['publicadas'] += 1
+            if clave in self._ultimos:
+                self.stats['descartadas'] += 1
+            self._secuencia += 1
+            self._ultimos[clave] = (self._secuencia, fn, args)
+            self._cola.append(('ultimo', clave, self._secuencia))
+        self._programar()
+
+    def publicar_lote(self, clave, fn, items):
+        with self._lock:
+            self.stats['publicadas'] += 1
+            if clave in self._lotes:
+                self._lotes[clave][1].extend(items)
+                self.stats['combinadas'] += 1
+            else:
+                self._lotes[clave] = (fn, list(items))
+                self._cola.append(('lote', clave))
+        self._programar()
+
+    def _programar(self, espera=0):
+        with self._lock:
+            if self._programado:
+                return
+            self._programado = True
+        try:
+            self.master.after(espera, self._drenar)
+        except RuntimeError:
+            # La ventana ya se cerró (o el hilo principal terminó)
+            with self._lock:
+                self._programado = False
+
+    # Drenado (hilo de Tk)
+
+    def _siguiente(self):
+        with self._lock:
+            while self._cola:
+                entrada = self._cola.popleft()
+                if entrada[0] == 'ultimo':
+                    n, fn, args = self._ultimos[entrada[1]]
+                    if n != entrada[2]:
+                        continue  # Reemplazada por una posterior que sigue en la cola
+                    del self._ultimos[entrada[1]]
+                elif entrada[0] == 'lote':
+                    fn, items = self._lotes.pop(entrada[1])
+                    args = (items,)
+                else:
+                    _, fn, args = entrada
+                return fn, args
+            return None
+
+    def _drenar(self):
+        inicio = time.perf_counter()
+        limite = inicio + self.presupuesto
+        pendientes = False
+
+        while True:
+            siguiente = self._siguiente()
+            if siguiente is None:
+                break
+            fn, args = siguiente
+            try:
+                fn(*args)
+            except Exception as e:
+                self.stats['errores'] += 1
+                print(f"[UI] Error aplicando actualización: {e}")
+            self.stats['ejecutadas'] += 1
+            if time.perf_counter() >= limite:
+                pendientes = True
+                break
+
+        duracion_ms = (time.perf_counter() - inicio) * 1000
+        self.stats['cuadros'] += 1
+        self.stats['max_ms_cuadro'] = max(self.stats['max_ms_cuadro'], duracion_ms)
+        if duracion_ms > self.presupuesto * 1000:
+            self.stats['cuadros_excedidos'] += 1
+
+        with self._lock:
+            self._programado = False
+            hay_mas = bool(self._cola)
+        if hay_mas:
+            # Si se agotó el presupuesto, lo que quedó espera al próximo cuadro
+            # para que Tk procese eventos y repinte entre tanto
+            self._programar(self.intervalo_ms if pendientes else 0)
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats['pendientes'] = len(self._cola) - sum(
+                1 for e in self._cola if e[0] == 'ultimo' and self._ultimos[e[1]][0] != e[2])
+        return stats
@@ -0,0 +1,351 @@
+# src/virtual_results.py - Vista virtual del TreeView de resultados para conjuntos grandes
+from tkinter import ttk
+
+from .results_model import EncabezadoGrupo, ruta_de
+
+# Filas extra renderizadas debajo de las visibles (cubren redimensiones rápidas)
+MARGEN_FILAS = 5
+
+
+class VirtualResultsView:
+    """Muestra una lista de resultados de cualquier tamaño con un número fijo de filas
+
+    El modelo completo vive en Python; el TreeView solo tiene un grupo de
+    filas reutilizables (las visibles más un margen) que se reescriben al
+    desplazarse o redimensionar. La barra vertical representa la posición
+    en el modelo, no en el TreeView. Las filas virtuales no se expanden:
+    las subcarpetas se abren con doble clic como cualquier carpeta.
+
+    Las partes se guardan por ruta, así que sobreviven a reordenar o
+    filtrar la lista; `partes` puede ser el diccionario de un ResultsModel.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.activa = False
+
+        self.resultados = []
+        self.metodo = None
+        self.offset = 0
+        self.seleccion = None  # Índice en el modelo
+        self._partes = {}  # {ruta: (demandante, demandado)}
+        self._solicitadas = set()  # rutas
+        self._filas = []  # item_ids reutilizables, en orden
+        self._renderizando = False
+        self._render_pendiente = None
+        self._ajustar_pendiente = False
+        self._yscroll_original = None
+        self._bindings = []  # (secuencia, funcid) agregados al TreeView
+
+    # Activación
+
+    def mostrar(self, resultados, metodo, partes=None):
+        """Reemplaza el contenido del TreeView por la vista virtual de `resultados`"""
+        self.desactivar()
+        tree = self.app.tree
+
+        self.resultados = resultados
+        self.metodo = metodo
+        self.offset = 0
+        self.seleccion = None
+        self._partes = partes if partes is not None else {}
+        self._solicitadas = set()
+        self.activa = True
+        tree.tag_configure('grupo', background='#eceff1', foreground='#37474f')
+
+        # La barra vertical pasa a controlar el desplazamiento del modelo
+        self._yscroll_original = tree.cget('yscrollcommand')
+        tree.configure(yscrollcommand='')
+        y_scroll = getattr(self.app, 'y_scroll', None)
+        if y_scroll:
+            y_scroll.configure(command=self._on_scrollbar)
+
+        for secuencia, handler in (('<MouseWheel>', self._on_rueda),
+                                   ('<Button-4>', self._on_rueda),
+                                   ('<Button-5>', self._on_rueda),
+                                   ('<Configure>', self._on_configure),
+                                   ('<<TreeviewSelect>>', self._on_select)):
+            self._bindings.append((secuencia, tree.bind(secuencia, handler, add='+')))
+
+        self._ajustar_filas()
+        self._render()
+
+    def desactivar(self):
+        """Vuelve al TreeView normal (todas las filas reales)"""
+        if not self.activa:
+            return
+        self.activa = False
+        tree = self.app.tree
+
+        if self._render_pendiente:
+            try:
+                tree.after_cancel(self._render_pendiente)
+            except Exception:
+                pass
+            self._render_pendiente = None
+
+        for item_id in self._filas:
+            if tree.exists(item_id):
+                tree.delete(item_id)
+        self._filas = []
+        self.resultados = []
+
+        for secuencia, funcid in self._bindings:
+            self._quitar_binding(tree, secuencia, funcid)
+        self._bindings = []
+
+        tree.configure(yscrollcommand=self._yscroll_original or '')
+        y_scroll = getattr(self.app, 'y_scroll', None)
+        if y_scroll:
+            y_scroll.configure(command=tree.yview)
+
+    @staticmethod
+    def _quitar_binding(tree, secuencia, funcid):
+        """Quita solo nuestro handler; unbind(secuencia) borraría también los de la app"""
+        try:
+            script = tree.bind(secuencia) or ''
+            restante = '\n'.join(linea for linea in script.split('\n') if funcid not in linea)
+            tree.tk.call('bind', tree._w, secuencia, restante)
+            tree.deletecommand(funcid)
+        except Exception as e:
+            print(f"[VISTA VIRTUAL] Error quitando binding {secuencia}: {e}")
+
+    # Geometría y desplazamiento
+
+    def _alto_fila(self):
+        try:
+            alto = ttk.Style().lookup(self.app.tree.cget('style') or 'Treeview', 'rowheight')
+            return int(alto) if alto else 20
+        except Exception:
+            return 20
+
+    def _filas_visibles(self):
+        alto = self.app.tree.winfo_height()
+        if alto <= 1:
+            alto = int(self.app.tree.cget('height')) * self._alto_fila()
+        # Descontar el encabezado (aprox. una fila)
+        return max(1, alto // self._alto_fila() - 1)
+
+    def _ajustar_filas(self):
+        """Crea o elimina filas del grupo según el alto disponible"""
+        tree = self.app.tree
+        necesarias = min(len(self.resultados), self._filas_visibles() + MARGEN_FILAS)
+        while len(self._filas) < necesarias:
+            self._filas.append(tree.insert("", "end", text=""))
+        while len(self._filas) > necesarias:
+            tree.delete(self._filas.pop())
+
+    def _max_offset(self):
+        return max(0, len(self.resultados) - self._filas_visibles())
+
+    def desplazar_a(self, offset):
+        offset = max(0, min(int(offset), self._max_offset()))
+        if offset != self.offset:
+            self.offset = offset
+            self._programar_render()
+
+    def _on_scrollbar(self, *args):
+        if not args:
+            return
+        if args[0] == 'moveto':
+            self.desplazar_a(float(args[1]) * len(self.resultados))
+        elif args[0] == 'scroll':
+            cantidad = int(args[1])
+            paso = self._filas_visibles() if args[2] == 'pages' else 1
+            self.desplazar_a(self.offset + cantidad * paso)
+
+    def _on_rueda(self, event):
+        if not self.activa:
+            return None
+        if getattr(event, 'num', None) == 4:
+            delta = -3
+        elif getattr(event, 'num', None) == 5:
+            delta = 3
+        else:
+            delta = -3 if event.delta > 0 else 3
+        self.desplazar_a(self.offset + delta)
+        return "break"
+
+    def _on_configure(self, event):
+        if self.activa:
+            self._programar_render(ajustar=True)
+
+    def _programar_render(self, ajustar=False):
+        """Agrupa varios eventos de desplazamiento en un solo render por cuadro"""
+        self._ajustar_pendiente = self._ajustar_pendiente or ajustar
+        if self._render_pendiente:
+            return
+
+        def ejecutar():
+            self._render_pendiente = None
+            if not self.activa:
+                return
+            if self._ajustar_pendiente:
+                self._ajustar_pendiente = False
+                self._ajustar_filas()
+                self.offset = min(self.offset, self._max_offset())
+            self._render()
+
+        self._render_pendiente = self.app.tree.after(16, ejecutar)
+
+    # Render
+
+    def _render(self):
+        """Reescribe las filas del grupo con la ventana actual del modelo"""
+        tree = self.app.tree
+        pendientes = []
+        self._renderizando = True
+        try:
+            for posicion, item_id in enumerate(self._filas):
+                indice = self.offset + posicion
+                if indice >= len(self.resultados):
+                    tree.item(item_id, text="", values=(), tags=())
+                    continue
+
+                resultado = self.resultados[indice]
+                if isinstance(resultado, EncabezadoGrupo):
+                    tree.item(item_id, text=f"▾ {resultado[0]} ({resultado.cantidad})",
+                              values=("",) * 4, tags=('grupo',))
+                    continue
+
+                texto, valores, ruta = self._formatear(indice)
+                tag = 'evenrow' if indice % 2 == 0 else 'oddrow'
+                tree.item(item_id, text=texto, values=valores, tags=(tag,))
+
+                if ruta not in self._solicitadas and ruta not in self._partes:
+                    self._solicitadas.add(ruta)
+                    pendientes.append((ruta, resultado[0], resultado[2]))
+
+            self._sincronizar_seleccion()
+            # El TreeView nunca se desplaza por sí mismo: la ventana ya es el desplazamiento
+            tree.yview_moveto(0)
+        finally:
+            self._renderizando = False
+
+        self._actualizar_scrollbar()
+
+        # Solo se enriquecen las filas que llegan a mostrarse
+        if pendientes and getattr(self.app, 'enrichment_service', None):
+            self.app.enrichment_service.solicitar(pendientes, destino=self.aplicar_partes)
+
+    def _formatear(self, indice):
+        resultado = self.resultados[indice]
+        nombre, ruta_rel, ruta_abs = resultado[:3]
+        ruta = ruta_de(resultado)
+        demandante, demandado = self._partes.get(ruta, (
+            resultado[4] if len(resultado) > 4 else "",
+            resultado[5] if len(resultado) > 5 else ""))
+
+        if self.metodo == "Multi" and len(resultado) >= 4:
+            valores = (resultado[3], ruta, demandante, demandado)
+        else:
+            letra = self.metodo[0].upper() if self.metodo else 'C'
+            valores = (letra, ruta, demandante, demandado)
+        return f"📂 {nombre}", valores, ruta
+
+    def _actualizar_scrollbar(self):
+        y_scroll = getattr(self.app, 'y_scroll', None)
+        total = len(self.resultados)
+        if not y_scroll or not total:
+            return
+        inicio = self.offset / total
+        fin = min(1.0, (self.offset + self._filas_visibles()) / total)
+        y_scroll.set(inicio, fin)
+        if fin - inicio < 1.0:
+            y_scroll.grid()
+
+    def partes_conocidas(self):
+        """{ruta: (demandante, demandado)} ya recibidas por la vista"""
+        return self._partes
+
+    def aplicar_partes(self, actualizaciones):
+        """Destino del enriquecimiento (por ruta): guarda en el modelo y repinta lo visible"""
+        if not self.activa:
+            return
+        for ruta, demandante, demandado in actualizaciones:
+            self._partes[ruta] = (demandante, demandado)
+        nuevas = {ruta for ruta, _, _ in actualizaciones}
+
+        tree = self.app.tree
+        for posicion, item_id in enumerate(self._filas):
+            indice = self.offset + posicion
+            if indice >= len(self.resultados) or isinstance(self.resultados[indice], EncabezadoGrupo):
+                continue
+            ruta = ruta_de(self.resultados[indice])
+            if ruta in nuevas:
+                partes = self._partes[ruta]
+                try:
+                    tree.set(item_id, "Demandante", partes[0])
+                    tree.set(item_id, "Demandado", partes[1])
+                except Exception:
+                    pass
+
+    # Selección
+
+    def _on_select(self, event):
+        if not self.activa or self._renderizando:
+            return
+        seleccion = self.app.tree.selection()
+        if seleccion and seleccion[0] in self._filas:
+            indice = self.offset + self._filas.index(seleccion[0])
+            if indice < len(self.resultados) and isinstance(self.resultados[indice], EncabezadoGrupo):
+                # Los encabezados de grupo no se seleccionan: se vuelve a la fila anterior
+                if self.seleccion is None:
+                    self.app.tree.selection_remove(seleccion)
+                else:
+                    self._sincronizar_seleccion()
+                return
+            self.seleccion = indice
+
+    def _fila_seleccionable(self, indice, paso):
+        """Primer índice desde `indice` (en dirección `paso`, si no en la otra) que no es encabezado"""
+        for direccion in (paso, -paso):
+            actual = indice
+            while 0 <= actual < len(self.resultados):
+                if not isinstance(self.resultados[actual], EncabezadoGrupo):
+                    return actual
+                actual += direccion
+        return None
+
+    def _sincronizar_seleccion(self):
+        """Mantiene resaltada la fila del modelo seleccionada si está en la ventana"""
+        tree = self.app.tree
+        if self.seleccion is None:
+            return
+        posicion = self.seleccion - self.offset
+        if 0 <= posicion < len(self._filas):
+            item_id = self._filas[posicion]
+            if tree.selection() != (item_id,):
+                tree.selection_set(item_id)
+                tree.focus(item_id)
+        elif tree.selection():
+            tree.selection_remove(tree.selection())
+
+    def mover_seleccion(self, keysym):
+        """Navegación con teclado sobre el modelo completo"""
+        if not self.resultados:
+            return
+        actual = self.seleccion if self.seleccion is not None else -1
+        pagina = self._filas_visibles()
+        movimientos = {
+            "Up": actual - 1,
+            "Down": actual + 1,
+            "Prior": actual - pagina,
+            "Next": actual + pagina,
+            "Home": 0,
+            "End": len(self.resultados) - 1
+        }
+        nuevo = max(0, min(len(self.resultados) - 1, movimientos.get(keysym, actual)))
+        # Los encabezados de grupo se saltan en la dirección del movimiento
+        paso = -1 if keysym in ("Up", "Prior", "End") else 1
+        nuevo = self._fila_seleccionable(nuevo, paso)
+        if nuevo is None:
+            return
+        self.seleccion = nuevo
+
+        # Desplazar lo justo para que la fila quede visible
+        if nuevo < self.offset:
+            self.offset = nuevo
+        elif nuevo >= self.offset + self._filas_visibles():
+            self.offset = nuevo - self._filas_visibles() + 1
+        self._render()
@@ -0,0 +1,42 @@
+import unittest
+
+from src.circuit_breaker import ABIERTO, CERRADO, SEMIABIERTO, CircuitBreaker
+
+
+class CircuitBreakerTest(unittest.TestCase):
+
+    def _semiabierto(self):
+        breaker = CircuitBreaker(umbral=1, espera_inicial=0, espera_max=10)
+        breaker.registrar_fallo("caído")
+        self.assertEqual(breaker.estado, ABIERTO)
+        self.assertTrue(breaker.permitir())
+        self.assertEqual(breaker.estado, SEMIABIERTO)
+        return breaker
+
+    def test_prueba_sin_resultado_vuelve_a_abrir_con_la_misma_espera(self):
+        breaker = self._semiabierto()
+        breaker.liberar_prueba()
+        self.assertEqual(breaker.estado, ABIERTO)
+        self.assertEqual(breaker._espera, 0)
+        # La siguiente prueba se permite: no queda trabado en semiabierto
+        self.assertTrue(breaker.permitir())
+        breaker.registrar_exito()
+        self.assertEqual(breaker.estado, CERRADO)
+
+    def test_liberar_prueba_con_circuito_cerrado_no_cambia_nada(self):
+        breaker = CircuitBreaker()
+        breaker.liberar_prueba()
+        self.assertEqual(breaker.estado, CERRADO)
+        self.assertEqual(breaker.stats['aperturas'], 0)
+
+    def test_prueba_fallida_duplica_la_espera(self):
+        breaker = CircuitBreaker(umbral=1, espera_inicial=1, espera_max=10)
+        breaker.registrar_fallo()
+        breaker.estado = SEMIABIERTO
+        breaker.registrar_fallo()
+        self.assertEqual(breaker.estado, ABIERTO)
+        self.assertEqual(breaker._espera, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
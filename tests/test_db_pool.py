@@ -0,0 +1,142 @@
+import types
+import unittest
+
+from src.db_pool import ConnectionPool, PoolTimeoutError
+
+
+class _Cursor:
+
+    def __init__(self, conexion):
+        self.conexion = conexion
+
+    def execute(self, sql, *parametros):
+        if self.conexion.caida:
+            raise Exception("[08S01] [Microsoft][ODBC Driver] Communication link failure")
+        self.conexion.consultas.append(sql)
+
+    def fetchone(self):
+        return (1,)
+
+    def close(self):
+        pass
+
+
+class _Conexion:
+
+    def __init__(self):
+        self.caida = False
+        self.cerrada = False
+        self.consultas = []
+
+    def cursor(self):
+        return _Cursor(self)
+
+    def close(self):
+        self.cerrada = True
+
+
+def _modulo_falso():
+    """Módulo compatible con pyodbc.connect que recuerda las conexiones abiertas"""
+    modulo = types.ModuleType("pyodbc_falso")
+    modulo.abiertas = []
+
+    def connect(*args, **kwargs):
+        conexion = _Conexion()
+        modulo.abiertas.append(conexion)
+        return conexion
+
+    modulo.connect = connect
+    return modulo
+
+
+class ConnectionPoolTest(unittest.TestCase):
+
+    def setUp(self):
+        self.driver = _modulo_falso()
+        self.pool = ConnectionPool(lambda: self.driver.connect("DSN=prueba;", timeout=3),
+                                   max_size=2, max_idle=600, health_interval=30, checkout_timeout=0.05)
+
+    def test_checkout_y_checkin_reutiliza_la_conexion(self):
+        with self.pool.connection() as primera:
+            pass
+        with self.pool.connection() as segunda:
+            pass
+        self.assertIs(primera, segunda)
+        self.assertEqual(len(self.driver.abiertas), 1)
+        stats = self.pool.get_stats()
+        self.assertEqual((stats['creadas'], stats['reutilizadas'], stats['checkouts']), (1, 1, 2))
+        self.assertEqual((stats['en_uso'], stats['inactivas']), (0, 1))
+
+    def test_sin_cupo_espera_y_vence(self):
+        a = self.pool.checkout()
+        b = self.pool.checkout()
+        with self.assertRaises(PoolTimeoutError):
+            self.pool.checkout()
+        stats = self.pool.get_stats()
+        self.assertEqual((stats['timeouts'], stats['pico_en_uso'], stats['en_uso']), (1, 2, 2))
+        self.assertGreaterEqual(stats['esperas'], 1)
+        self.pool.checkin(a)
+        self.pool.checkin(b)
+
+    def test_verifica_las_inactivas_antes_de_entregarlas(self):
+        pooled = self.pool.checkout()
+        self.pool.checkin(pooled)
+        pooled.ultimo_uso -= 60  # Más que health_interval
+        self.assertIs(self.pool.checkout(), pooled)
+        self.assertEqual(pooled.raw.consultas, ["SELECT 1"])
+
+    def test_descarta_la_que_no_pasa_la_verificacion(self):
+        pooled = self.pool.checkout()
+        self.pool.checkin(pooled)
+        pooled.ultimo_uso -= 60
+        pooled.raw.caida = True
+        nueva = self.pool.checkout()
+        self.assertIsNot(nueva, pooled)
+        self.assertTrue(pooled.raw.cerrada)
+        self.assertEqual(self.pool.get_stats()['descartadas_salud'], 1)
+
+    def test_cierra_las_inactivas_mas_de_max_idle(self):
+        pooled = self.pool.checkout()
+        self.pool.checkin(pooled)
+        pooled.ultimo_uso -= 601
+        self.pool.prune()
+        self.assertTrue(pooled.raw.cerrada)
+        stats = self.pool.get_stats()
+        self.assertEqual((stats['cerradas_inactivas'], stats['inactivas']), (1, 0))
+
+    def test_error_de_enlace_descarta_la_conexion(self):
+        for codigo in ("08S01", "08001"):
+            with self.assertRaises(Exception):
+                with self.pool.connection():
+                    raise Exception(f"[{codigo}] enlace caído")
+        self.assertTrue(all(conexion.cerrada for conexion in self.driver.abiertas))
+        stats = self.pool.get_stats()
+        self.assertEqual((stats['descartadas_error'], stats['inactivas'], stats['en_uso']), (2, 0, 0))
+
+    def test_otro_error_devuelve_la_conexion_al_pool(self):
+        with self.assertRaises(ValueError):
+            with self.pool.connection():
+                raise ValueError("error de la consulta")
+        stats = self.pool.get_stats()
+        self.assertEqual((stats['descartadas_error'], stats['inactivas']), (0, 1))
+
+    def test_fallo_al_conectar_libera_el_cupo(self):
+        def connect(*args, **kwargs):
+            raise Exception("[08001] servidor no encontrado")
+        self.driver.connect = connect
+        with self.assertRaises(Exception):
+            self.pool.checkout()
+        stats = self.pool.get_stats()
+        self.assertEqual((stats['fallos_conexion'], stats['en_uso']), (1, 0))
+
+    def test_close_all_cierra_y_rechaza_checkouts(self):
+        pooled = self.pool.checkout()
+        self.pool.checkin(pooled)
+        self.pool.close_all()
+        self.assertTrue(pooled.raw.cerrada)
+        with self.assertRaises(PoolTimeoutError):
+            self.pool.checkout()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+
+from src.file_change_batcher import FileChangeBatcher
+
+
+class _Dispatcher:
+
+    def publicar(self, funcion, *args):
+        funcion(*args)
+
+
+class _Explorador:
+
+    def __init__(self):
+        self.app = SimpleNamespace(ui_dispatcher=_Dispatcher())
+        self.lotes = []
+
+    def apply_tree_patches(self, parches):
+        self.lotes.append(parches)
+
+
+class FileChangeBatcherTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.explorador = _Explorador()
+        self.batcher = FileChangeBatcher(self.explorador)
+        self.batcher.VENTANA = 60  # La ventana se cierra a mano
+
+    def tearDown(self):
+        self.batcher.descartar()
+        self.dir.cleanup()
+
+    def _ruta(self, nombre, contenido=None):
+        ruta = os.path.join(self.dir.name, nombre)
+        if contenido is not None:
+            with open(ruta, 'w') as f:
+                f.write(contenido)
+        return ruta
+
+    def _parches(self):
+        timer = self.batcher._timer
+        if timer:
+            timer.cancel()
+        self.batcher._cerrar_ventana()
+        return self.explorador.lotes[-1] if self.explorador.lotes else []
+
+    def test_crear_y_borrar_se_anula(self):
+        ruta = self._ruta('temporal.txt')
+        self.batcher.creado(ruta)
+        self.batcher.eliminado(ruta)
+        self.assertEqual(self._parches(), [])
+
+    def test_borrar_y_crear_reemplaza_la_fila(self):
+        ruta = self._ruta('archivo.txt', 'x')
+        self.batcher.eliminado(ruta)
+        self.batcher.creado(ruta)
+        parches = self._parches()
+        self.assertEqual([p[:2] for p in parches], [('delete', ruta), ('insert', ruta)])
+        self.assertFalse(parches[1][2])
+
+    def test_cadena_de_renombres_es_un_solo_rename(self):
+        a, b, c = self._ruta('a.txt'), self._ruta('b.txt'), self._ruta('c.txt', 'x')
+        self.batcher.movido(a, b)
+        self.batcher.movido(b, c)
+        parches = self._parches()
+        self.assertEqual(len(parches), 1)
+        self.assertEqual(parches[0][:3], ('rename', a, c))
+
+    def test_renombrar_de_vuelta_no_cambia_nada(self):
+        a, b = self._ruta('a.txt', 'x'), self._ruta('b.txt')
+        self.batcher.movido(a, b)
+        self.batcher.movido(b, a)
+        self.assertEqual(self._parches(), [])
+
+    def test_renombrar_y_borrar_borra_el_original(self):
+        a, b = self._ruta('a.txt'), self._ruta('b.txt')
+        self.batcher.movido(a, b)
+        self.batcher.eliminado(b)
+        self.assertEqual(self._parches(), [('delete', a)])
+
+    def test_mover_lo_recien_creado_es_crearlo_en_el_destino(self):
+        a, b = self._ruta('a.txt'), self._ruta('b.txt', 'x')
+        self.batcher.creado(a)
+        self.batcher.movido(a, b)
+        parches = self._parches()
+        self.assertEqual([p[:2] for p in parches], [('insert', b)])
+
+    def test_carpeta_creada_se_informa_como_carpeta(self):
+        ruta = self._ruta('sub')
+        os.mkdir(ruta)
+        self.batcher.creado(ruta)
+        self.assertEqual(self._parches()[0][:3], ('insert', ruta, True))
+
+    def test_eventos_se_cuentan_desde_el_primero_de_la_ventana(self):
+        ruta = self._ruta('nuevo.txt', 'x')
+        self.batcher.creado(ruta)
+        self.batcher._primer_evento -= 1.0
+        self._parches()
+        self.assertGreaterEqual(self.batcher.stats['ms_totales'], 1000)
+        self.assertLess(self.batcher.stats['max_eventos_por_segundo'], 1.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
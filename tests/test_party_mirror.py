@@ -0,0 +1,87 @@
+import sqlite3
+import unittest
+
+from src.party_mirror import PartyMirror, palabras_nombre
+from src.radicado import PREFIJO_JUZGADO as PREFIJO
+
+
+def _servidor(filas):
+    """SQLite en memoria con la tabla del servidor (T112DRSUJEPROC)"""
+    servidor = sqlite3.connect(":memory:")
+    servidor.execute("CREATE TABLE T112DRSUJEPROC (A112LLAVPROC TEXT, A112CODISUJE TEXT, A112NOMBSUJE TEXT)")
+    servidor.executemany("INSERT INTO T112DRSUJEPROC VALUES (?, ?, ?)", filas)
+    servidor.commit()
+    return servidor
+
+
+def _radicado(año, numero):
+    return f"{PREFIJO}{año}{numero:05d}00"
+
+
+class PartyMirrorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.viejo = _radicado(2015, 1)
+        self.nuevo = _radicado(2024, 2)
+        self.servidor = _servidor([
+            (self.viejo, '0001', 'José Peña Gómez'),
+            (self.viejo, '0002', 'Banco Agrario'),
+            (self.nuevo, '0001', 'María Ñúñez'),
+            ("05001310300120240000300", '0001', 'Otro Juzgado'),
+        ])
+        self.espejo = PartyMirror(":memory:", prefijo=PREFIJO)
+        self.espejo.FETCH_SIZE = 1  # Un bloque por fila: ejercita la carga por partes
+
+    def test_carga_completa_por_bloques(self):
+        self.assertFalse(self.espejo.esta_cargado())
+        self.assertEqual(self.espejo.carga_completa(self.servidor), 3)
+        self.assertTrue(self.espejo.esta_cargado())
+        self.assertEqual(self.espejo.obtener_partes([self.viejo, self.nuevo]), {
+            self.viejo: ('José Peña Gómez', 'Banco Agrario'),
+            self.nuevo: ('María Ñúñez', 'Desconocido'),
+        })
+        # Las tablas temporales quedan vacías después del reemplazo
+        conn = self.espejo._conn
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM partes_nuevas").fetchone()[0], 0)
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM tokens_nuevos").fetchone()[0], 0)
+
+    def test_carga_completa_repetida_no_duplica(self):
+        self.espejo.carga_completa(self.servidor)
+        self.espejo.carga_completa(self.servidor)
+        self.assertEqual(self.espejo.get_stats()['filas'], 3)
+        self.assertEqual(self.espejo.buscar_radicados("Banco"), [self.viejo])
+
+    def test_sync_delta_solo_reemplaza_desde_el_año_indicado(self):
+        self.espejo.carga_completa(self.servidor)
+        self.servidor.execute("UPDATE T112DRSUJEPROC SET A112NOMBSUJE = 'Pedro Ruiz' WHERE A112LLAVPROC = ?",
+                              (self.nuevo,))
+        self.servidor.execute("UPDATE T112DRSUJEPROC SET A112NOMBSUJE = 'Cambio Viejo' WHERE A112LLAVPROC = ?",
+                              (self.viejo,))
+        self.servidor.execute("INSERT INTO T112DRSUJEPROC VALUES (?, '0002', 'Seguros S.A.')", (self.nuevo,))
+        self.servidor.commit()
+
+        self.assertEqual(self.espejo.sync_delta(self.servidor, desde_año=2023), 2)
+        partes = self.espejo.obtener_partes([self.viejo, self.nuevo])
+        self.assertEqual(partes[self.nuevo], ('Pedro Ruiz', 'Seguros S.A.'))
+        self.assertEqual(partes[self.viejo], ('José Peña Gómez', 'Banco Agrario'))  # Antes del año: sin tocar
+        self.assertEqual(self.espejo.buscar_radicados("Maria"), [])
+        self.assertEqual(self.espejo.buscar_radicados("Pedro"), [self.nuevo])
+
+    def test_sync_delta_sin_carga_hace_la_carga_completa(self):
+        self.assertEqual(self.espejo.sync_delta(self.servidor), 3)
+        self.assertTrue(self.espejo.esta_cargado())
+
+    def test_busqueda_por_nombre_sin_tildes_y_por_prefijo(self):
+        self.espejo.carga_completa(self.servidor)
+        self.assertEqual(self.espejo.buscar_radicados("jose pena"), [self.viejo])
+        self.assertEqual(self.espejo.buscar_radicados("PEÑA GÓM"), [self.viejo])
+        self.assertEqual(self.espejo.buscar_radicados("nunez"), [self.nuevo])
+        self.assertEqual(self.espejo.buscar_radicados("Otro Juzgado"), [])
+        self.assertEqual(self.espejo.buscar_radicados("j"), [])
+
+    def test_palabras_nombre(self):
+        self.assertEqual(palabras_nombre("José  Peña-Gómez y Cía."), ['JOSE', 'PENA', 'GOMEZ', 'CIA'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import unittest
+from types import SimpleNamespace
+
+from src.tree_navigation import VisibleRowNavigator
+
+
+class _Tree:
+    """TreeView mínimo: filas {id: (padre, abierto)} en orden y las que se ven en pantalla"""
+
+    def __init__(self, filas, en_pantalla):
+        self.filas = filas
+        self.visibles = set(en_pantalla)
+        self.tk = SimpleNamespace(getboolean=bool)
+
+    def get_children(self, item=''):
+        return [fila for fila, (padre, _) in self.filas.items() if padre == item]
+
+    def item(self, item, opcion):
+        return self.filas[item][1]
+
+    def parent(self, item):
+        return self.filas[item][0]
+
+    def _hermanos(self, item):
+        return self.get_children(self.parent(item))
+
+    def next(self, item):
+        hermanos = self._hermanos(item)
+        posicion = hermanos.index(item)
+        return hermanos[posicion + 1] if posicion + 1 < len(hermanos) else ''
+
+    def prev(self, item):
+        hermanos = self._hermanos(item)
+        posicion = hermanos.index(item)
+        return hermanos[posicion - 1] if posicion else ''
+
+    def bbox(self, item):
+        return (0, 20, 100, 20) if item in self.visibles else ''
+
+
+class VisibleRowNavigatorTest(unittest.TestCase):
+
+    def setUp(self):
+        # raiz (abierta) → a (abierta) → a1, a2; b; c (cerrada) → c1
+        self.filas = {
+            'raiz': ('', True),
+            'a': ('raiz', True),
+            'a1': ('a', False),
+            'a2': ('a', False),
+            'b': ('raiz', False),
+            'c': ('raiz', False),
+            'c1': ('c', False),
+        }
+
+    def test_sin_desplazar_empieza_en_la_primera_fila(self):
+        tree = _Tree(self.filas, ['raiz', 'a', 'a1'])
+        self.assertEqual(VisibleRowNavigator(tree).en_pantalla(10), ['raiz', 'a', 'a1'])
+
+    def test_desplazado_salta_las_filas_de_arriba(self):
+        tree = _Tree(self.filas, ['a2', 'b', 'c'])
+        self.assertEqual(VisibleRowNavigator(tree).en_pantalla(10), ['a2', 'b', 'c'])
+
+    def test_respeta_el_maximo_y_no_entra_en_carpetas_cerradas(self):
+        tree = _Tree(self.filas, ['b', 'c', 'c1'])
+        navegador = VisibleRowNavigator(tree)
+        self.assertEqual(navegador.en_pantalla(1), ['b'])
+        self.assertEqual(navegador.en_pantalla(10), ['b', 'c'])
+
+    def test_nada_en_pantalla(self):
+        self.assertEqual(VisibleRowNavigator(_Tree(self.filas, [])).en_pantalla(10), [])
+        self.assertEqual(VisibleRowNavigator(_Tree({}, [])).en_pantalla(10), [])
+
+
+if __name__ == '__main__':
+    unittest.main()